@@ -1,50 +1,193 @@
 """Travel and Finance Assistant API module."""
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Annotated
+
+from fastapi import FastAPI, Header, HTTPException, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from loguru import logger
 from pydantic import BaseModel
 
-from llm import call_llm, initiallize_llm
+from assistant.admission import (
+    REQUEST_TIMEOUT,
+    AdmissionController,
+    AdmissionRejectedError,
+)
+from assistant.request_metrics import track_request
+from assistant.streaming import format_sse
+from llm import (
+    acall_llm,
+    answer_cache,
+    astream_llm,
+    initiallize_llm,
+    model_lifecycle,
+    router,
+    session_memory,
+)
+from tools import metrics, resilience, singleflight
+from tools.tracing import trace_request
+from unified_logging.logging_client import logging_stats
 from unified_logging.logging_setup import setup_logging
 
 setup_logging()
 logger.info("Initializing Travel and Finance Assistant API")
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    """Warm up the model on startup and stop keep-alive pings on shutdown."""
+    model_lifecycle.start()
+    yield
+    model_lifecycle.stop()
+
+
 # Initialize FastAPI app
-app = FastAPI(title="Travel and Finance Assistant API")
+app = FastAPI(title="Travel and Finance Assistant API", lifespan=lifespan)
 
 # Initialize LLM once
 agent_executor = initiallize_llm()
 
+# Bound concurrent agent runs and the queue in front of them
+admission = AdmissionController()
+
 
 # Define the request model
 class Query(BaseModel):
     """Request model for user queries."""
 
     input: str
+    use_cache: bool = True  # Set to False to bypass the answer cache
+    session_id: str | None = None  # Continue the conversation kept under this id
+
+
+# Clients may pass their own request id; it is echoed back and tags every span.
+RequestId = Annotated[str | None, Header(alias="X-Request-ID")]
 
 
 # Define the query endpoint
 @app.post("/query")
-def query_assistant(query: Query) -> dict[str, str]:
+async def query_assistant(
+    query: Query, response: Response, request_id: RequestId = None,
+) -> dict[str, str]:
     """Process a user query and return the assistant's response."""
+    request_id = request_id or uuid.uuid4().hex
+    response.headers["X-Request-ID"] = request_id
     try:
-        response = call_llm(query.input, agent_executor)
-        logger.success("response: ", response)
+        with trace_request(request_id), track_request("fastapi", "query"):
+            async with asyncio.timeout(REQUEST_TIMEOUT), admission.slot():
+                answer = await acall_llm(
+                    query.input,
+                    agent_executor,
+                    use_cache=query.use_cache,
+                    session_id=query.session_id,
+                )
+        logger.success(f"response: {answer}")
+    except AdmissionRejectedError as e:
+        logger.warning(f"Rejected request, retry after {e.retry_after}s")
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        ) from e
+    except TimeoutError as e:
+        logger.error(f"Request timed out after {REQUEST_TIMEOUT}s")
+        raise HTTPException(
+            status_code=504, detail=f"Query timed out after {REQUEST_TIMEOUT}s",
+        ) from e
     except ValueError as e:
         logger.error(f"Request failed: {e!s}")
         raise HTTPException(
             status_code=500, detail=f"Error processing query: {e!s}",
         ) from e
     else:
-        return {"response": response}
+        return {"response": answer}
+
+
+# Streaming variant of the query endpoint (Server-Sent Events)
+@app.post("/query/stream")
+async def stream_query_assistant(
+    query: Query, request_id: RequestId = None,
+) -> StreamingResponse:
+    """Stream tool progress and answer tokens as Server-Sent Events."""
+    request_id = request_id or uuid.uuid4().hex
+
+    async def events() -> AsyncIterator[str]:
+        # The slot and the trace are taken here: the body is produced after the
+        # handler returns, and may never be if the client disconnects first.
+        try:
+            with (
+                trace_request(request_id),
+                track_request("fastapi", "query_stream"),
+            ):
+                async with asyncio.timeout(REQUEST_TIMEOUT), admission.slot():
+                    async for event in astream_llm(
+                        query.input,
+                        agent_executor,
+                        use_cache=query.use_cache,
+                        session_id=query.session_id,
+                    ):
+                        yield format_sse(event["event"], event["data"])
+        except AdmissionRejectedError as e:
+            logger.warning(f"Rejected streaming request, retry after {e.retry_after}s")
+            yield format_sse("error", f"{e!s} (in {e.retry_after}s)")
+        except TimeoutError:
+            logger.error(f"Streaming request timed out after {REQUEST_TIMEOUT}s")
+            yield format_sse("error", f"Query timed out after {REQUEST_TIMEOUT}s")
+        except ValueError as e:
+            logger.error(f"Streaming request failed: {e!s}")
+            yield format_sse("error", f"Error processing query: {e!s}")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "X-Request-ID": request_id,
+        },
+    )
 
 
 # Optional health check endpoint
 @app.get("/health")
-def health_check() -> dict[str, str]:
-    """Check if the API is running."""
-    return {"status": "ok"}
+def health_check() -> dict:
+    """Check if the API is running and report the model's warm-up state."""
+    return {"status": "ok", "model": model_lifecycle.status()}
+
+
+# Readiness probe: 503 until the model has been warmed up
+@app.get("/ready")
+def readiness_check() -> JSONResponse:
+    """Report whether the model is loaded and requests will be fast."""
+    ready = model_lifecycle.ready
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready},
+    )
+
+
+@app.get("/stats")
+def stats() -> dict[str, dict]:
+    """Report fast-path, cache, session, upstream, admission and logging stats."""
+    return {
+        "router": router.stats(),
+        "answer_cache": answer_cache.stats(),
+        "sessions": session_memory.stats() if session_memory else {},
+        "coalescing": singleflight.stats(),
+        "upstreams": resilience.stats(),
+        "admission": admission.stats(),
+        "logging": logging_stats(),
+    }
+
+
+# Prometheus scrape endpoint
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint() -> PlainTextResponse:
+    """Expose latency histograms, counters and gauges of this process."""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 
 # Run the API (for development)
@@ -0,0 +1 @@
+"""Serving and agent infrastructure for Travel and Finance Assistant."""
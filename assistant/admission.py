@@ -0,0 +1,120 @@
+"""Admission control for the query endpoints.
+
+Caps the number of agent runs in flight and the number of requests waiting
+for a slot. Requests arriving when both are full are rejected immediately
+with a suggested retry delay instead of piling up on the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
+
+from tools.registry import config_section
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+_server_config = config_section("Server")
+
+MAX_IN_FLIGHT = int(_server_config.get("MAX_IN_FLIGHT", 8))
+MAX_QUEUE = int(_server_config.get("MAX_QUEUE", 32))
+REQUEST_TIMEOUT = float(_server_config.get("REQUEST_TIMEOUT", 120))
+
+OVERLOADED_ERROR = "Server is at capacity, retry later"
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a request cannot be admitted or queued."""
+
+    def __init__(self, retry_after: int) -> None:
+        """Store the suggested retry delay in seconds."""
+        super().__init__(OVERLOADED_ERROR)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded concurrency limiter with a bounded wait queue."""
+
+    def __init__(
+        self, max_in_flight: int = MAX_IN_FLIGHT, max_queue: int = MAX_QUEUE,
+    ) -> None:
+        """Create a limiter.
+
+        Args:
+            max_in_flight (int): Requests processed at the same time.
+            max_queue (int): Requests allowed to wait for a free slot.
+
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._in_flight = 0
+        self._waiting = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._avg_latency = 1.0  # Seconds, exponentially weighted.
+
+    def retry_after(self) -> int:
+        """Estimate seconds until a slot frees up for a new request."""
+        batches = (self._waiting + 1) / self.max_in_flight
+        return max(1, math.ceil(self._avg_latency * batches))
+
+    async def acquire(self) -> float:
+        """Wait for a processing slot.
+
+        Returns:
+            float: The ``perf_counter`` time at which the slot was taken, to be
+            passed back to ``release``.
+
+        Raises:
+            AdmissionRejectedError: If all slots and queue places are taken.
+
+        """
+        if self._semaphore.locked() and self._waiting >= self.max_queue:
+            self._rejected += 1
+            raise AdmissionRejectedError(self.retry_after())
+
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._in_flight += 1
+        self._admitted += 1
+        return time.perf_counter()
+
+    def release(self, started: float) -> None:
+        """Free a slot taken by ``acquire`` and record how long it was held."""
+        elapsed = time.perf_counter() - started
+        self._avg_latency = 0.8 * self._avg_latency + 0.2 * elapsed
+        self._in_flight -= 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one processing slot for the duration of the block.
+
+        Raises:
+            AdmissionRejectedError: If all slots and queue places are taken.
+
+        """
+        started = await self.acquire()
+        try:
+            yield
+        finally:
+            self.release(started)
+
+    def stats(self) -> dict[str, float]:
+        """Return in-flight, queued, admitted and rejected counts."""
+        return {
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "admitted": self._admitted,
+            "rejected": self._rejected,
+            "avg_latency_seconds": round(self._avg_latency, 3),
+        }
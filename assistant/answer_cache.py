@@ -0,0 +1,239 @@
+"""Semantic answer cache placed in front of the agent.
+
+Queries are normalized and looked up by exact match first. On a miss, the
+closest earlier queries are found with a local hashed n-gram embedding and
+NumPy cosine similarity; a candidate is only reused when it clears the
+similarity threshold *and* has the same words in the same order, up to
+filler words and small typos. "weather in Paris" never answers "weather in
+London", and "100 USD to INR" never answers "100 INR to USD".
+
+Each entry lives for the shortest TTL among the tools that produced it:
+weather answers expire quickly, currency answers later.
+"""
+
+from __future__ import annotations
+
+import difflib
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from tools.registry import config_section
+
+_cache_config = config_section("AnswerCache")
+
+ENABLED = bool(_cache_config.get("ENABLED", True))
+SIMILARITY_THRESHOLD = float(_cache_config.get("SIMILARITY_THRESHOLD", 0.85))
+TOP_K = int(_cache_config.get("TOP_K", 5))
+MAX_ENTRIES = int(_cache_config.get("MAX_ENTRIES", 2048))
+EMBEDDING_DIM = int(_cache_config.get("EMBEDDING_DIM", 512))
+DEFAULT_TTL = float(_cache_config.get("DEFAULT_TTL", 3600))
+TOOL_TTLS: dict[str, float] = {
+    name: float(ttl) for name, ttl in _cache_config.get("TOOL_TTLS", {}).items()
+}
+# Minimum similarity for two differing words to count as the same word.
+TYPO_SIMILARITY = 0.8
+
+# Words that carry no meaning for cache matching.
+FILLER_WORDS = frozenset({
+    "a", "an", "the", "in", "at", "on", "for", "of", "to", "me", "my", "i",
+    "is", "are", "what", "whats", "how", "hows", "please", "can", "could",
+    "you", "tell", "show", "give", "get", "find", "about", "will", "be", "it",
+    "like", "there", "any",
+})
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase a query and strip punctuation and repeated whitespace."""
+    return " ".join(_TOKEN_RE.findall(query.lower().replace("'", "")))
+
+
+def _content_tokens(normalized: str) -> list[str]:
+    return [token for token in normalized.split() if token not in FILLER_WORDS]
+
+
+def _compatible(tokens_a: list[str], tokens_b: list[str]) -> bool:
+    """Check that two token sequences differ only by small typos.
+
+    Words are compared in order, so "100 USD to INR" never matches "100 INR
+    to USD" and a reversed flight route never matches the original. Each
+    differing pair must closely resemble each other, and numbers must match
+    exactly.
+    """
+    if len(tokens_a) != len(tokens_b):
+        return False
+    return all(
+        token == other
+        or (
+            not token.isdigit()
+            and not other.isdigit()
+            and difflib.SequenceMatcher(None, token, other).ratio() >= TYPO_SIMILARITY
+        )
+        for token, other in zip(tokens_a, tokens_b, strict=True)
+    )
+
+
+def embed(normalized: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Embed a normalized query as an L2-normalized hashed n-gram vector.
+
+    Word unigrams and character trigrams are hashed into ``dim`` buckets.
+    Filler words are skipped so they do not dominate short queries.
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for token in normalized.split():
+        if token in FILLER_WORDS:
+            continue
+        vector[zlib.crc32(token.encode()) % dim] += 1.0
+        padded = f" {token} "
+        for i in range(len(padded) - 2):
+            vector[zlib.crc32(padded[i:i + 3].encode()) % dim] += 0.5
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector
+
+
+def ttl_for_tools(tools_used: set[str]) -> float:
+    """Return the TTL of an answer produced with ``tools_used``."""
+    ttls = [TOOL_TTLS.get(name, DEFAULT_TTL) for name in tools_used]
+    return min(ttls, default=DEFAULT_TTL)
+
+
+class AnswerCache:
+    """Thread-safe exact + semantic cache of final agent answers."""
+
+    def __init__(
+        self,
+        max_entries: int = MAX_ENTRIES,
+        threshold: float = SIMILARITY_THRESHOLD,
+        top_k: int = TOP_K,
+        dim: int = EMBEDDING_DIM,
+    ) -> None:
+        """Create an empty cache.
+
+        Args:
+            max_entries (int): Entries kept before the least recently used
+                one is replaced.
+            threshold (float): Minimum cosine similarity for a near match.
+            top_k (int): Nearest candidates checked on each lookup.
+            dim (int): Embedding dimension.
+
+        """
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.top_k = top_k
+        self.dim = dim
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._keys: list[str | None] = [None] * max_entries
+        self._answers: list[str] = [""] * max_entries
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._rows: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            "lookups": 0,
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+    def lookup(self, query: str) -> str | None:
+        """Return a cached answer for ``query`` or None.
+
+        Args:
+            query (str): The raw user query.
+
+        Returns:
+            str | None: The cached answer, if an exact or near match is fresh.
+
+        """
+        normalized = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            self._counters["lookups"] += 1
+            row = self._rows.get(normalized)
+            if row is not None and self._expires_at[row] > now:
+                self._counters["exact_hits"] += 1
+                self._last_used[row] = now
+                return self._answers[row]
+
+            row = self._nearest(normalized, now)
+            if row is not None:
+                self._counters["semantic_hits"] += 1
+                self._last_used[row] = now
+                return self._answers[row]
+
+            self._counters["misses"] += 1
+            return None
+
+    def _nearest(self, normalized: str, now: float) -> int | None:
+        """Return the row of the best compatible near match, if any."""
+        if not self._rows:
+            return None
+        scores = self._vectors @ embed(normalized, self.dim)
+        scores[self._expires_at <= now] = -1.0
+        k = min(self.top_k, len(scores))
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        tokens = _content_tokens(normalized)
+        for row in candidates[np.argsort(-scores[candidates])]:
+            if scores[row] < self.threshold:
+                break
+            key = self._keys[row]
+            if key is not None and _compatible(tokens, _content_tokens(key)):
+                return int(row)
+        return None
+
+    def store(self, query: str, answer: str, tools_used: set[str]) -> None:
+        """Cache ``answer`` for ``query``.
+
+        Args:
+            query (str): The raw user query.
+            answer (str): The agent's final answer.
+            tools_used (set[str]): Names of the tools the agent called.
+
+        """
+        normalized = normalize_query(query)
+        now = time.time()
+        ttl = ttl_for_tools(tools_used)
+        with self._lock:
+            row = self._rows.get(normalized)
+            if row is None:
+                row = self._free_row(now)
+            self._keys[row] = normalized
+            self._rows[normalized] = row
+            self._vectors[row] = embed(normalized, self.dim)
+            self._answers[row] = answer
+            self._expires_at[row] = now + ttl
+            self._last_used[row] = now
+            self._counters["stores"] += 1
+
+    def _free_row(self, now: float) -> int:
+        """Return an empty row, replacing an expired or the LRU entry if full."""
+        if len(self._rows) < self.max_entries:
+            return self._keys.index(None)
+        expired = np.flatnonzero(self._expires_at <= now)
+        row = int(expired[0]) if expired.size else int(np.argmin(self._last_used))
+        del self._rows[self._keys[row]]
+        self._keys[row] = None
+        self._counters["evictions"] += 1
+        return row
+
+    def stats(self) -> dict[str, float]:
+        """Return lookup counters, the hit rate and the number of entries."""
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._rows)
+        hits = counters["exact_hits"] + counters["semantic_hits"]
+        lookups = counters["lookups"]
+        return {
+            **counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "size": size,
+        }
@@ -0,0 +1,130 @@
+"""Deterministic chat model that replays scripted tool calls.
+
+Used instead of Ollama when ``Model.PROVIDER`` is ``fake``, so the agent,
+tools and serving layers can be benchmarked offline and reproducibly. The
+script is a JSON list of entries::
+
+    {"match": "weather in paris",
+     "tool_calls": [{"name": "get_weather", "args": {"city": "Paris"}}],
+     "answer": "Here is the forecast for Paris."}
+
+The first entry whose ``match`` occurs in the user's query (case-insensitive)
+is used: the first model call of the turn requests its tool calls, and the
+call after the tool results have come back returns its answer followed by a
+short preview of each result. Queries no entry matches are answered
+directly with ``default_answer``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import Field
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from langchain_core.callbacks import (
+        AsyncCallbackManagerForLLMRun,
+        CallbackManagerForLLMRun,
+    )
+    from langchain_core.messages import BaseMessage
+    from langchain_core.runnables import Runnable
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Characters of each tool result quoted in the final answer.
+RESULT_PREVIEW = 200
+
+
+def load_script(path: str) -> list[dict[str, Any]]:
+    """Load a script file, relative to the project root unless absolute."""
+    script_path = Path(path)
+    if not script_path.is_absolute():
+        script_path = PROJECT_ROOT / script_path
+    return json.loads(script_path.read_text(encoding="utf8"))
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count (4 characters per token) for usage metadata."""
+    return max(1, len(text) // 4)
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Fake tool-calling chat model driven by a script."""
+
+    script: list[dict[str, Any]] = Field(default_factory=list)
+    latency: float = 0.0  # Seconds spent on every call.
+    default_answer: str = "I can help with weather, flights, hotels, news and money."
+    num_predict: int | None = None  # Accepted for parity with ChatOllama.
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Runnable:  # noqa: ANN401, ARG002
+        """Return the model itself: tool calls come from the script."""
+        return self
+
+    def _reply(self, messages: list[BaseMessage]) -> ChatResult:
+        """Build the scripted reply to the conversation so far."""
+        humans = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+        turn_start = humans[-1] if humans else 0
+        query = str(messages[turn_start].content) if messages else ""
+        results = [m for m in messages[turn_start:] if isinstance(m, ToolMessage)]
+        entry = next(
+            (e for e in self.script if e["match"].lower() in query.lower()), None,
+        )
+
+        if entry is None:
+            message = AIMessage(content=self.default_answer)
+        elif not results and entry.get("tool_calls"):
+            message = AIMessage(
+                content="",
+                tool_calls=[
+                    {"name": call["name"], "args": call["args"], "id": f"call_{i}"}
+                    for i, call in enumerate(entry["tool_calls"])
+                ],
+            )
+        else:
+            previews = [str(result.content)[:RESULT_PREVIEW] for result in results]
+            message = AIMessage(content="\n".join([entry["answer"], *previews]))
+
+        prompt_text = "".join(str(m.content) for m in messages)
+        completion_text = str(message.content) + json.dumps(message.tool_calls)
+        message.usage_metadata = {
+            "input_tokens": _estimate_tokens(prompt_text),
+            "output_tokens": _estimate_tokens(completion_text),
+            "total_tokens": _estimate_tokens(prompt_text)
+            + _estimate_tokens(completion_text),
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,  # noqa: ARG002
+        run_manager: CallbackManagerForLLMRun | None = None,  # noqa: ARG002
+        **kwargs: Any,  # noqa: ANN401, ARG002
+    ) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._reply(messages)
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,  # noqa: ARG002
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,  # noqa: ARG002
+        **kwargs: Any,  # noqa: ANN401, ARG002
+    ) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._reply(messages)
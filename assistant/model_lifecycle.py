@@ -0,0 +1,280 @@
+"""Warm-up, keep-alive and readiness of the Ollama chat model.
+
+Ollama unloads a model after its ``keep_alive`` expires, so the first request
+after an idle period pays the model load. ``ModelLifecycle`` sends a short
+warm-up prompt when a server starts, pings the model periodically so it stays
+resident, and only reports ready once the warm-up has succeeded. First-token
+latencies are recorded and split into cold (model had been idle longer than
+``keep_alive``) and warm samples for the health endpoints.
+"""
+
+from __future__ import annotations
+
+import re
+import statistics
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any
+
+from langchain_core.callbacks import BaseCallbackHandler
+from loguru import logger
+
+from tools.registry import config_section
+
+if TYPE_CHECKING:
+    from uuid import UUID
+
+    from langchain_core.language_models import BaseChatModel
+
+_model_config = config_section("Model")
+
+PROVIDER = _model_config.get("PROVIDER", "ollama")
+MODEL_NAME = _model_config.get("NAME", "qwen2.5:7b")
+KEEP_ALIVE: str | int = _model_config.get("KEEP_ALIVE", "30m")
+WARMUP_ON_START = bool(_model_config.get("WARMUP_ON_START", True))
+WARMUP_PROMPT = _model_config.get("WARMUP_PROMPT", "Reply with OK.")
+WARMUP_RETRY_INTERVAL = float(_model_config.get("WARMUP_RETRY_INTERVAL", 10))
+PING_INTERVAL = float(_model_config.get("PING_INTERVAL", 240))
+FAKE_SCRIPT = _model_config.get("FAKE_SCRIPT", "benchmarks/fixtures/model_script.json")
+FAKE_LATENCY = float(_model_config.get("FAKE_LATENCY", 0.0))
+
+UNKNOWN_PROVIDER_ERROR = "Unknown model provider"
+
+# First-token latencies kept per kind for the reported percentiles.
+LATENCY_WINDOW = 100
+
+_DURATION_RE = re.compile(r"^(\d+(?:\.\d+)?)([smh]?)$")
+_DURATION_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600}
+
+
+def keep_alive_seconds(keep_alive: str | int) -> float | None:
+    """Convert an Ollama ``keep_alive`` value to seconds.
+
+    Args:
+        keep_alive (str | int): Seconds, or a duration such as ``"30m"``.
+            Negative values keep the model loaded forever.
+
+    Returns:
+        float | None: The duration in seconds, or None for "forever" or an
+        unrecognized value.
+
+    """
+    match = _DURATION_RE.match(str(keep_alive).strip())
+    if match is None:
+        return None
+    return float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+
+
+def build_chat_model(provider: str = PROVIDER) -> BaseChatModel:
+    """Create the agent's chat model for the configured provider.
+
+    Args:
+        provider (str): ``"ollama"``, or ``"fake"`` for the scripted model
+            used by the offline benchmarks.
+
+    Returns:
+        BaseChatModel: The chat model.
+
+    Raises:
+        ValueError: If the provider is unknown.
+
+    """
+    if provider == "ollama":
+        from langchain_ollama import ChatOllama  # noqa: PLC0415
+
+        return ChatOllama(model=MODEL_NAME, keep_alive=KEEP_ALIVE)
+    if provider == "fake":
+        from assistant.fake_model import ScriptedChatModel, load_script  # noqa: PLC0415
+
+        logger.warning(f"Using the scripted fake chat model ({FAKE_SCRIPT})")
+        return ScriptedChatModel(script=load_script(FAKE_SCRIPT), latency=FAKE_LATENCY)
+    msg = f"{UNKNOWN_PROVIDER_ERROR}: {provider}"
+    raise ValueError(msg)
+
+
+class ModelLifecycle:
+    """Keeps one chat model warm and tracks its readiness."""
+
+    def __init__(
+        self,
+        model: BaseChatModel,
+        keep_alive: str | int = KEEP_ALIVE,
+        ping_interval: float = PING_INTERVAL,
+        warmup_prompt: str = WARMUP_PROMPT,
+    ) -> None:
+        """Create a lifecycle manager for ``model``.
+
+        Args:
+            model (BaseChatModel): The chat model used by the agent.
+            keep_alive (str | int): The model's Ollama ``keep_alive``.
+            ping_interval (float): Seconds between keep-alive pings.
+            warmup_prompt (str): Prompt sent for warm-up and pings.
+
+        """
+        # Warm-up and pings only need the first token.
+        self._probe = model.model_copy(update={"num_predict": 1})
+        self.keep_alive = keep_alive
+        self.ping_interval = ping_interval
+        self.warmup_prompt = warmup_prompt
+        self._idle_limit = keep_alive_seconds(keep_alive)
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._last_used: float | None = None
+        self._cold: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._warm: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._pings = 0
+        self._ping_failures = 0
+        self._last_error: str | None = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether the model has been warmed up successfully."""
+        return self._ready.is_set()
+
+    def record_first_token(self, latency: float, sent_at: float) -> None:
+        """Record the first-token latency of a model call started at ``sent_at``.
+
+        The sample counts as cold when the model had not been used for longer
+        than ``keep_alive`` (or never), because Ollama had to load it again.
+        """
+        with self._lock:
+            idle = None if self._last_used is None else sent_at - self._last_used
+            cold = idle is None or (
+                self._idle_limit is not None and idle > self._idle_limit
+            )
+            (self._cold if cold else self._warm).append(latency)
+            self._last_used = time.monotonic()
+
+    def probe(self) -> float:
+        """Send the warm-up prompt and return its first-token latency.
+
+        Raises:
+            Exception: Whatever the model client raises when Ollama is
+                unreachable or the model is missing.
+
+        """
+        sent_at = time.monotonic()
+        for _ in self._probe.stream(self.warmup_prompt):
+            break
+        latency = time.monotonic() - sent_at
+        self.record_first_token(latency, sent_at)
+        return latency
+
+    def warm_up(self) -> bool:
+        """Load the model with one probe and mark the service ready.
+
+        Returns:
+            bool: True if the model answered.
+
+        """
+        try:
+            latency = self.probe()
+        except Exception as e:  # noqa: BLE001 - any client error means not ready
+            with self._lock:
+                self._last_error = str(e)
+            logger.warning(f"Model warm-up failed: {e!s}")
+            return False
+        with self._lock:
+            self._last_error = None
+        self._ready.set()
+        logger.success(f"Model warmed up, first token after {latency * 1000:.0f} ms")
+        return True
+
+    def _ping(self) -> None:
+        try:
+            self.probe()
+        except Exception as e:  # noqa: BLE001 - a failed ping is only reported
+            with self._lock:
+                self._ping_failures += 1
+                self._last_error = str(e)
+            logger.warning(f"Model keep-alive ping failed: {e!s}")
+        else:
+            with self._lock:
+                self._pings += 1
+                self._last_error = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set() and not self.warm_up():
+            self._stop.wait(WARMUP_RETRY_INTERVAL)
+        while not self._stop.wait(self.ping_interval):
+            with self._lock:
+                last_used = self._last_used
+            # Real requests keep the model resident as well as pings do.
+            if last_used is None or time.monotonic() - last_used >= self.ping_interval:
+                self._ping()
+
+    def start(self) -> None:
+        """Warm up and start pinging in a background thread.
+
+        Does nothing if already started. When warm-up is disabled in the
+        config the service is reported ready immediately.
+        """
+        if self._thread is not None:
+            return
+        if not WARMUP_ON_START:
+            self._ready.set()
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="model-lifecycle", daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background pings."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def status(self) -> dict[str, Any]:
+        """Return readiness, ping counters and cold/warm first-token latency."""
+        with self._lock:
+            cold = list(self._cold)
+            warm = list(self._warm)
+            status: dict[str, Any] = {
+                "ready": self.ready,
+                "keep_alive": self.keep_alive,
+                "pings": self._pings,
+                "ping_failures": self._ping_failures,
+                "last_error": self._last_error,
+            }
+        for kind, samples in (("cold", cold), ("warm", warm)):
+            status[f"{kind}_first_token_samples"] = len(samples)
+            status[f"{kind}_first_token_ms"] = (
+                round(statistics.median(samples) * 1000, 1) if samples else None
+            )
+        return status
+
+
+class FirstTokenTimer(BaseCallbackHandler):
+    """Records the first-token latency of every agent model call."""
+
+    def __init__(self, lifecycle: ModelLifecycle) -> None:
+        """Report timings to ``lifecycle``."""
+        self.lifecycle = lifecycle
+        self._started: dict[UUID, float] = {}
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],  # noqa: ARG002
+        messages: list,  # noqa: ARG002
+        *,
+        run_id: UUID,
+        **kwargs: Any,  # noqa: ANN401, ARG002
+    ) -> None:
+        """Remember when the model call was sent."""
+        self._started[run_id] = time.monotonic()
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:  # noqa: ANN401, ARG002
+        """Record the latency of the first streamed token of a call."""
+        sent_at = self._started.pop(run_id, None)
+        if sent_at is not None:
+            self.lifecycle.record_first_token(time.monotonic() - sent_at, sent_at)
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:  # noqa: ANN401, ARG002
+        """Forget calls that finished without streaming a token."""
+        self._started.pop(run_id, None)
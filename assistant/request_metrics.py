@@ -0,0 +1,75 @@
+"""Request metrics shared by the FastAPI and BentoML backends.
+
+``track_request`` wraps the handling of one query: it counts the query as in
+flight, and when it finishes observes its end-to-end latency (labelled with
+how it was answered: ``cache``, ``fast_path`` or ``agent``) and counts its
+outcome.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+from assistant.admission import AdmissionRejectedError
+from tools.metrics import IN_FLIGHT, REQUEST_LATENCY, REQUESTS
+from tools.tracing import current_trace
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+class RequestOutcome:
+    """Outcome of a tracked query; handlers that catch errors set it."""
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        """Start as ``ok``."""
+        self.value = "ok"
+
+
+def _outcome_of(error: BaseException) -> str:
+    if isinstance(error, AdmissionRejectedError):
+        return "rejected"
+    if isinstance(error, TimeoutError):
+        return "timeout"
+    return "error"
+
+
+@contextmanager
+def track_request(backend: str, endpoint: str) -> Iterator[RequestOutcome]:
+    """Record the latency and outcome of the query handled in the block.
+
+    Open it inside ``trace_request`` so the answer path is known on exit.
+    An exception escaping the block sets the outcome (``rejected``,
+    ``timeout`` or ``error``); handlers that turn errors into responses set
+    ``outcome.value`` themselves.
+
+    Args:
+        backend (str): ``fastapi`` or ``bentoml``.
+        endpoint (str): ``query`` or ``query_stream``.
+
+    Yields:
+        RequestOutcome: The outcome recorded when the block exits.
+
+    """
+    outcome = RequestOutcome()
+    in_flight = IN_FLIGHT.labels(backend)
+    in_flight.inc()
+    start = time.perf_counter()
+    try:
+        yield outcome
+    except BaseException as e:
+        outcome.value = _outcome_of(e)
+        raise
+    finally:
+        in_flight.dec()
+        trace = current_trace()
+        path = trace.path if trace is not None else "agent"
+        REQUESTS.labels(backend, endpoint, outcome.value).inc()
+        if outcome.value != "rejected":
+            REQUEST_LATENCY.labels(backend, endpoint, path).observe(
+                time.perf_counter() - start,
+            )
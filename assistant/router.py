@@ -0,0 +1,357 @@
+"""Deterministic fast path for single-intent queries.
+
+Common one-tool questions ("convert 100 USD to INR", "weather in Paris",
+"news about Tokyo", "flights from BOM to DEL on 2025-05-01") are recognized by
+compiled patterns, scored by a small keyword classifier, answered by calling
+the matching tool directly and rendered with a template. Anything ambiguous,
+compound or failing falls back to the agent (``route`` returns None).
+"""
+
+from __future__ import annotations
+
+import re
+import statistics
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from loguru import logger
+
+from tools.registry import config_section, get_tool
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from langchain_core.tools import BaseTool
+
+_router_config = config_section("Router")
+
+ENABLED = bool(_router_config.get("ENABLED", True))
+CONFIDENCE_THRESHOLD = float(_router_config.get("CONFIDENCE_THRESHOLD", 0.7))
+MAX_WORDS = int(_router_config.get("MAX_WORDS", 16))
+LATENCY_WINDOW = int(_router_config.get("LATENCY_WINDOW", 1000))
+
+# Keywords voting for each intent; a query mentioning several intents is
+# treated as compound and left to the agent.
+INTENT_KEYWORDS: dict[str, frozenset[str]] = {
+    "convert_currency": frozenset({
+        "convert", "conversion", "exchange", "currency", "rate", "worth",
+    }),
+    "get_weather": frozenset({
+        "weather", "forecast", "temperature", "rain", "sunny", "humidity",
+        "snow",
+    }),
+    "get_news": frozenset({"news", "headlines", "happening", "latest"}),
+    "search_flights": frozenset({"flight", "flights", "fly", "airline", "airfare"}),
+    "search_hotels": frozenset({"hotel", "hotels", "stay", "accommodation"}),
+}
+CONJUNCTIONS = frozenset({"and", "also", "then", "plus"})
+# Time words the fast path cannot express; matched inside a place they mean a
+# time phrase was taken for part of the name ("weather in Paris tomorrow").
+TIME_WORDS = frozenset({
+    "tomorrow", "tonight", "yesterday", "weekend", "week", "weeks", "month",
+    "next", "day", "days", "monday", "tuesday", "wednesday", "thursday",
+    "friday", "saturday", "sunday",
+})
+# Question and filler words; matched inside a place they mean the pattern took
+# the start of a question for a name ("what is the weather" -> "What Is The").
+QUESTION_WORDS = frozenset({
+    "what", "whats", "s", "is", "are", "how", "hows", "tell", "me", "show",
+    "give", "get", "check", "please", "i", "want", "know", "about", "will",
+    "it", "be", "like",
+})
+ARTICLES = frozenset({"the", "a", "an"})
+
+_PLACE = r"(?P<place>[a-z][a-z .'-]*?)"
+_TRAILER = r"\s*(?:today|now|right now|(?P<week>this week))?\s*[?.!]*\s*$"
+
+PATTERNS: dict[str, list[re.Pattern[str]]] = {
+    "convert_currency": [
+        re.compile(
+            r"^(?:please\s+)?(?:convert\s+|how much is\s+|what is\s+)?"
+            r"(?P<amount>\d+(?:\.\d+)?)\s*(?P<source>[a-z]{3})\s+"
+            r"(?:to|in|into)\s+(?P<target>[a-z]{3})\s*[?.!]*\s*$",
+            re.IGNORECASE,
+        ),
+    ],
+    "get_weather": [
+        re.compile(
+            r"^(?:what(?:'s| is) the\s+)?(?:weather|forecast)\s+(?:like\s+)?"
+            r"(?:in|for|at)\s+" + _PLACE
+            + r"(?:\s+for the next\s+(?P<days>\d{1,2})\s+days)?" + _TRAILER,
+            re.IGNORECASE,
+        ),
+        re.compile(
+            r"^" + _PLACE + r"\s+(?:weather|forecast)" + _TRAILER, re.IGNORECASE,
+        ),
+    ],
+    "get_news": [
+        re.compile(
+            r"^(?:(?:show|give|tell) me\s+)?(?:the\s+)?(?:latest\s+)?"
+            r"(?:news|headlines)\s+(?:in|for|about|from|on)\s+" + _PLACE + _TRAILER,
+            re.IGNORECASE,
+        ),
+    ],
+    "search_flights": [
+        re.compile(
+            r"^(?:(?:find|show|search)(?: me)?\s+)?flights?\s+from\s+"
+            r"(?P<source>[a-z]{3})\s+to\s+(?P<destination>[a-z]{3})\s+on\s+"
+            r"(?P<date>\d{4}-\d{2}-\d{2})\s*[?.!]*\s*$",
+            re.IGNORECASE,
+        ),
+    ],
+}
+
+
+class Route(NamedTuple):
+    """A recognized intent and the tool arguments extracted for it."""
+
+    intent: str
+    args: dict[str, Any]
+    confidence: float
+
+
+def _tokens(query: str) -> list[str]:
+    return re.findall(r"[a-z]+", query.lower())
+
+
+def _odd_place(place: str) -> bool:
+    """Tell whether a matched place holds words that are not part of a name."""
+    words = set(_tokens(place))
+    return bool(words & (TIME_WORDS | QUESTION_WORDS)) or words <= ARTICLES
+
+
+def _extract_args(intent: str, match: re.Match[str]) -> dict[str, Any]:
+    groups = match.groupdict()
+    if intent == "convert_currency":
+        return {
+            "amount": float(groups["amount"]),
+            "from_currency": groups["source"].lower(),
+            "to_currency": groups["target"].lower(),
+        }
+    if intent == "get_weather":
+        days = groups.get("days") or (7 if groups.get("week") else 1)
+        return {"city": groups["place"].strip().title(), "days": int(days)}
+    if intent == "get_news":
+        return {"location": groups["place"].strip().title()}
+    return {
+        "source": groups["source"].upper(),
+        "destination": groups["destination"].upper(),
+        "date": groups["date"],
+    }
+
+
+def classify(query: str) -> Route | None:
+    """Match a query against the fast-path rules.
+
+    Confidence starts at 0.6 for a pattern match and gains 0.2 each when
+    the intent's own keywords are present and when no other intent's are.
+    It loses 0.5 when a conjunction or other intents' keywords suggest a
+    compound request or the place contains a time, question or filler word,
+    and 0.2 for long queries.
+
+    Args:
+        query (str): The raw user query.
+
+    Returns:
+        Route | None: The best route, or None when no rule matches.
+
+    """
+    text = query.strip()
+    tokens = _tokens(text)
+    token_set = set(tokens)
+    voting = {intent for intent, words in INTENT_KEYWORDS.items() if token_set & words}
+
+    for intent, patterns in PATTERNS.items():
+        match = next((m for p in patterns if (m := p.match(text))), None)
+        if match is None:
+            continue
+        confidence = 0.6
+        others = voting - {intent}
+        if intent in voting:
+            confidence += 0.2
+        if not others:
+            confidence += 0.2
+        place = match.groupdict().get("place")
+        if others or token_set & CONJUNCTIONS or (place and _odd_place(place)):
+            confidence -= 0.5
+        if len(tokens) > MAX_WORDS:
+            confidence -= 0.2
+        return Route(intent, _extract_args(intent, match), round(confidence, 2))
+    return None
+
+
+def _render_conversion(args: dict[str, Any], result: Any) -> str | None:  # noqa: ANN401
+    if getattr(result, "final_amount", None) is None:
+        return None
+    return (
+        f"{args['amount']:g} {args['from_currency'].upper()} is about "
+        f"{result.final_amount:,.2f} {args['to_currency'].upper()}."
+    )
+
+
+def _render_weather(_: dict[str, Any], result: Any) -> str | None:  # noqa: ANN401
+    # The tool returns an error message instead of a forecast on failure.
+    if not isinstance(result, str) or not result.startswith("📍"):
+        return None
+    return result.strip()
+
+
+def _render_news(args: dict[str, Any], result: Any) -> str | None:  # noqa: ANN401
+    if not result:
+        return None
+    lines = [f"Here are the latest headlines for {args['location']}:"]
+    lines += [f"- [{article.Title}]({article.URL})" for article in result]
+    return "\n".join(lines)
+
+
+def _render_flights(args: dict[str, Any], result: Any) -> str | None:  # noqa: ANN401
+    if getattr(result, "error", None) or not getattr(result, "flights", None):
+        return None
+    lines = [
+        f"Flights from {args['source']} to {args['destination']} on {args['date']}:",
+    ]
+    lines += [
+        f"- {flight.airline}: departs {flight.departure_time}, arrives "
+        f"{flight.arrival_time}, {flight.price}"
+        for flight in result.flights
+    ]
+    return "\n".join(lines)
+
+
+# Templates turning a tool result into the final answer, or None on failure.
+RENDERERS: dict[str, Callable[[dict[str, Any], Any], str | None]] = {
+    "convert_currency": _render_conversion,
+    "get_weather": _render_weather,
+    "get_news": _render_news,
+    "search_flights": _render_flights,
+}
+
+
+class FastAnswer(NamedTuple):
+    """An answer produced by the fast path and the tool that produced it."""
+
+    text: str
+    tool: str
+
+
+class IntentRouter:
+    """Answers confident single-intent queries without the agent."""
+
+    def __init__(
+        self,
+        tool_loader: Callable[[str], BaseTool] = get_tool,
+        threshold: float = CONFIDENCE_THRESHOLD,
+        latency_window: int = LATENCY_WINDOW,
+    ) -> None:
+        """Create a router over the agent's tools.
+
+        Args:
+            tool_loader (Callable[[str], BaseTool]): Returns a tool by name;
+                tools are only loaded once a query is routed to them.
+            threshold (float): Minimum confidence to take the fast path.
+            latency_window (int): Recent fast-path latencies kept for stats.
+
+        """
+        self.tool_loader = tool_loader
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=latency_window)
+        self._total = 0
+        self._served: dict[str, int] = {}
+        self._fallbacks = 0
+
+    def _plan(self, query: str) -> Route | None:
+        route = classify(query)
+        with self._lock:
+            self._total += 1
+        if route is None or route.confidence < self.threshold:
+            self._record_fallback()
+            return None
+        logger.info(
+            f"Fast path: {route.intent} {route.args} (confidence {route.confidence})",
+        )
+        return route
+
+    def _finish(
+        self, route: Route, result: Any, start: float,  # noqa: ANN401
+    ) -> FastAnswer | None:
+        answer = RENDERERS[route.intent](route.args, result)
+        if answer is None:
+            logger.info(f"Fast path for {route.intent} failed, falling back to agent")
+            self._record_fallback()
+            return None
+        with self._lock:
+            self._served[route.intent] = self._served.get(route.intent, 0) + 1
+            self._latencies.append(time.perf_counter() - start)
+        return FastAnswer(answer, route.intent)
+
+    def _record_fallback(self) -> None:
+        with self._lock:
+            self._fallbacks += 1
+
+    def route(self, query: str) -> FastAnswer | None:
+        """Answer ``query`` directly if it is a confident single intent.
+
+        Args:
+            query (str): The raw user query.
+
+        Returns:
+            FastAnswer | None: The rendered answer, or None to use the agent.
+
+        """
+        route = self._plan(query)
+        if route is None:
+            return None
+        start = time.perf_counter()
+        try:
+            result = self.tool_loader(route.intent).invoke(route.args)
+        except Exception as e:  # noqa: BLE001 - any tool failure means fallback
+            logger.warning(f"Fast path tool {route.intent} raised: {e!s}")
+            self._record_fallback()
+            return None
+        return self._finish(route, result, start)
+
+    async def aroute(self, query: str) -> FastAnswer | None:
+        """Async variant of ``route``."""
+        route = self._plan(query)
+        if route is None:
+            return None
+        start = time.perf_counter()
+        try:
+            result = await self.tool_loader(route.intent).ainvoke(route.args)
+        except Exception as e:  # noqa: BLE001 - any tool failure means fallback
+            logger.warning(f"Fast path tool {route.intent} raised: {e!s}")
+            self._record_fallback()
+            return None
+        return self._finish(route, result, start)
+
+    def stats(self) -> dict[str, Any]:
+        """Return the fast-path share and its latency distribution."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            served = dict(self._served)
+            total = self._total
+            fallbacks = self._fallbacks
+        served_total = sum(served.values())
+        stats: dict[str, Any] = {
+            "queries": total,
+            "fast_path": served_total,
+            "fallbacks": fallbacks,
+            "fast_path_share": round(served_total / total, 4) if total else 0.0,
+            "by_intent": served,
+        }
+        if latencies:
+            # quantiles() needs two samples; one sample is every percentile.
+            quantiles = (
+                statistics.quantiles(latencies, n=100, method="inclusive")
+                if len(latencies) > 1
+                else latencies * 99
+            )
+            stats.update({
+                "latency_p50_ms": round(quantiles[49] * 1000, 2),
+                "latency_p95_ms": round(quantiles[94] * 1000, 2),
+                "latency_p99_ms": round(quantiles[98] * 1000, 2),
+            })
+        return stats
@@ -0,0 +1,236 @@
+"""Server-side conversation memory keyed by session id.
+
+Each session keeps its recent turns, a rolling summary of older turns, and
+the results of the tools called so far. Before a query, the summary and
+turns are given to the agent as ``chat_history`` so follow-ups need not
+restate everything, and fresh tool results are listed for reuse; a tool call
+repeating one of them with the same arguments is answered from the session
+instead of the upstream API.
+
+When the estimated tokens of the summary and turns exceed the token budget,
+the oldest turns are folded into the summary, keeping the last few verbatim.
+
+Sessions are stored in a ``tools.cache`` backend: an in-process LRU, or a
+SQLite file shared by all workers on a host. Both evict the least recently
+stored sessions beyond ``MAX_SESSIONS`` and expire idle ones after ``TTL``.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from loguru import logger
+
+from tools.cache import build_cache
+from tools.compaction import estimate_tokens
+from tools.registry import config_section
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+    from langchain_core.agents import AgentAction
+    from langchain_core.messages import BaseMessage
+
+    from tools.cache import SQLiteTTLCache, TTLCache
+
+_session_config = config_section("Sessions")
+
+ENABLED = bool(_session_config.get("ENABLED", True))
+BACKEND = _session_config.get("BACKEND", "memory")
+PATH = _session_config.get("PATH", ".cache/sessions.sqlite3")
+MAX_SESSIONS = int(_session_config.get("MAX_SESSIONS", 1000))
+TTL = float(_session_config.get("TTL", 86400))
+TOKEN_BUDGET = int(_session_config.get("TOKEN_BUDGET", 1500))
+KEEP_RECENT_TURNS = int(_session_config.get("KEEP_RECENT_TURNS", 4))
+TOOL_RESULT_TTL = float(_session_config.get("TOOL_RESULT_TTL", 600))
+MAX_TOOL_RESULTS = int(_session_config.get("MAX_TOOL_RESULTS", 20))
+MAX_RESULT_CHARS = int(_session_config.get("MAX_RESULT_CHARS", 2000))
+
+# Characters of a stored tool result quoted in the prompt.
+PROMPT_RESULT_PREVIEW = 300
+# Characters kept per turn by the extractive fallback summary.
+SUMMARY_TURN_CHARS = 160
+
+Session = dict[str, Any]
+
+
+def tool_call_key(tool: str, args: Any) -> str:  # noqa: ANN401
+    """Return the key identifying a tool call with these arguments."""
+    return f"{tool}:{json.dumps(args, sort_keys=True, default=str)}"
+
+
+def extractive_summary(summary: str, turns: list[dict[str, str]]) -> str:
+    """Fold turns into the summary by keeping the start of each one.
+
+    Used when no model summarizer is given or the model call fails.
+    """
+    lines = [summary] if summary else []
+    lines.extend(
+        f"{turn['role']}: {turn['content'][:SUMMARY_TURN_CHARS]}" for turn in turns
+    )
+    return "\n".join(lines)
+
+
+def _new_session() -> Session:
+    return {"summary": "", "turns": [], "tool_results": []}
+
+
+class SessionMemory:
+    """Loads, extends and stores conversation sessions."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        store: TTLCache | SQLiteTTLCache | None = None,
+        *,
+        token_budget: int = TOKEN_BUDGET,
+        keep_recent_turns: int = KEEP_RECENT_TURNS,
+        tool_result_ttl: float = TOOL_RESULT_TTL,
+        max_tool_results: int = MAX_TOOL_RESULTS,
+        summarizer: Callable[[str, list[dict[str, str]]], str] | None = None,
+    ) -> None:
+        """Create the memory.
+
+        Args:
+            store (TTLCache | SQLiteTTLCache | None): Session store; the
+                configured backend if None.
+            token_budget (int): Estimated tokens of summary plus turns above
+                which older turns are summarized.
+            keep_recent_turns (int): Turns always kept verbatim.
+            tool_result_ttl (float): Seconds a tool result may be reused.
+            max_tool_results (int): Tool results kept per session.
+            summarizer (Callable[[str, list[dict[str, str]]], str] | None):
+                Folds turns into the existing summary; extractive if None.
+
+        """
+        self.store = store or build_cache(
+            backend=BACKEND, max_entries=MAX_SESSIONS, ttl=TTL, path=PATH,
+        )
+        self.token_budget = token_budget
+        self.keep_recent_turns = keep_recent_turns
+        self.tool_result_ttl = tool_result_ttl
+        self.max_tool_results = max_tool_results
+        self.summarizer = summarizer or extractive_summary
+        self._lock = threading.Lock()
+        self._counters = {"loads": 0, "saves": 0, "summarizations": 0, "reused": 0}
+
+    def load(self, session_id: str) -> Session:
+        """Return the session, or an empty one if it is new or expired."""
+        with self._lock:
+            self._counters["loads"] += 1
+        return self.store.get(session_id) or _new_session()
+
+    def history_messages(self, session: Session) -> list[BaseMessage]:
+        """Return the session as chat history messages for the prompt."""
+        messages: list[BaseMessage] = []
+        if session["summary"]:
+            messages.append(SystemMessage(
+                f"Summary of the earlier conversation:\n{session['summary']}",
+            ))
+        results = self._fresh_results(session)
+        if results:
+            listed = "\n".join(
+                f"- {result['tool']}({json.dumps(result['args'], default=str)}): "
+                f"{result['output'][:PROMPT_RESULT_PREVIEW]}"
+                for result in results
+            )
+            messages.append(SystemMessage(
+                "Results already retrieved in this conversation; reuse them "
+                f"instead of looking the same thing up again:\n{listed}",
+            ))
+        for turn in session["turns"]:
+            message_type = HumanMessage if turn["role"] == "user" else AIMessage
+            messages.append(message_type(turn["content"]))
+        return messages
+
+    def _fresh_results(self, session: Session) -> list[dict[str, Any]]:
+        now = time.time()
+        return [
+            result for result in session["tool_results"]
+            if now - result["at"] < self.tool_result_ttl
+        ]
+
+    def reusable_results(self, session: Session) -> dict[str, str]:
+        """Return fresh tool outputs of the session by ``tool_call_key``."""
+        return {
+            tool_call_key(result["tool"], result["args"]): result["output"]
+            for result in self._fresh_results(session)
+        }
+
+    def count_reuse(self) -> None:
+        """Count a tool call answered from the session."""
+        with self._lock:
+            self._counters["reused"] += 1
+
+    def record(
+        self,
+        session_id: str,
+        session: Session,
+        query: str,
+        answer: str,
+        steps: Sequence[tuple[AgentAction, Any]] = (),
+    ) -> None:
+        """Append a turn and its tool results, summarize if needed and save.
+
+        Args:
+            session_id (str): The session id.
+            session (Session): The session loaded for this query.
+            query (str): The user's query.
+            answer (str): The final answer.
+            steps (Sequence[tuple[AgentAction, Any]]): The agent's tool calls and
+                their results.
+
+        """
+        session["turns"].extend([
+            {"role": "user", "content": query},
+            {"role": "assistant", "content": answer},
+        ])
+        now = time.time()
+        for action, observation in steps:
+            output = str(getattr(observation, "content", observation))
+            if "error" in output[:80].lower():
+                continue
+            key = tool_call_key(action.tool, action.tool_input)
+            session["tool_results"] = [
+                result for result in session["tool_results"]
+                if tool_call_key(result["tool"], result["args"]) != key
+            ]
+            session["tool_results"].append({
+                "tool": action.tool,
+                "args": action.tool_input,
+                "output": output[:MAX_RESULT_CHARS],
+                "at": now,
+            })
+        session["tool_results"] = self._fresh_results(session)[-self.max_tool_results:]
+        self._summarize_if_needed(session)
+        self.store.set(session_id, session)
+        with self._lock:
+            self._counters["saves"] += 1
+
+    def _summarize_if_needed(self, session: Session) -> None:
+        """Fold the oldest turns into the summary when over the token budget."""
+        text = session["summary"] + "".join(t["content"] for t in session["turns"])
+        if estimate_tokens(text) <= self.token_budget:
+            return
+        keep = self.keep_recent_turns
+        old, recent = session["turns"][:-keep], session["turns"][-keep:]
+        if not old:
+            return
+        try:
+            summary = self.summarizer(session["summary"], old)
+        except Exception as e:  # noqa: BLE001 - never lose a turn to a failed summary
+            logger.warning(f"Session summarization failed, keeping extract: {e!s}")
+            summary = ""
+        session["summary"] = summary or extractive_summary(session["summary"], old)
+        session["turns"] = recent
+        with self._lock:
+            self._counters["summarizations"] += 1
+
+    def stats(self) -> dict[str, int]:
+        """Return load, save, summarization and reuse counters and store stats."""
+        with self._lock:
+            counters = dict(self._counters)
+        return {**counters, "store": self.store.stats()}
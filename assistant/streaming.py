@@ -0,0 +1,21 @@
+"""Server-Sent Events helpers for streamed agent runs."""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+
+def format_sse(event: str, data: Any) -> str:  # noqa: ANN401
+    """Encode one event in the Server-Sent Events wire format.
+
+    Args:
+        event (str): The event name.
+        data (Any): JSON-serializable payload.
+
+    Returns:
+        str: The encoded event, terminated by a blank line.
+
+    """
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
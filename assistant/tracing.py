@@ -0,0 +1,175 @@
+"""LangChain callbacks that record agent spans and model latency metrics.
+
+One ``TracingCallbackHandler`` is attached to each traced agent run. Every
+chat model call becomes an ``llm`` span with its prompt and completion token
+counts, time to first token and prompt size (which grows with the agent
+scratchpad at each step), and every tool call becomes a ``tool`` span. HTTP
+and parse spans are recorded by the tools themselves (see ``tools.tracing``).
+
+``MetricsCallbackHandler`` is attached to every agent run and feeds the model
+latency histograms of ``tools.metrics``.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Any
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from tools.metrics import LLM_FIRST_TOKEN, LLM_LATENCY
+
+if TYPE_CHECKING:
+    from uuid import UUID
+
+    from langchain_core.outputs import LLMResult
+
+    from tools.tracing import Trace
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Adds an ``llm`` span per model call and a ``tool`` span per tool call."""
+
+    def __init__(self, trace: Trace) -> None:
+        """Record spans into ``trace``."""
+        self.trace = trace
+        self._llm_calls: dict[UUID, dict[str, Any]] = {}
+        self._tool_calls: dict[UUID, tuple[str, float]] = {}
+        self._step = 0
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],  # noqa: ARG002
+        messages: list,
+        *,
+        run_id: UUID,
+        **kwargs: Any,  # noqa: ANN401, ARG002
+    ) -> None:
+        """Remember when the call was sent and how large its prompt is."""
+        prompt = messages[0] if messages else []
+        self._step += 1
+        self._llm_calls[run_id] = {
+            "started": time.perf_counter(),
+            "first_token": None,
+            "step": self._step,
+            "messages": len(prompt),
+            "prompt_chars": sum(len(str(message.content)) for message in prompt),
+        }
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:  # noqa: ANN401, ARG002
+        """Record the time of the first streamed token of a call."""
+        call = self._llm_calls.get(run_id)
+        if call is not None and call["first_token"] is None:
+            call["first_token"] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:  # noqa: ANN401, ARG002
+        """Add the finished call as an ``llm`` span with its token counts."""
+        call = self._llm_calls.pop(run_id, None)
+        if call is None:
+            return
+        ended = time.perf_counter()
+        usage = {}
+        if response.generations and response.generations[0]:
+            message = getattr(response.generations[0][0], "message", None)
+            usage = getattr(message, "usage_metadata", None) or {}
+        first_token = call["first_token"]
+        self.trace.add_span(
+            "llm",
+            "chat_model",
+            ended - call["started"],
+            step=call["step"],
+            messages=call["messages"],
+            prompt_chars=call["prompt_chars"],
+            prompt_tokens=usage.get("input_tokens"),
+            completion_tokens=usage.get("output_tokens"),
+            first_token_ms=(
+                round((first_token - call["started"]) * 1000, 2)
+                if first_token is not None
+                else None
+            ),
+        )
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any,  # noqa: ANN401, ARG002
+    ) -> None:
+        """Add a failed call as an ``llm`` span."""
+        call = self._llm_calls.pop(run_id, None)
+        if call is not None:
+            self.trace.add_span(
+                "llm",
+                "chat_model",
+                time.perf_counter() - call["started"],
+                step=call["step"],
+                error=type(error).__name__,
+            )
+
+    def on_tool_start(
+        self,
+        serialized: dict[str, Any],
+        input_str: str,  # noqa: ARG002
+        *,
+        run_id: UUID,
+        **kwargs: Any,  # noqa: ANN401, ARG002
+    ) -> None:
+        """Remember when the tool call started."""
+        name = (serialized or {}).get("name", "tool")
+        self._tool_calls[run_id] = (name, time.perf_counter())
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:  # noqa: ANN401, ARG002
+        """Add the finished tool call as a ``tool`` span."""
+        call = self._tool_calls.pop(run_id, None)
+        if call is not None:
+            name, started = call
+            self.trace.add_span("tool", name, time.perf_counter() - started)
+
+    def on_tool_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any,  # noqa: ANN401, ARG002
+    ) -> None:
+        """Add a failed tool call as a ``tool`` span."""
+        call = self._tool_calls.pop(run_id, None)
+        if call is not None:
+            name, started = call
+            self.trace.add_span(
+                "tool", name, time.perf_counter() - started, error=type(error).__name__,
+            )
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Observes the latency and time to first token of every model call."""
+
+    def __init__(self) -> None:
+        """Start with no call in progress."""
+        self._started: dict[UUID, float] = {}
+        self._streaming: set[UUID] = set()
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],  # noqa: ARG002
+        messages: list,  # noqa: ARG002
+        *,
+        run_id: UUID,
+        **kwargs: Any,  # noqa: ANN401, ARG002
+    ) -> None:
+        """Remember when the call was sent."""
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:  # noqa: ANN401, ARG002
+        """Observe the time to the first streamed token of a call."""
+        started = self._started.get(run_id)
+        if started is not None and run_id not in self._streaming:
+            self._streaming.add(run_id)
+            LLM_FIRST_TOKEN.labels().observe(time.perf_counter() - started)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:  # noqa: ANN401, ARG002
+        """Observe the latency of the finished call."""
+        self._streaming.discard(run_id)
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            LLM_LATENCY.labels().observe(time.perf_counter() - started)
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any,  # noqa: ANN401, ARG002
+    ) -> None:
+        """Forget a failed call."""
+        self._streaming.discard(run_id)
+        self._started.pop(run_id, None)
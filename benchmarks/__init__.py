@@ -0,0 +1 @@
+"""Benchmarks for Travel and Finance Assistant."""
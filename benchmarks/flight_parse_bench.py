@@ -0,0 +1,113 @@
+"""Benchmark flight-offer parsing on large payloads.
+
+Builds a flight-offers payload of ``--offers`` offers by repeating the
+recorded fixture offers, then parses it two ways and reports parse time
+(p50/p99 in milliseconds) and peak memory (traced with ``tracemalloc``):
+
+- ``baseline``: ``json.loads`` of the whole body and a validated
+  ``FlightOption`` per offer, which is how ``search_flights`` parsed
+  responses before.
+- ``incremental``: ``tools.flights._parse_offers``, which decodes offers one
+  at a time and stops after ``--limit`` of them.
+
+Usage:
+    python -m benchmarks.flight_parse_bench --offers 250 --limit 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from benchmarks.http_client_bench import summarize
+from benchmarks.upstreams import load_fixture
+from tools.flights import _parse_offers
+from tools.pydantic_models import FlightOption, FlightSearchResponse
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+CURRENCY = "USD"
+
+
+def build_payload(offers: int) -> str:
+    """Return a flight-offers body with ``offers`` offers, as served by Amadeus."""
+    fixture = load_fixture("flight_offers")
+    recorded = fixture["data"]
+    data = []
+    for index in range(offers):
+        offer = copy.deepcopy(recorded[index % len(recorded)])
+        offer["id"] = str(index + 1)
+        data.append(offer)
+    payload = {**fixture, "data": data, "meta": {"count": offers}}
+    return json.dumps(payload)
+
+
+def parse_all(body: str, currency: str) -> FlightSearchResponse:
+    """Parse every offer of the loaded payload (the previous implementation)."""
+    payload = json.loads(body)
+    return FlightSearchResponse(flights=[
+        FlightOption(
+            airline=flight["itineraries"][0]["segments"][0]["carrierCode"],
+            departure_time=flight["itineraries"][0]["segments"][0]["departure"]["at"],
+            arrival_time=flight["itineraries"][0]["segments"][-1]["arrival"]["at"],
+            price=f"{flight['price']['total']} {currency}",
+        )
+        for flight in payload.get("data", [])
+    ])
+
+
+def measure(parse: Callable[[], object], repeat: int) -> dict[str, float]:
+    """Return parse time percentiles over ``repeat`` runs and the peak memory."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse()
+        samples.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        parse()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {**summarize(samples), "peak_kib": round(peak / 1024, 1)}
+
+
+def main() -> None:
+    """Run the benchmark and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--offers", type=int, default=250,
+                        help="offers in the payload (Amadeus returns up to 250)")
+    parser.add_argument("--limit", type=int, default=20,
+                        help="offers the incremental parser reads")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--output", type=Path, default=None,
+                        help="Optional file to write the JSON results to")
+    args = parser.parse_args()
+
+    body = build_payload(args.offers)
+    results = {
+        "baseline": measure(lambda: parse_all(body, CURRENCY), args.repeat),
+        "incremental": measure(
+            lambda: _parse_offers(body, CURRENCY, args.limit), args.repeat,
+        ),
+    }
+    report = json.dumps({
+        "offers": args.offers,
+        "limit": args.limit,
+        "payload_kib": round(len(body) / 1024, 1),
+        "results": results,
+    }, indent=2)
+    if args.output:
+        args.output.write_text(report)
+    sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
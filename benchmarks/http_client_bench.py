@@ -0,0 +1,109 @@
+"""Benchmark the pooled HTTP client layer against per-call requests.
+
+Runs the same sequence of GET requests against a local stub server three
+ways and reports p50/p99 latency in milliseconds:
+
+- ``baseline``: module-level ``requests.get`` (new connection every call),
+  which is how the tools called their upstream APIs before.
+- ``pooled``: ``tools.http_client.get`` (keep-alive session per profile).
+- ``pooled-async``: ``tools.http_client.aget`` (keep-alive async client).
+
+The stub server is plain HTTP on localhost, so the numbers only show the
+TCP connection setup that pooling saves; against the real HTTPS upstreams
+the TLS handshake saved on every call makes the gap considerably larger.
+
+Usage:
+    python -m benchmarks.http_client_bench --requests 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import requests
+
+from benchmarks.stub_server import StubServer
+from tools import http_client
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+PROFILE = "weather"
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Return the ``pct`` percentile of ``samples`` (nearest rank)."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """Return p50/p99/mean of latency samples in milliseconds."""
+    millis = [sample * 1000 for sample in samples]
+    return {
+        "p50_ms": round(percentile(millis, 50), 3),
+        "p99_ms": round(percentile(millis, 99), 3),
+        "mean_ms": round(statistics.fmean(millis), 3),
+    }
+
+
+def run_sync(call: Callable[[str], object], url: str, count: int) -> list[float]:
+    """Time ``count`` sequential calls of ``call(url)``."""
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        call(url)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def run_async(url: str, count: int) -> list[float]:
+    """Time ``count`` sequential async GETs through the pooled client."""
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        await http_client.aget(PROFILE, url)
+        samples.append(time.perf_counter() - start)
+    await http_client.get_async_client(PROFILE).aclose()
+    return samples
+
+
+def main() -> None:
+    """Run the benchmark and print the results as JSON."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--delay", type=float, default=0.0,
+                        help="Artificial upstream latency in seconds")
+    parser.add_argument("--output", type=Path, default=None,
+                        help="Optional file to write the JSON results to")
+    args = parser.parse_args()
+
+    with StubServer(delay=args.delay) as server:
+        url = f"{server.url}/forecast.json"
+        timeout = http_client.get_timeout(PROFILE)
+        results = {
+            "baseline": summarize(run_sync(
+                lambda u: requests.get(u, timeout=timeout), url, args.requests,
+            )),
+            "pooled": summarize(run_sync(
+                lambda u: http_client.get(PROFILE, u), url, args.requests,
+            )),
+            "pooled-async": summarize(asyncio.run(run_async(url, args.requests))),
+        }
+
+    report = json.dumps({"requests": args.requests, "results": results}, indent=2)
+    if args.output:
+        args.output.write_text(report)
+    sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Fixed-rate load driver for the ``/query`` endpoints.
+
+Requests are sent open-loop: the n-th request starts ``n / rps`` seconds
+after the first whether or not earlier ones have finished, so a slow server
+builds up a backlog instead of quietly lowering the offered load. Each
+request body is built from the next query in the list, round-robin.
+
+A request counts as an error when it fails, times out, returns a non-2xx
+status or returns a JSON body with an ``error`` field (BentoML reports
+processing errors that way).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+from typing import TYPE_CHECKING, Any
+
+import httpx
+
+from benchmarks.http_client_bench import percentile
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+async def _send(
+    client: httpx.AsyncClient, url: str, body: dict[str, Any],
+) -> tuple[float, bool]:
+    """Send one request; return its latency and whether it succeeded."""
+    start = time.perf_counter()
+    try:
+        response = await client.post(url, json=body)
+        ok = response.is_success and "error" not in response.json()
+    except (httpx.HTTPError, ValueError):
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+async def run_load(  # noqa: PLR0913
+    url: str,
+    queries: list[str],
+    build_body: Callable[[str], dict[str, Any]],
+    *,
+    rps: float,
+    duration: float,
+    request_timeout: float = 120,
+) -> dict[str, float]:
+    """Offer ``rps`` requests per second to ``url`` for ``duration`` seconds.
+
+    Args:
+        url (str): The query endpoint.
+        queries (list[str]): Queries sent round-robin.
+        build_body (Callable[[str], dict[str, Any]]): Request body for a query.
+        rps (float): Requests started per second.
+        duration (float): Seconds during which requests are started.
+        request_timeout (float): Seconds before a request is abandoned.
+
+    Returns:
+        dict[str, float]: Request and error counts, error rate, offered and
+        achieved throughput, and p50/p95/p99/mean latency in milliseconds.
+
+    """
+    total = max(1, int(rps * duration))
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(timeout=request_timeout, limits=limits) as client:
+        start = time.perf_counter()
+        tasks = []
+        for index in range(total):
+            delay = start + index / rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            body = build_body(queries[index % len(queries)])
+            tasks.append(asyncio.create_task(_send(client, url, body)))
+        results = await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    latencies = [latency * 1000 for latency, ok in results if ok]
+    errors = sum(not ok for _, ok in results)
+    summary: dict[str, float] = {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4),
+        "offered_rps": rps,
+        "throughput_rps": round((total - errors) / elapsed, 2),
+    }
+    if latencies:
+        summary.update({
+            "p50_ms": round(percentile(latencies, 50), 1),
+            "p95_ms": round(percentile(latencies, 95), 1),
+            "p99_ms": round(percentile(latencies, 99), 1),
+            "mean_ms": round(statistics.fmean(latencies), 1),
+        })
+    return summary
@@ -0,0 +1,190 @@
+"""End-to-end ``/query`` benchmark of the FastAPI and BentoML backends.
+
+Runs fully offline: every upstream API is replaced by a local stub replaying
+recorded fixtures (see ``benchmarks.upstreams``) and the agent uses the
+scripted fake chat model instead of Ollama. Each backend is started as a
+subprocess pointed at the stubs through ``ASSISTANT_CONFIG``, warmed up, then
+driven at a fixed request rate (see ``benchmarks.load_driver``). Throughput,
+latency percentiles and error rate per backend are written to a JSON results
+file; pass a previous results file as ``--baseline`` to print the change.
+
+The answer cache is bypassed so every request runs the agent and its tools.
+
+Usage:
+    python -m benchmarks.query_bench --rps 5 --duration 30 --output results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from benchmarks.load_driver import run_load
+from benchmarks.upstreams import Upstreams, load_fixture
+
+PROJECT_ROOT = Path(__file__).parent.parent
+SERVER_START_TIMEOUT = 120
+SERVER_NOT_READY_ERROR = "Server did not become ready"
+
+# How to start each backend, where its readiness probe and query endpoint
+# are, and the request body of a query.
+BACKENDS: dict[str, dict[str, Any]] = {
+    "fastapi": {
+        "command": [
+            sys.executable, "-m", "uvicorn", "api:app", "--log-level", "warning",
+            "--port",
+        ],
+        "cwd": PROJECT_ROOT,
+        "ready": "/ready",
+        "query": "/query",
+        "body": lambda query: {"input": query, "use_cache": False},
+    },
+    "bentoml": {
+        "command": [
+            sys.executable, "-m", "bentoml", "serve", "service:TravelFinanceassistant",
+            "--port",
+        ],
+        "cwd": PROJECT_ROOT / "bentoml",
+        "ready": "/readyz",
+        "query": "/query",
+        "body": lambda query: {"inp": query, "use_cache": False},
+    },
+}
+
+# Result fields compared against a baseline: lower is better for all but
+# throughput.
+COMPARED = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "error_rate")
+
+
+def _wait_ready(url: str, process: subprocess.Popen) -> None:
+    """Poll the readiness probe until it answers 200."""
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            if httpx.get(url, timeout=2).status_code == httpx.codes.OK:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    msg = f"{SERVER_NOT_READY_ERROR}: {url}"
+    raise RuntimeError(msg)
+
+
+def bench_backend(
+    name: str,
+    env: dict[str, str],
+    port: int,
+    queries: list[str],
+    args: argparse.Namespace,
+) -> dict[str, float]:
+    """Start one backend, drive it at the configured rate and stop it."""
+    backend = BACKENDS[name]
+    base_url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(  # noqa: S603
+        [*backend["command"], str(port)],
+        cwd=backend["cwd"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_ready(base_url + backend["ready"], process)
+        url = base_url + backend["query"]
+        if args.warmup:
+            asyncio.run(run_load(
+                url, queries, backend["body"], rps=args.rps, duration=args.warmup,
+            ))
+        return asyncio.run(run_load(
+            url, queries, backend["body"], rps=args.rps, duration=args.duration,
+        ))
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict]) -> dict[str, dict]:
+    """Return the relative change of each compared field per backend, in %."""
+    changes: dict[str, dict] = {}
+    for name, current in results.items():
+        previous = baseline.get(name, {})
+        changes[name] = {
+            field: round(100 * (current[field] - previous[field]) / previous[field], 1)
+            for field in COMPARED
+            if previous.get(field) and field in current
+        }
+    return changes
+
+
+def main() -> None:
+    """Parse arguments, run every selected backend and write the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS),
+                        default=list(BACKENDS))
+    parser.add_argument("--rps", type=float, default=5, help="requests/s")
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--warmup", type=float, default=5,
+                        help="seconds of unrecorded load first")
+    parser.add_argument("--upstream-latency", type=float, default=0.05,
+                        help="seconds each upstream call takes")
+    parser.add_argument("--upstream-jitter", type=float, default=0.02,
+                        help="extra random seconds per upstream call")
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0,
+                        help="fraction of upstream calls failed with a 503")
+    parser.add_argument("--llm-latency", type=float, default=0.2,
+                        help="seconds each fake model call takes")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", type=Path,
+                        default=PROJECT_ROOT / "benchmarks/results/query_bench.json")
+    parser.add_argument("--baseline", type=Path, default=None,
+                        help="previous results file to compare against")
+    args = parser.parse_args()
+
+    queries = load_fixture("queries")
+    settings = {
+        key: value for key, value in vars(args).items()
+        if key not in {"output", "baseline", "backends"}
+    }
+    results = {}
+    with Upstreams(
+        latency=args.upstream_latency,
+        jitter=args.upstream_jitter,
+        error_rate=args.upstream_error_rate,
+    ) as upstreams, tempfile.TemporaryDirectory() as tmp:
+        config_path = upstreams.write_config(
+            Path(tmp) / "config.yaml", llm_latency=args.llm_latency,
+        )
+        env = {**os.environ, **upstreams.environment(config_path)}
+        for name in args.backends:
+            results[name] = bench_backend(name, env, args.port, queries, args)
+
+    report: dict[str, Any] = {
+        "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+        "settings": settings,
+        "results": results,
+    }
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf8"))
+        report["change_pct"] = compare(results, baseline["results"])
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf8")
+    sys.stdout.write(json.dumps(report, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
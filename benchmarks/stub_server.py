@@ -0,0 +1,130 @@
+"""Local HTTP stub server used by the benchmarks.
+
+The server speaks HTTP/1.1 with keep-alive so pooled clients can reuse
+connections, and answers requests with canned JSON bodies after an optional
+artificial delay. Bodies can be routed by path prefix, the delay can be
+jittered, and a fraction of requests can be failed with a 503 to exercise
+retries and error handling.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Self
+from urllib.parse import urlsplit
+
+# A route answers with a fixed body, or builds one from the request path
+# (None for 404).
+Route = dict | Callable[[str], dict | None]
+
+NOT_FOUND = json.dumps({"error": {"message": "No stub for this path"}}).encode()
+UNAVAILABLE = json.dumps({"error": {"message": "Injected stub failure"}}).encode()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # Headers and body are written separately.
+
+    def _respond(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        if length:
+            self.rfile.read(length)
+        server = self.server
+        delay = server.delay
+        if server.jitter:
+            delay += server.rng.uniform(0, server.jitter)
+        if delay:
+            time.sleep(delay)
+        if server.error_rate and server.rng.random() < server.error_rate:
+            status, body = 503, UNAVAILABLE
+        else:
+            status, body = server.resolve(urlsplit(self.path).path)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _respond  # noqa: N815
+    do_POST = _respond  # noqa: N815
+
+    def log_message(self, *_: object) -> None:
+        """Silence per-request logging."""
+
+
+class StubServer:
+    """Threaded JSON stub server running in the background."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        payload: dict | None = None,
+        delay: float = 0.0,
+        *,
+        routes: dict[str, Route] | None = None,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        """Create a stub server.
+
+        Args:
+            payload (dict | None): JSON body returned for every request when
+                no routes are given.
+            delay (float): Seconds to wait before answering.
+            routes (dict[str, Route] | None): Body (or body builder) per path
+                prefix; the longest matching prefix wins, others get a 404.
+            jitter (float): Up to this many extra seconds, drawn uniformly,
+                added to the delay of each request.
+            error_rate (float): Fraction of requests answered with a 503.
+            seed (int | None): Seed of the jitter and error draws.
+
+        """
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.delay = delay
+        self._server.jitter = jitter
+        self._server.error_rate = error_rate
+        self._server.rng = random.Random(seed)  # noqa: S311
+        self._server.resolve = self._resolve
+        self._body = json.dumps(payload or {"status": "ok"}).encode()
+        self._routes = sorted(
+            (
+                (prefix, json.dumps(body).encode() if isinstance(body, dict) else body)
+                for prefix, body in (routes or {}).items()
+            ),
+            key=lambda item: -len(item[0]),
+        )
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def _resolve(self, path: str) -> tuple[int, bytes]:
+        """Return the status and body for a request path."""
+        if not self._routes:
+            return 200, self._body
+        for prefix, route in self._routes:
+            if path.startswith(prefix):
+                if isinstance(route, bytes):
+                    return 200, route
+                body = route(path)
+                return (200, json.dumps(body).encode()) if body else (404, NOT_FOUND)
+        return 404, NOT_FOUND
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running server."""
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> Self:
+        """Start serving in a background thread."""
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        """Stop the server."""
+        self._server.shutdown()
+        self._server.server_close()
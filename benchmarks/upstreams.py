@@ -0,0 +1,157 @@
+"""Local stand-ins for every upstream API the tools call.
+
+``Upstreams`` starts one stub server per upstream (Amadeus for the token,
+flight, hotel list, hotel offer and hotel rating endpoints, WeatherAPI, the
+currency CDN and NewsAPI), each replaying the recorded responses in
+``benchmarks/fixtures`` with the configured latency, jitter and error rate.
+``write_config`` then writes a copy of ``tools/config.yaml`` pointing every
+tool at the stubs and the agent at the scripted fake chat model; load it by
+setting ``ASSISTANT_CONFIG``.
+
+Example:
+    with Upstreams(latency=0.05, jitter=0.02) as upstreams:
+        config_path = upstreams.write_config(Path("/tmp/bench.yaml"))
+
+"""
+
+from __future__ import annotations
+
+import json
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Self
+
+import yaml
+
+from benchmarks.stub_server import StubServer
+from tools.registry import CONFIG_PATH_ENV, DEFAULT_CONFIG_PATH
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# Credentials the tools require; the stubs accept anything.
+FAKE_CREDENTIALS = {
+    "FLIGHTS_API_KEY": "bench",
+    "FLIGHTS_API_SECRET": "bench",
+    "HOTELS_API_KEY": "bench",
+    "HOTELS_API_SECRET": "bench",
+    "WEATHER_API_KEY": "bench",
+    "NEWS_API_KEY": "bench",
+}
+
+
+def load_fixture(name: str) -> Any:  # noqa: ANN401
+    """Return the parsed JSON fixture ``name`` (without extension)."""
+    return json.loads((FIXTURES / f"{name}.json").read_text(encoding="utf8"))
+
+
+def _currency_route(tables: dict[str, dict]) -> Any:  # noqa: ANN401
+    """Serve ``/currencies/<base>.json`` from the recorded rate tables."""
+
+    def route(path: str) -> dict | None:
+        return tables.get(Path(path).stem)
+
+    return route
+
+
+class Upstreams:
+    """Stub servers for all upstream APIs, started as a context manager."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int | None = 0,
+    ) -> None:
+        """Configure the stubs.
+
+        Args:
+            latency (float): Seconds every upstream takes to answer.
+            jitter (float): Up to this many extra seconds per request.
+            error_rate (float): Fraction of requests failed with a 503.
+            seed (int | None): Seed of the jitter and error draws.
+
+        """
+        options = {
+            "delay": latency,
+            "jitter": jitter,
+            "error_rate": error_rate,
+            "seed": seed,
+        }
+        self.servers = {
+            "amadeus": StubServer(routes={
+                "/v1/security/oauth2/token": load_fixture("amadeus_token"),
+                "/v2/shopping/flight-offers": load_fixture("flight_offers"),
+                "/v1/reference-data/locations/hotels/by-city": load_fixture(
+                    "hotels_by_city",
+                ),
+                "/v3/shopping/hotel-offers": load_fixture("hotel_offers"),
+                "/v2/e-reputation/hotel-sentiments": load_fixture("hotel_sentiments"),
+            }, **options),
+            "weather": StubServer(routes={
+                "/v1/forecast.json": load_fixture("weather_forecast"),
+            }, **options),
+            "currency": StubServer(routes={
+                "/currencies/": _currency_route(load_fixture("currency_rates")),
+            }, **options),
+            "news": StubServer(routes={
+                "/v2/everything": load_fixture("news_everything"),
+            }, **options),
+        }
+        self._stack = ExitStack()
+
+    def __enter__(self) -> Self:
+        """Start every stub server."""
+        for server in self.servers.values():
+            self._stack.enter_context(server)
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        """Stop every stub server."""
+        self._stack.close()
+
+    def config(self, llm_latency: float = 0.0) -> dict[str, Any]:
+        """Return the tool config pointed at the stubs and the fake model.
+
+        Args:
+            llm_latency (float): Seconds the fake chat model takes per call.
+
+        Returns:
+            dict[str, Any]: The config, ready to be written as YAML.
+
+        """
+        config = yaml.safe_load(DEFAULT_CONFIG_PATH.read_text(encoding="utf8"))
+        amadeus = self.servers["amadeus"].url
+        token_url = f"{amadeus}/v1/security/oauth2/token"
+        config["Flights"]["BASE_URL"] = token_url
+        config["Flights"]["SEARCH_URL"] = f"{amadeus}/v2/shopping/flight-offers"
+        config["Hotels"]["BASE_URL"] = token_url
+        config["Hotels"]["SEARCH_URL"] = (
+            f"{amadeus}/v1/reference-data/locations/hotels/by-city"
+        )
+        config["Hotels"]["OFFERS_URL"] = f"{amadeus}/v3/shopping/hotel-offers"
+        config["Hotels"]["RATINGS_URL"] = (
+            f"{amadeus}/v2/e-reputation/hotel-sentiments"
+        )
+        config["Weather"]["BASE_URL"] = f"{self.servers['weather'].url}/v1"
+        config["Currency"]["BASE_URL"] = f"{self.servers['currency'].url}/currencies/"
+        config["News"]["BASE_URL"] = f"{self.servers['news'].url}/v2/everything"
+        config["Model"]["PROVIDER"] = "fake"
+        config["Model"]["FAKE_LATENCY"] = llm_latency
+        return config
+
+    def write_config(self, path: Path, llm_latency: float = 0.0) -> Path:
+        """Write ``config()`` to ``path`` and return it.
+
+        Point a process at it with ``ASSISTANT_CONFIG`` (see ``environment``).
+        """
+        path.write_text(
+            yaml.safe_dump(self.config(llm_latency), sort_keys=False),
+            encoding="utf8",
+        )
+        return path
+
+    @staticmethod
+    def environment(config_path: Path) -> dict[str, str]:
+        """Return the environment variables a server under test needs."""
+        return {CONFIG_PATH_ENV: str(config_path), **FAKE_CREDENTIALS}
@@ -1,13 +1,18 @@
 """Travel and Finance Assistant service module."""
 
 import sys
+import uuid
+from collections.abc import AsyncGenerator
 from pathlib import Path
 
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from loguru import logger
 
 import bentoml
 
 sys.path.append(str(Path(__file__).parent.parent.resolve()))
+from unified_logging.logging_client import logging_stats
 from unified_logging.logging_setup import setup_logging
 
 # Initialize logging before any other imports
@@ -15,10 +20,33 @@ setup_logging()
 logger.info("Initializing TravelFinanceAssistant service")
 
 with bentoml.importing():
-    from llm import call_llm, initiallize_llm
+    from assistant.request_metrics import track_request
+    from assistant.streaming import format_sse
+    from llm import (
+        answer_cache,
+        astream_llm,
+        call_llm,
+        initiallize_llm,
+        model_lifecycle,
+        router,
+        session_memory,
+    )
+    from tools import metrics, resilience, singleflight
+    from tools.tracing import trace_request
+
+# BentoML serves its own /metrics; the assistant's metrics are mounted at
+# GET /assistant/metrics (one registry per worker process).
+metrics_app = FastAPI()
+
+
+@metrics_app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint() -> PlainTextResponse:
+    """Expose latency histograms, counters and gauges of this worker."""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 
 @bentoml.service(workers="cpu_count")
+@bentoml.asgi_app(metrics_app, path="/assistant")
 class TravelFinanceassistant:
     """Service class for Travel and Finance Assistant."""
 
@@ -26,27 +54,86 @@ class TravelFinanceassistant:
         """Initialize the LLM executor."""
         self.agent_executor = initiallize_llm()
         logger.success("LLM executor initialized successfully")
+        # Every worker warms up; Ollama loads the model only once.
+        model_lifecycle.start()
+
+    def __is_ready__(self) -> bool:
+        """Readiness probe (/readyz): ready once the model has been warmed up."""
+        return model_lifecycle.ready
 
     @bentoml.api
-    def query(self, inp: str) -> dict:
+    def query(
+        self,
+        inp: str,
+        use_cache: bool = True,  # noqa: FBT001, FBT002
+        session_id: str | None = None,
+    ) -> dict:
         """Process a user query and return the assistant's response."""
+        request_id = uuid.uuid4().hex
         try:
-            response = call_llm(inp, self.agent_executor)
+            with trace_request(request_id), track_request("bentoml", "query"):
+                response = call_llm(
+                    inp,
+                    self.agent_executor,
+                    use_cache=use_cache,
+                    session_id=session_id,
+                )
             logger.success(
                 f"Successfully processed query. Response length: {len(response)}",
             )
             logger.debug(f"Sample response: {response[:100]}...")  # Log first 100 chars
         except ValueError as e:
             logger.error(f"Error processing query: {e!s}")
-            return {"error": f"Error processing query: {e!s}"}
+            return {
+                "error": f"Error processing query: {e!s}",
+                "request_id": request_id,
+            }
         else:
-            return {"response": response}
+            return {"response": response, "request_id": request_id}
+
+    @bentoml.api
+    async def query_stream(
+        self,
+        inp: str,
+        use_cache: bool = True,  # noqa: FBT001, FBT002
+        session_id: str | None = None,
+    ) -> AsyncGenerator[str, None]:
+        """Stream tool progress and answer tokens as Server-Sent Events."""
+        request_id = uuid.uuid4().hex
+        yield format_sse("request_id", request_id)
+        try:
+            with (
+                trace_request(request_id),
+                track_request("bentoml", "query_stream"),
+            ):
+                async for event in astream_llm(
+                    inp,
+                    self.agent_executor,
+                    use_cache=use_cache,
+                    session_id=session_id,
+                ):
+                    yield format_sse(event["event"], event["data"])
+        except ValueError as e:
+            logger.error(f"Error streaming query: {e!s}")
+            yield format_sse("error", f"Error processing query: {e!s}")
+
+    @bentoml.api
+    def stats(self) -> dict:
+        """Report router, cache, session, upstream and logging stats per worker."""
+        return {
+            "router": router.stats(),
+            "answer_cache": answer_cache.stats(),
+            "sessions": session_memory.stats() if session_memory else {},
+            "coalescing": singleflight.stats(),
+            "upstreams": resilience.stats(),
+            "logging": logging_stats(),
+        }
 
     @bentoml.api
     def health(self) -> dict:
         """Health check endpoint to verify API status."""
         try:
-            status = {"status": "ok"}
+            status = {"status": "ok", "model": model_lifecycle.status()}
             logger.debug("Health check performed")
         except ValueError as e:
             logger.error(f"Health check failed: {e!s}")
@@ -1,43 +1,395 @@
 """Language model utilities for Travel and Finance Assistant."""
 
-from pathlib import Path
+import asyncio
+import contextlib
+import functools
+from collections.abc import AsyncIterator, Iterator
+from contextvars import ContextVar
+from typing import Any
 
-import yaml
 from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_ollama import ChatOllama
+from langchain_core.tools import StructuredTool
 
-from tools.currency import convert_currency
-from tools.flights import search_flights
-from tools.hotels import search_hotels
-from tools.news import get_news
-from tools.weather import get_weather
+from assistant.answer_cache import ENABLED as ANSWER_CACHE_ENABLED
+from assistant.answer_cache import AnswerCache
+from assistant.model_lifecycle import (
+    FirstTokenTimer,
+    ModelLifecycle,
+    build_chat_model,
+)
+from assistant.router import ENABLED as ROUTER_ENABLED
+from assistant.router import FastAnswer, IntentRouter
+from assistant.session_memory import ENABLED as SESSIONS_ENABLED
+from assistant.session_memory import Session, SessionMemory, tool_call_key
+from assistant.tracing import MetricsCallbackHandler, TracingCallbackHandler
+from tools.compaction import compact_tool, measure_turn
+from tools.metrics import is_tool_error, record_cache_lookup
+from tools.registry import load_config, load_tools, log_import_report
+from tools.tracing import current_trace, record, set_path
 
-model = ChatOllama(model="qwen2.5:7b")
+# Ollama, or the scripted fake model when Model.PROVIDER is "fake"
+model = build_chat_model()
 
-# Load config.yaml from the 'tools' directory
-config_path = Path(__file__).parent / "tools" / "config.yaml"
-with config_path.open() as file:
-    config = yaml.safe_load(file)
+# Warm-up, keep-alive pings and readiness; started by the serving layer
+model_lifecycle = ModelLifecycle(model)
+
+# Shared config.yaml, loaded once per process
+config = load_config()
 
 SYSTEM_PROMPT = config["LLM"]["SYSTEM_PROMPT"]
+# Upper bound on tool calls from one model step that run at the same time.
+MAX_PARALLEL_TOOLS = int(config["LLM"].get("MAX_PARALLEL_TOOLS", 4))
+
+# Characters of a tool result included in streamed tool_end events.
+STREAM_TOOL_PREVIEW = 500
+
+# Instruction given to the model when folding old turns into a session summary.
+SUMMARY_PROMPT = (
+    "Update the summary of a conversation between a user and a travel assistant "
+    "with the new turns. Keep names, places, dates, prices and decisions; drop "
+    "small talk. Reply with the updated summary only."
+)
+
+# Semaphore of the agent turn currently running in this context, if any.
+_turn_semaphore: ContextVar[asyncio.Semaphore | None] = ContextVar(
+    "turn_semaphore", default=None,
+)
+# Tool outputs of the current request's session, by ``tool_call_key``.
+_session_results: ContextVar[dict[str, str] | None] = ContextVar(
+    "session_results", default=None,
+)
+
+
+def _with_turn_limit(base_tool: StructuredTool) -> StructuredTool:
+    """Return a copy of ``base_tool`` whose async calls honour the turn limit."""
+    coroutine = base_tool.coroutine
+
+    async def limited(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        semaphore = _turn_semaphore.get()
+        if semaphore is None:
+            return await coroutine(*args, **kwargs)
+        async with semaphore:
+            return await coroutine(*args, **kwargs)
+
+    return base_tool.model_copy(update={"coroutine": limited})
+
+
+def _reused_result(name: str, args: tuple, kwargs: dict[str, Any]) -> str | None:
+    """Return the session's output of an identical earlier tool call, if any."""
+    results = _session_results.get()
+    if not results or args:
+        return None
+    output = results.get(tool_call_key(name, kwargs))
+    if output is not None and session_memory is not None:
+        session_memory.count_reuse()
+        record("tool", name, 0.0, reused=True)
+    return output
+
+
+def _with_session_reuse(base_tool: StructuredTool) -> StructuredTool:
+    """Return a copy of ``base_tool`` answering repeated calls from the session."""
+    name, func, coroutine = base_tool.name, base_tool.func, base_tool.coroutine
+    update = {}
+
+    if func is not None:
+        def reusing(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            reused = _reused_result(name, args, kwargs)
+            return func(*args, **kwargs) if reused is None else reused
+
+        update["func"] = reusing
+    if coroutine is not None:
+        async def areusing(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            reused = _reused_result(name, args, kwargs)
+            return await coroutine(*args, **kwargs) if reused is None else reused
+
+        update["coroutine"] = areusing
+    return base_tool.model_copy(update=update)
+
+
+@functools.cache
+def get_tools() -> list[StructuredTool]:
+    """Import the tool modules on first use and wrap them for the agent."""
+    tools = [
+        _with_turn_limit(_with_session_reuse(compact_tool(base_tool)))
+        for base_tool in load_tools()
+    ]
+    log_import_report()
+    return tools
 
-tools = [get_weather, search_flights, search_hotels, convert_currency, get_news]
 
 prompt = ChatPromptTemplate.from_messages([
     ("system", SYSTEM_PROMPT),
+    ("placeholder", "{chat_history}"),
     ("human", "{input}"),
     ("placeholder", "{agent_scratchpad}"),
 ])
 
 
+# Final answers shared by every request served by this process
+answer_cache = AnswerCache()
+# Deterministic fast path for single-tool queries, tried before the agent
+router = IntentRouter()
+
+
+def _summarize_turns(summary: str, turns: list[dict[str, str]]) -> str:
+    """Fold older session turns into the running summary with the chat model."""
+    transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)
+    response = model.invoke([
+        SystemMessage(SUMMARY_PROMPT),
+        HumanMessage(
+            f"Summary so far:\n{summary or '(none)'}\n\nNew turns:\n{transcript}",
+        ),
+    ])
+    return str(response.content).strip()
+
+
+# Conversation turns and tool results of requests that send a session id
+session_memory = (
+    SessionMemory(summarizer=_summarize_turns) if SESSIONS_ENABLED else None
+)
+
+# Passed with every agent run: callbacks given to the AgentExecutor
+# constructor are not inherited by its model calls.
+_agent_callbacks = [FirstTokenTimer(model_lifecycle), MetricsCallbackHandler()]
+
+
 def initiallize_llm() -> AgentExecutor:
     """Initialize the LLM agent executor with tools and prompt."""
+    tools = get_tools()
     agent = create_tool_calling_agent(model, tools, prompt)
-    return AgentExecutor(agent=agent, tools=tools, verbose=True)
+    return AgentExecutor(
+        agent=agent,
+        tools=tools,
+        verbose=True,
+        return_intermediate_steps=True,
+    )
+
+
+def _cache_answer(query: str, response: dict[str, Any]) -> None:
+    """Store a finished agent run in the answer cache unless a tool failed."""
+    steps = response.get("intermediate_steps", [])
+    if any(is_tool_error(observation) for _, observation in steps):
+        return
+    answer_cache.store(query, response["output"], {action.tool for action, _ in steps})
 
 
-def call_llm(query: str, agent_executor: AgentExecutor) -> str:
-    """Call the LLM with a query and return the response."""
-    response = agent_executor.invoke({"input": query})
+def _run_config() -> dict[str, Any]:
+    """Return the agent run config, with span callbacks if the request is traced."""
+    trace = current_trace()
+    if trace is None or not trace.sampled:
+        return {"callbacks": _agent_callbacks}
+    return {"callbacks": [*_agent_callbacks, TracingCallbackHandler(trace)]}
+
+
+def _cached_answer(query: str) -> str | None:
+    """Look up a cached answer and mark the request's path on a hit."""
+    cached = answer_cache.lookup(query)
+    record_cache_lookup("answer", hit=cached is not None)
+    if cached is not None:
+        set_path("cache")
+    return cached
+
+
+def _fast_answer(query: str, answer: FastAnswer, *, use_cache: bool) -> str:
+    """Cache a fast-path answer and return its text."""
+    set_path("fast_path")
+    if use_cache:
+        answer_cache.store(query, answer.text, {answer.tool})
+    return answer.text
+
+
+def _load_session(session_id: str | None) -> Session | None:
+    """Return the request's session, or None without a session id or memory."""
+    if session_memory is None or not session_id:
+        return None
+    return session_memory.load(session_id)
+
+
+def _answer_cache_usable(session: Session | None, *, use_cache: bool) -> bool:
+    """Whether the answer cache applies; follow-ups depend on their session."""
+    return use_cache and ANSWER_CACHE_ENABLED and not (session and session["turns"])
+
+
+def _agent_input(query: str, session: Session | None) -> dict[str, Any]:
+    """Return the agent input, with the session as chat history if any."""
+    history = session_memory.history_messages(session) if session else []
+    return {"input": query, "chat_history": history}
+
+
+@contextlib.contextmanager
+def _session_tool_results(session: Session | None) -> Iterator[None]:
+    """Let tool calls in this context reuse the session's earlier results."""
+    results = session_memory.reusable_results(session) if session else None
+    token = _session_results.set(results)
+    try:
+        yield
+    finally:
+        # A generator finalized from another task runs in a different context.
+        with contextlib.suppress(ValueError):
+            _session_results.reset(token)
+
+
+def _remember(
+    session_id: str | None,
+    session: Session | None,
+    query: str,
+    answer: str,
+    response: dict[str, Any] | None = None,
+) -> None:
+    """Add the turn and the agent's tool results to the session, if any."""
+    if session_id and session is not None:
+        steps = (response or {}).get("intermediate_steps", [])
+        session_memory.record(session_id, session, query, answer, steps)
+
+
+def call_llm(
+    query: str,
+    agent_executor: AgentExecutor,
+    *,
+    use_cache: bool = True,
+    session_id: str | None = None,
+) -> str:
+    """Call the LLM with a query and return the response.
+
+    Simple single-tool queries are answered by the intent router without the
+    model. Set ``use_cache`` to False to bypass the answer cache for this request.
+    With a ``session_id`` the agent sees the earlier turns of that session and
+    may reuse its tool results.
+    """
+    session = _load_session(session_id)
+    use_cache = _answer_cache_usable(session, use_cache=use_cache)
+    if use_cache and (cached := _cached_answer(query)) is not None:
+        _remember(session_id, session, query, cached)
+        return cached
+    if ROUTER_ENABLED and (routed := router.route(query)) is not None:
+        answer = _fast_answer(query, routed, use_cache=use_cache)
+        _remember(session_id, session, query, answer)
+        return answer
+    with _session_tool_results(session), measure_turn():
+        response = agent_executor.invoke(
+            _agent_input(query, session), config=_run_config(),
+        )
+    if use_cache:
+        _cache_answer(query, response)
+    _remember(session_id, session, query, response["output"], response)
     return response["output"]
+
+
+async def acall_llm(
+    query: str,
+    agent_executor: AgentExecutor,
+    max_parallel_tools: int = MAX_PARALLEL_TOOLS,
+    *,
+    use_cache: bool = True,
+    session_id: str | None = None,
+) -> str:
+    """Call the LLM asynchronously and return the response.
+
+    When the model requests several tools in one step, the executor runs
+    them concurrently, so a turn takes about as long as its slowest tool
+    rather than the sum. At most ``max_parallel_tools`` of them run at once.
+    Set ``use_cache`` to False to bypass the answer cache for this request.
+    With a ``session_id`` the agent sees the earlier turns of that session and
+    may reuse its tool results.
+    """
+    session = await asyncio.to_thread(_load_session, session_id)
+    use_cache = _answer_cache_usable(session, use_cache=use_cache)
+    if use_cache and (cached := _cached_answer(query)) is not None:
+        await asyncio.to_thread(_remember, session_id, session, query, cached)
+        return cached
+    if ROUTER_ENABLED and (routed := await router.aroute(query)) is not None:
+        answer = _fast_answer(query, routed, use_cache=use_cache)
+        await asyncio.to_thread(_remember, session_id, session, query, answer)
+        return answer
+    token = _turn_semaphore.set(asyncio.Semaphore(max_parallel_tools))
+    try:
+        with _session_tool_results(session), measure_turn():
+            response = await agent_executor.ainvoke(
+                _agent_input(query, session), config=_run_config(),
+            )
+    finally:
+        _turn_semaphore.reset(token)
+    if use_cache:
+        _cache_answer(query, response)
+    await asyncio.to_thread(
+        _remember, session_id, session, query, response["output"], response,
+    )
+    return response["output"]
+
+
+async def astream_llm(
+    query: str,
+    agent_executor: AgentExecutor,
+    max_parallel_tools: int = MAX_PARALLEL_TOOLS,
+    *,
+    use_cache: bool = True,
+    session_id: str | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """Run the agent and yield progress events as they happen.
+
+    Yields dictionaries with an ``event`` name and its ``data``:
+
+    - ``tool_start``: ``{"name", "input"}`` when a tool call begins.
+    - ``tool_end``: ``{"name", "output"}`` with a preview of the result.
+    - ``token``: a chunk of model text as it is generated.
+    - ``done``: the final answer.
+
+    A cached or fast-path answer is emitted as a single ``done`` event; the
+    cache is skipped when ``use_cache`` is False. With a ``session_id`` the
+    agent sees the earlier turns of that session and may reuse its tool results.
+    """
+    session = await asyncio.to_thread(_load_session, session_id)
+    use_cache = _answer_cache_usable(session, use_cache=use_cache)
+    if use_cache and (cached := _cached_answer(query)) is not None:
+        await asyncio.to_thread(_remember, session_id, session, query, cached)
+        yield {"event": "done", "data": cached}
+        return
+    if ROUTER_ENABLED and (routed := await router.aroute(query)) is not None:
+        answer = _fast_answer(query, routed, use_cache=use_cache)
+        await asyncio.to_thread(_remember, session_id, session, query, answer)
+        yield {"event": "done", "data": answer}
+        return
+    token = _turn_semaphore.set(asyncio.Semaphore(max_parallel_tools))
+    try:
+        with _session_tool_results(session), measure_turn():
+            async for event in agent_executor.astream_events(
+                _agent_input(query, session), config=_run_config(), version="v2",
+            ):
+                kind = event["event"]
+                if kind == "on_chat_model_stream":
+                    text = event["data"]["chunk"].content
+                    if text:
+                        yield {"event": "token", "data": text}
+                elif kind == "on_tool_start":
+                    yield {
+                        "event": "tool_start",
+                        "data": {
+                            "name": event["name"],
+                            "input": event["data"].get("input"),
+                        },
+                    }
+                elif kind == "on_tool_end":
+                    output = event["data"].get("output")
+                    output = getattr(output, "content", output)
+                    yield {
+                        "event": "tool_end",
+                        "data": {
+                            "name": event["name"],
+                            "output": str(output)[:STREAM_TOOL_PREVIEW],
+                        },
+                    }
+                elif kind == "on_chain_end" and not event.get("parent_ids"):
+                    response = event["data"]["output"]
+                    if use_cache:
+                        _cache_answer(query, response)
+                    await asyncio.to_thread(
+                        _remember, session_id, session, query, response["output"],
+                        response,
+                    )
+                    yield {"event": "done", "data": response["output"]}
+    finally:
+        # A generator finalized from another task runs in a different context.
+        with contextlib.suppress(ValueError):
+            _turn_semaphore.reset(token)
@@ -1,11 +1,68 @@
 """Streamlit frontend for Travel Planning Assistant."""
 
+import json
+import uuid
+from collections.abc import Iterator
+
 import requests
 import streamlit as st
 
 # HTTP status code constant
 HTTP_OK = 200
 
+# Streaming endpoints and the name of their input field
+STREAM_URLS = {
+    "FastAPI": "http://localhost:8000/query/stream",
+    "BentoML": "http://localhost:3000/query_stream",
+}
+STREAM_INPUT_FIELDS = {"FastAPI": "input", "BentoML": "inp"}
+
+
+def iter_sse(response: requests.Response) -> Iterator[tuple[str, object]]:
+    """Yield (event, data) pairs from a Server-Sent Events response."""
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line.removeprefix("event:").strip()
+        elif line.startswith("data:"):
+            data_lines.append(line.removeprefix("data:").strip())
+
+
+def stream_response(server_option: str, user_prompt: str, session_id: str) -> str:
+    """Render a streamed answer incrementally and return the final text."""
+    payload = {
+        STREAM_INPUT_FIELDS[server_option]: user_prompt,
+        "session_id": session_id,
+    }
+    with requests.post(
+        STREAM_URLS[server_option], json=payload, stream=True, timeout=300,
+    ) as response:
+        if response.status_code != HTTP_OK:
+            return f"❗ Error: {response.text}"
+
+        status = st.status("Thinking...")
+        placeholder = st.empty()
+        answer = ""
+        for event, data in iter_sse(response):
+            if event == "tool_start":
+                status.write(f"🔧 Looking up {data['name']}...")
+            elif event == "tool_end":
+                status.write(f"✅ Got results from {data['name']}")
+            elif event == "token":
+                answer += data
+                placeholder.markdown(answer + "▌")
+            elif event == "done":
+                answer = data
+            elif event == "error":
+                answer = f"❗ Error: {data}"
+        status.update(label="Done", state="complete")
+        placeholder.markdown(answer)
+        return answer
+
 # Set app title and layout
 st.set_page_config(page_title="Travel Planning Assistant", layout="wide")
 
@@ -31,6 +88,16 @@ else:
         st.session_state.saved_chats = []  # Store cleared chat history separately
     if "current_chat_index" not in st.session_state:
         st.session_state.current_chat_index = None  # Track the currently active chat
+    # The server keeps each chat's memory under its session id
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    if "saved_chat_sessions" not in st.session_state:
+        st.session_state.saved_chat_sessions = []  # Session id of each saved chat
+
+    if "stream_responses" not in st.session_state:
+        st.session_state.stream_responses = True
+
+    st.sidebar.toggle("⚡ Stream responses", key="stream_responses")
 
     # Sidebar for saved chat history
     st.sidebar.title("📜 Saved Chats")
@@ -42,6 +109,7 @@ else:
                     st.session_state.messages.copy()
                 )
             st.session_state.messages = chat.copy()
+            st.session_state.session_id = st.session_state.saved_chat_sessions[i]
             st.session_state.current_chat_index = i  # Set current chat index
             st.rerun()
 
@@ -59,18 +127,31 @@ else:
 
         # Send the prompt to the selected backend server
         try:
-            api_url = server_urls[st.session_state.server_option]
-            response = requests.post(api_url, json={"input": prompt}, timeout=300)
-
-            # Handle the response from the backend API
-            if response.status_code == HTTP_OK:
-                assistant_response = response.json()["response"]
+            if st.session_state.stream_responses:
+                # Render tool progress and tokens as they arrive
+                with st.chat_message("assistant"):
+                    assistant_response = stream_response(
+                        st.session_state.server_option,
+                        prompt,
+                        st.session_state.session_id,
+                    )
             else:
-                assistant_response = f"❗ Error: {response.text}"
-
-            # Display the assistant's response
-            with st.chat_message("assistant"):
-                st.markdown(assistant_response)
+                api_url = server_urls[st.session_state.server_option]
+                payload = {
+                    STREAM_INPUT_FIELDS[st.session_state.server_option]: prompt,
+                    "session_id": st.session_state.session_id,
+                }
+                response = requests.post(api_url, json=payload, timeout=300)
+
+                # Handle the response from the backend API
+                if response.status_code == HTTP_OK:
+                    assistant_response = response.json()["response"]
+                else:
+                    assistant_response = f"❗ Error: {response.text}"
+
+                # Display the assistant's response
+                with st.chat_message("assistant"):
+                    st.markdown(assistant_response)
 
             # Save assistant response to history
             st.session_state.messages.append(
@@ -101,6 +182,10 @@ else:
                 st.session_state.saved_chats.append(
                     st.session_state.messages.copy(),
                 )  # Save new chat
+                st.session_state.saved_chat_sessions.append(
+                    st.session_state.session_id,
+                )
         st.session_state.messages = []
+        st.session_state.session_id = uuid.uuid4().hex
         st.session_state.current_chat_index = None  # Reset index for new chat
         st.rerun()
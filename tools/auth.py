@@ -0,0 +1,290 @@
+"""Shared Amadeus OAuth token cache.
+
+Both the flight and hotel tools authenticate against the same Amadeus token
+endpoint. This module keeps one token per (endpoint, client id) for the whole
+process, refreshes it shortly before it expires and makes sure concurrent
+callers that find the token missing share a single token request.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import requests
+from loguru import logger
+
+from tools import http_client
+from tools.registry import config_section
+
+# HTTP status code constant
+HTTP_OK = 200
+
+# Error messages
+REFRESH_TIMEOUT_ERROR = "Timed out waiting for an in-flight token refresh"
+EMPTY_RESPONSE_ERROR = "Token response did not contain an access_token"
+
+_amadeus_config = config_section("Amadeus")
+
+REFRESH_MARGIN = float(_amadeus_config.get("TOKEN_REFRESH_MARGIN", 60))
+BACKGROUND_REFRESH = bool(_amadeus_config.get("BACKGROUND_REFRESH", True))
+TOKEN_TIMEOUT = float(_amadeus_config.get("TOKEN_TIMEOUT", 30))
+
+
+class TokenRequestError(Exception):
+    """Raised when the token endpoint does not return a usable token."""
+
+
+class AmadeusTokenManager:
+    """Thread-safe cache for a single Amadeus client-credentials token.
+
+    The cached token is served until ``refresh_margin`` seconds before its
+    ``expires_in`` (at most half its lifetime, so short-lived tokens are
+    still reused). A background timer renews it ahead of time so callers on
+    the hot path rarely wait, and concurrent misses are coalesced into one
+    request to the token endpoint (single-flight).
+    """
+
+    def __init__(
+        self,
+        token_url: str,
+        client_id: str,
+        client_secret: str,
+        refresh_margin: float = REFRESH_MARGIN,
+        *,
+        background_refresh: bool = BACKGROUND_REFRESH,
+    ) -> None:
+        """Create a token manager for one set of client credentials.
+
+        Args:
+            token_url (str): The Amadeus OAuth2 token endpoint.
+            client_id (str): The API key.
+            client_secret (str): The API secret.
+            refresh_margin (float): Seconds before expiry at which the token
+                is considered stale.
+            background_refresh (bool): Renew the token on a timer before it
+                goes stale.
+
+        """
+        self.token_url = token_url
+        self._client_id = client_id
+        self._client_secret = client_secret
+        self.refresh_margin = refresh_margin
+        self.background_refresh = background_refresh
+
+        self._lock = threading.Lock()
+        self._token: str | None = None
+        self._expires_at = 0.0
+        self._margin = refresh_margin
+        self._inflight: threading.Event | None = None
+        self._last_error: str | None = None
+        self._timer: threading.Timer | None = None
+
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._refreshes = 0
+        self._refresh_failures = 0
+        self._refresh_seconds_total = 0.0
+        self._last_refresh_seconds = 0.0
+
+    def _effective_margin(self, expires_in: float) -> float:
+        """Return the refresh margin, at most half the token's lifetime."""
+        return min(self.refresh_margin, expires_in / 2)
+
+    def _is_fresh(self, now: float) -> bool:
+        return self._token is not None and now < self._expires_at - self._margin
+
+    def get_token(self) -> str:
+        """Return a valid access token, fetching one only when needed.
+
+        Returns:
+            str: The bearer access token.
+
+        Raises:
+            TokenRequestError: If the token could not be obtained.
+
+        """
+        with self._lock:
+            if self._is_fresh(time.monotonic()):
+                self._hits += 1
+                return self._token
+            self._misses += 1
+            if self._inflight is None:
+                self._inflight = threading.Event()
+                leader = True
+            else:
+                self._coalesced += 1
+                leader = False
+            inflight = self._inflight
+
+        if leader:
+            self._refresh(inflight)
+        elif not inflight.wait(TOKEN_TIMEOUT):
+            raise TokenRequestError(REFRESH_TIMEOUT_ERROR)
+
+        with self._lock:
+            if self._token is not None and time.monotonic() < self._expires_at:
+                return self._token
+            raise TokenRequestError(self._last_error or EMPTY_RESPONSE_ERROR)
+
+    async def aget_token(self) -> str:
+        """Async variant of ``get_token``.
+
+        A fresh token is returned without leaving the event loop; a refresh
+        runs in a worker thread so it still joins the single-flight group
+        shared with synchronous callers.
+
+        Returns:
+            str: The bearer access token.
+
+        """
+        with self._lock:
+            if self._is_fresh(time.monotonic()):
+                self._hits += 1
+                return self._token
+        return await asyncio.to_thread(self.get_token)
+
+    def _refresh(self, inflight: threading.Event) -> None:
+        """Request a new token and publish it to waiting callers."""
+        logger.info(f"Requesting Amadeus access token from {self.token_url}")
+        start = time.perf_counter()
+        token: str | None = None
+        expires_in = 0.0
+        error: str | None = None
+        try:
+            response = http_client.post(
+                "amadeus",
+                self.token_url,
+                headers={"Content-Type": "application/x-www-form-urlencoded"},
+                data={
+                    "grant_type": "client_credentials",
+                    "client_id": self._client_id,
+                    "client_secret": self._client_secret,
+                },
+            )
+            if response.status_code != HTTP_OK:
+                error = (
+                    f"Token request failed: {response.status_code} - {response.text}"
+                )
+            else:
+                payload = response.json()
+                token = payload.get("access_token")
+                expires_in = float(payload.get("expires_in", 0))
+                if not token:
+                    error = EMPTY_RESPONSE_ERROR
+        except (requests.exceptions.RequestException, ValueError) as e:
+            error = f"Token request failed: {e!s}"
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self._refreshes += 1
+            self._refresh_seconds_total += elapsed
+            self._last_refresh_seconds = elapsed
+            if error is None:
+                self._token = token
+                self._expires_at = time.monotonic() + expires_in
+                self._margin = self._effective_margin(expires_in)
+                self._last_error = None
+            else:
+                self._refresh_failures += 1
+                self._last_error = error
+            self._inflight = None
+            inflight.set()
+
+        if error is None:
+            logger.success(
+                f"Obtained Amadeus access token in {elapsed * 1000:.1f} ms "
+                f"(expires in {expires_in:.0f}s)",
+            )
+            self._schedule_background_refresh(expires_in)
+        else:
+            logger.error(error)
+
+    def _schedule_background_refresh(self, expires_in: float) -> None:
+        """Renew the token shortly before it goes stale."""
+        if not self.background_refresh:
+            return
+        delay = expires_in - self._effective_margin(expires_in)
+        if delay <= 0:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self) -> None:
+        with self._lock:
+            if self._inflight is not None:
+                return
+            self._inflight = threading.Event()
+            inflight = self._inflight
+        logger.debug("Refreshing Amadeus access token in the background")
+        self._refresh(inflight)
+
+    def stats(self) -> dict[str, float]:
+        """Return cache counters.
+
+        Returns:
+            dict[str, float]: Hits, misses, coalesced waits, refreshes and
+            refresh latency in seconds.
+
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "refreshes": self._refreshes,
+                "refresh_failures": self._refresh_failures,
+                "refresh_seconds_total": self._refresh_seconds_total,
+                "last_refresh_seconds": self._last_refresh_seconds,
+            }
+
+
+_managers: dict[tuple[str, str], AmadeusTokenManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_token_manager(
+    token_url: str, client_id: str, client_secret: str,
+) -> AmadeusTokenManager:
+    """Return the process-wide token manager for a set of credentials.
+
+    Tools that use the same endpoint and API key share one manager, and
+    therefore one cached token.
+
+    Args:
+        token_url (str): The Amadeus OAuth2 token endpoint.
+        client_id (str): The API key.
+        client_secret (str): The API secret.
+
+    Returns:
+        AmadeusTokenManager: The shared token manager.
+
+    """
+    key = (token_url, client_id)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = AmadeusTokenManager(token_url, client_id, client_secret)
+            _managers[key] = manager
+        return manager
+
+
+def token_stats() -> dict[str, dict[str, float]]:
+    """Return the counters of every token manager in this process.
+
+    Returns:
+        dict[str, dict[str, float]]: Counters keyed by token endpoint and a
+        masked client id.
+
+    """
+    with _managers_lock:
+        items = list(_managers.items())
+    return {
+        f"{token_url} ({client_id[:4]}***)": manager.stats()
+        for (token_url, client_id), manager in items
+    }
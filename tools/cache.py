@@ -0,0 +1,206 @@
+"""TTL response caches for the tools.
+
+Two backends share one interface (``get``, ``set``, ``stats``):
+
+- ``TTLCache``: in-process LRU with per-entry expiry.
+- ``SQLiteTTLCache``: on-disk cache in a SQLite file, so every BentoML worker
+  on a host shares the same entries.
+
+Values stored in the SQLite backend must be JSON-serializable.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+UNKNOWN_BACKEND_ERROR = "Unknown cache backend"
+
+
+class TTLCache:
+    """Thread-safe in-memory LRU cache whose entries expire after a TTL."""
+
+    def __init__(self, max_entries: int = 512, ttl: float = 1800) -> None:
+        """Create an empty cache.
+
+        Args:
+            max_entries (int): Entries kept before the least recently used
+                one is evicted.
+            ttl (float): Default time to live of an entry in seconds.
+
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: str) -> Any | None:  # noqa: ANN401
+        """Return the cached value for ``key`` or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:  # noqa: ANN401
+        """Store ``value`` under ``key`` for ``ttl`` seconds (default TTL if None)."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def stats(self) -> dict[str, int]:
+        """Return hit, miss, eviction and expiration counters and the size."""
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "size": len(self._entries),
+            }
+
+
+class SQLiteTTLCache:
+    """TTL cache stored in a SQLite file shared between processes.
+
+    When the cache grows past ``max_entries`` the entries that were stored
+    first are evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int = 512, ttl: float = 1800) -> None:
+        """Open (and create if needed) the cache database.
+
+        Args:
+            path (str): SQLite file path, relative to the project root.
+            max_entries (int): Entries kept before the oldest are evicted.
+            ttl (float): Default time to live of an entry in seconds.
+
+        """
+        db_path = Path(path)
+        if not db_path.is_absolute():
+            db_path = PROJECT_ROOT / db_path
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, stored_at REAL NOT NULL)",
+        )
+        self._conn.commit()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: str) -> Any | None:  # noqa: ANN401
+        """Return the cached value for ``key`` or None if missing or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,),
+            ).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+            value, expires_at = row
+            if time.time() >= expires_at:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._hits += 1
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:  # noqa: ANN401
+        """Store ``value`` under ``key`` for ``ttl`` seconds (default TTL if None)."""
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                (key, payload, expires_at, now),
+            )
+            expired = self._conn.execute(
+                "DELETE FROM cache WHERE expires_at <= ?", (now,),
+            ).rowcount
+            evicted = self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache "
+                "ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            self._conn.commit()
+            self._expirations += expired
+            self._evictions += evicted
+
+    def stats(self) -> dict[str, int]:
+        """Return hit, miss, eviction and expiration counters and the size."""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "size": size,
+            }
+
+
+def build_cache(
+    backend: str = "memory",
+    max_entries: int = 512,
+    ttl: float = 1800,
+    path: str | None = None,
+) -> TTLCache | SQLiteTTLCache:
+    """Create a cache for the configured backend.
+
+    Args:
+        backend (str): ``"memory"`` or ``"sqlite"``.
+        max_entries (int): Maximum number of entries.
+        ttl (float): Default time to live in seconds.
+        path (str | None): SQLite file path for the ``"sqlite"`` backend.
+
+    Returns:
+        TTLCache | SQLiteTTLCache: The cache instance.
+
+    Raises:
+        ValueError: If the backend is unknown.
+
+    """
+    if backend == "memory":
+        return TTLCache(max_entries=max_entries, ttl=ttl)
+    if backend == "sqlite":
+        return SQLiteTTLCache(
+            path or ".cache/tools.sqlite3", max_entries=max_entries, ttl=ttl,
+        )
+    msg = f"{UNKNOWN_BACKEND_ERROR}: {backend}"
+    raise ValueError(msg)
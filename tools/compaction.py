@@ -0,0 +1,308 @@
+"""Compact rendering of tool results for the agent scratchpad.
+
+Every tool result is fed back to the model on each later step of the agent
+run, so its size directly adds to the prefill time of those steps. Without
+compaction, pydantic results reach the prompt as their ``repr`` and the
+weather tool's emoji-decorated text as is. ``compact_tool`` wraps a tool so
+the agent sees a token-efficient rendering instead:
+
+- Field pruning: empty fields and the tool's ``DROP_FIELDS`` are left out.
+- Tabular encoding: lists of records become one header line naming the
+  columns, followed by one ``|``-separated row per record. Formatted text
+  made of ``Label: value`` blocks (the weather forecast) is encoded the same
+  way.
+- Truncation: lists inside a row keep their first ``MAX_LIST_ITEMS`` items,
+  field values their first ``MAX_FIELD_CHARS`` characters (URLs are kept
+  whole so links stay usable), and rows are added only while the result
+  fits the tool's token budget.
+
+Errors are rendered as ``error: <message>`` so they are still recognised as
+failures. With ``MEASURE`` enabled, the estimated tokens of the verbose and
+compact forms are counted per tool and the tokens saved are logged per
+agent turn.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import re
+import threading
+import unicodedata
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
+from pydantic import BaseModel
+
+from tools import metrics
+from tools.registry import config_section
+from tools.tracing import current_request_id
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from langchain_core.tools import BaseTool
+
+_compaction_config = config_section("Compaction")
+
+ENABLED = bool(_compaction_config.get("ENABLED", True))
+MEASURE = bool(_compaction_config.get("MEASURE", False))
+DEFAULT_BUDGET = int(_compaction_config.get("DEFAULT_BUDGET", 300))
+MAX_LIST_ITEMS = int(_compaction_config.get("MAX_LIST_ITEMS", 3))
+MAX_FIELD_CHARS = int(_compaction_config.get("MAX_FIELD_CHARS", 80))
+BUDGETS: dict[str, int] = dict(_compaction_config.get("BUDGETS") or {})
+DROP_FIELDS: dict[str, list[str]] = dict(_compaction_config.get("DROP_FIELDS") or {})
+
+SEPARATOR = "|"
+# Unicode categories dropped from text: symbols (emoji, pictographs, degree
+# signs), combining marks (emoji variation selectors) and format characters
+# (zero-width joiners).
+_DROPPED_CATEGORIES = frozenset({"So", "Sk", "Mn", "Cf"})
+# One "Label: value" line of a formatted text result.
+_LABELLED_LINE = re.compile(r"^\s*([^:\n]{1,40}?):\s*(\S.*?)\s*$")
+_BLANK_LINES = re.compile(r"\n\s*\n")
+# A URL field value, never truncated.
+_URL = re.compile(r"^https?://\S+$")
+
+# Tool result tokens of the agent turn running in this context (measure mode).
+_turn_totals: ContextVar[dict[str, int] | None] = ContextVar(
+    "compaction_turn_totals", default=None,
+)
+_totals_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of ``text`` (4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def verbose_form(result: Any) -> str:  # noqa: ANN401
+    """Return the text the agent would see for ``result`` without compaction.
+
+    Mirrors how the tool-calling agent turns an observation into a tool
+    message: strings as is, JSON when possible, ``str()`` otherwise.
+    """
+    if isinstance(result, str):
+        return result
+    try:
+        return json.dumps(result, ensure_ascii=False)
+    except TypeError:
+        return str(result)
+
+
+def _clean(text: str) -> str:
+    """Drop emoji and other symbols and collapse whitespace."""
+    kept = "".join(
+        char for char in text if unicodedata.category(char) not in _DROPPED_CATEGORIES
+    )
+    return " ".join(kept.split())
+
+
+def _to_data(result: Any) -> Any:  # noqa: ANN401
+    """Convert pydantic models, recursively, to plain JSON-like data."""
+    if isinstance(result, BaseModel):
+        return result.model_dump(mode="json", exclude_none=True)
+    if isinstance(result, list | tuple):
+        return [_to_data(item) for item in result]
+    if isinstance(result, dict):
+        return {key: _to_data(value) for key, value in result.items()}
+    return result
+
+
+def _cell(value: Any) -> str:  # noqa: ANN401
+    """Render one field value, truncating lists and long text."""
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        items = [_cell(item) for item in value[:MAX_LIST_ITEMS]]
+        if len(value) > MAX_LIST_ITEMS:
+            items.append(f"+{len(value) - MAX_LIST_ITEMS}")
+        return ";".join(items)
+    if isinstance(value, dict):
+        value = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    text = str(value).strip()
+    if _URL.match(text):
+        return text.replace(SEPARATOR, "%7C")
+    text = _clean(text).replace(SEPARATOR, "/")
+    if len(text) > MAX_FIELD_CHARS:
+        text = text[:MAX_FIELD_CHARS - 1] + "…"
+    return text
+
+
+def _is_empty(value: Any) -> bool:  # noqa: ANN401
+    return value is None or value in ("", [], {})
+
+
+def _table(
+    name: str, rows: list[dict[str, Any]], drop: set[str], budget: int,
+) -> list[str]:
+    """Encode records as a header line and one row per record.
+
+    Rows are added while the table fits ``budget`` tokens; at least one row
+    is always kept and the number of omitted rows is reported.
+    """
+    columns: list[str] = []
+    for row in rows:
+        columns.extend(
+            key for key, value in row.items()
+            if key not in drop and key not in columns and not _is_empty(value)
+        )
+    lines = [f"{name} ({len(rows)}): {SEPARATOR.join(columns)}"]
+    used = estimate_tokens(lines[0])
+    for index, row in enumerate(rows):
+        line = SEPARATOR.join(_cell(row.get(column)) for column in columns)
+        used += estimate_tokens(line)
+        if index and used > budget:
+            lines.append(f"... {len(rows) - index} more omitted")
+            break
+        lines.append(line)
+    return lines
+
+
+def _render_data(data: Any, drop: set[str], budget: int) -> str:  # noqa: ANN401
+    """Render structured data as ``key: value`` lines and tables."""
+    if isinstance(data, dict) and data.get("error"):
+        return f"error: {_clean(str(data['error']))}"
+    if isinstance(data, list):
+        data = {"results": data}
+    if not isinstance(data, dict):
+        return _cell(data)
+    lines, tables = [], []
+    for key, value in data.items():
+        if key in drop or _is_empty(value):
+            continue
+        if isinstance(value, list) and all(isinstance(item, dict) for item in value):
+            tables.append((key, value))
+        else:
+            lines.append(f"{key}: {_cell(value)}")
+    for name, rows in tables:
+        remaining = budget - estimate_tokens("\n".join(lines))
+        lines.extend(_table(name, rows, drop, remaining))
+    return "\n".join(lines)
+
+
+def _render_text(text: str, budget: int) -> str:
+    """Render formatted text, encoding blocks of ``Label: value`` lines as rows."""
+    titles, rows = [], []
+    for block in _BLANK_LINES.split(text.strip()):
+        lines = [line for line in block.splitlines() if line.strip()]
+        matches = [_LABELLED_LINE.match(_clean(line)) for line in lines]
+        if len(lines) > 1 and all(matches):
+            rows.append({
+                match.group(1).strip().lower().replace(" ", "_"): match.group(2)
+                for match in matches
+            })
+        else:
+            titles.append(_clean(block))
+    if not rows:
+        return " ".join(titles)
+    head = " ".join(titles)
+    remaining = budget - estimate_tokens(head)
+    return "\n".join([head, *_table("entries", rows, set(), remaining)]).strip()
+
+
+def _truncate(text: str, budget: int) -> str:
+    """Cut ``text`` to about ``budget`` tokens."""
+    limit = budget * 4
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def compact(tool: str, result: Any) -> str:  # noqa: ANN401
+    """Render a tool result compactly within the tool's token budget.
+
+    Args:
+        tool (str): Name of the tool that produced the result.
+        result (Any): The tool's return value.
+
+    Returns:
+        str: The compact rendering passed to the agent.
+
+    """
+    budget = BUDGETS.get(tool, DEFAULT_BUDGET)
+    if isinstance(result, str):
+        text = _render_text(result, budget)
+    else:
+        text = _render_data(_to_data(result), set(DROP_FIELDS.get(tool, ())), budget)
+    return _truncate(text, budget)
+
+
+def _measure(tool: str, result: Any, compacted: str) -> None:  # noqa: ANN401
+    """Count the tokens of both forms and add them to the turn's totals."""
+    verbose = estimate_tokens(verbose_form(result))
+    small = estimate_tokens(compacted)
+    metrics.TOOL_RESULT_TOKENS.labels(tool, "verbose").inc(verbose)
+    metrics.TOOL_RESULT_TOKENS.labels(tool, "compact").inc(small)
+    logger.bind(request_id=current_request_id()).debug(
+        f"Compacted {tool} result: {verbose} -> {small} tokens",
+    )
+    totals = _turn_totals.get()
+    if totals is not None:
+        with _totals_lock:
+            totals["calls"] += 1
+            totals["verbose_tokens"] += verbose
+            totals["compact_tokens"] += small
+
+
+def _compact_result(tool: str, result: Any) -> Any:  # noqa: ANN401
+    """Compact ``result``, falling back to it unchanged if rendering fails."""
+    try:
+        compacted = compact(tool, result)
+    except Exception as e:  # noqa: BLE001 - an odd result must not fail the tool call
+        logger.warning(f"Could not compact {tool} result, passing it as is: {e!s}")
+        return result
+    if MEASURE:
+        _measure(tool, result, compacted)
+    return compacted
+
+
+def compact_tool(tool: BaseTool) -> BaseTool:
+    """Return a copy of ``tool`` whose results are compacted for the agent."""
+    if not ENABLED:
+        return tool
+    name = tool.name
+    func = getattr(tool, "func", None)
+    coroutine = getattr(tool, "coroutine", None)
+    update: dict[str, Any] = {}
+
+    if func is not None:
+
+        def compacted(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            return _compact_result(name, func(*args, **kwargs))
+
+        update["func"] = compacted
+
+    if coroutine is not None:
+
+        async def acompacted(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            return _compact_result(name, await coroutine(*args, **kwargs))
+
+        update["coroutine"] = acompacted
+
+    return tool.model_copy(update=update) if update else tool
+
+
+@contextlib.contextmanager
+def measure_turn() -> Iterator[None]:
+    """Log the tool result tokens saved by compaction in the ``with`` block.
+
+    Does nothing unless compaction and ``MEASURE`` are enabled.
+    """
+    if not (ENABLED and MEASURE):
+        yield
+        return
+    totals = {"calls": 0, "verbose_tokens": 0, "compact_tokens": 0}
+    token = _turn_totals.set(totals)
+    try:
+        yield
+    finally:
+        # A generator finalized from another task runs in a different context.
+        with contextlib.suppress(ValueError):
+            _turn_totals.reset(token)
+        if totals["calls"]:
+            saved = totals["verbose_tokens"] - totals["compact_tokens"]
+            logger.bind(request_id=current_request_id(), compaction=totals).info(
+                f"Compacted {totals['calls']} tool results: "
+                f"{totals['verbose_tokens']} -> {totals['compact_tokens']} tokens "
+                f"({saved} saved this turn)",
+            )
@@ -1,32 +1,63 @@
 """Amount converted from one currency to other."""
 
-from pathlib import Path
-
 import requests
-import yaml
-from langchain.tools import tool
+from langchain_core.tools import StructuredTool
 from loguru import logger
 from pydantic import ValidationError
 
-from tools.pydantic_models import ConvertedAmount, CurrencyData
-from unified_logging.logging_setup import setup_logging
+from tools.pydantic_models import (
+    BatchConvertedAmounts,
+    ConvertedAmount,
+    CurrencyConversion,
+)
+from tools.rates import RatesStore, UnknownCurrencyError
+from tools.registry import load_config
 
-setup_logging()
 logger.info("Currency conversion tool starting up")
 
 try:
-    config_path = Path(__file__).parent / "config.yaml"
-    with config_path.open() as file:
-        config = yaml.safe_load(file)
+    config = load_config()
     BASE_URL = config["Currency"]["BASE_URL"]
+    rates_store = RatesStore(
+        BASE_URL,
+        refresh_interval=float(config["Currency"].get("REFRESH_INTERVAL", 3600)),
+    )
     logger.success("Successfully loaded configuration")
 except ValueError as e:
     logger.error(f"Failed to load configuration: {e}")
     raise
 
 
-@tool
-def convert_currency(
+def _conversion_result(
+    amount: float, from_currency: str, to_currency: str, converted_amount: float,
+) -> ConvertedAmount:
+    logger.info(
+        f"Converted amount: {amount} {from_currency.upper()} = "
+        f"{converted_amount} {to_currency.upper()}",
+    )
+    result = ConvertedAmount(final_amount=converted_amount)
+    logger.success("Conversion completed successfully")
+    return result
+
+
+def _conversion_error(e: Exception) -> dict[str, str]:
+    """Map a conversion failure to the tool's error payload."""
+    if isinstance(e, UnknownCurrencyError):
+        error_msg = str(e)
+        logger.warning(error_msg)
+    elif isinstance(e, ValidationError):
+        error_msg = f"Data validation error: {e}"
+        logger.error(error_msg)
+    elif isinstance(e, requests.exceptions.RequestException):
+        error_msg = f"API request failed: {e}"
+        logger.error(error_msg)
+    else:
+        error_msg = f"Unexpected error: {e}"
+        logger.critical(error_msg)
+    return {"error": error_msg}
+
+
+def _convert_currency(
     amount: float = 1, from_currency: str = "usd", to_currency: str = "inr",
 ) -> ConvertedAmount:
     """Convert a given amount from one currency to another.
@@ -45,56 +76,107 @@ def convert_currency(
         f"{to_currency.upper()}",
     )
 
-    from_currency = from_currency.lower()  # Convert to lowercase for API
-    to_currency = to_currency.lower()
+    try:
+        # Rates come from the cached table snapshot; a download only happens
+        # when no cached table can answer the pair.
+        converted_amount = rates_store.convert(amount, from_currency, to_currency)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        return _conversion_error(e)
+    return _conversion_result(amount, from_currency, to_currency, converted_amount)
 
-    # Construct the API endpoint
-    url = f"{BASE_URL}{from_currency}.json"
-    logger.debug(f"Constructed API URL: {url}")
+
+async def _aconvert_currency(
+    amount: float = 1, from_currency: str = "usd", to_currency: str = "inr",
+) -> ConvertedAmount:
+    """Async variant of ``convert_currency``."""
+    logger.info(
+        f"Starting async currency conversion: {amount} {from_currency.upper()} to "
+        f"{to_currency.upper()}",
+    )
 
     try:
-        # Fetch data from the API
-        logger.info("Making API request for currency data")
-        response = requests.get(url, timeout=300)
-        data = response.json()
-        logger.success("Successfully received currency data from API")
-
-        # Validate the API response with Pydantic
-        if to_currency in data[from_currency]:
-            rates = {to_currency: data[from_currency][to_currency]}
-            logger.debug(f"Extracted exchange rate: {rates}")
-        else:
-            error_msg = f"Currency '{to_currency.upper()}' not available"
-            logger.warning(error_msg)
-            return {"error": error_msg}
-
-        try:
-            # Validate exchange rate data
-            currency_data = CurrencyData(rates=rates)
-        except ValidationError as e:
-            error_msg = f"Data validation error: {e}"
-            logger.error(error_msg)
-            return {"error": error_msg}
-
-        # Calculate and validate the final converted amount
-        converted_amount = round(amount * currency_data.rates[to_currency], 2)
-        logger.info(
-            f"Converted amount: {amount} {from_currency.upper()} = "
-            f"{converted_amount} {to_currency.upper()}",
+        converted_amount = await rates_store.aconvert(
+            amount, from_currency, to_currency,
         )
+    except (requests.exceptions.RequestException, ValueError) as e:
+        return _conversion_error(e)
+    return _conversion_result(amount, from_currency, to_currency, converted_amount)
+
+
+def _batch_result(
+    conversions: list[CurrencyConversion], results: list[float | str],
+) -> BatchConvertedAmounts:
+    amounts = [value if isinstance(value, float) else None for value in results]
+    errors = [value for value in results if isinstance(value, str)]
+    targets = {item.to_currency.lower() for item in conversions}
+    total = None
+    if len(targets) == 1 and not errors:
+        total = round(sum(amounts), 2)
+
+    logger.success(
+        f"Batch conversion finished: {len(results) - len(errors)} converted, "
+        f"{len(errors)} failed",
+    )
+    return BatchConvertedAmounts(
+        amounts=amounts,
+        total=total,
+        currency=targets.pop().upper() if total is not None else None,
+        errors=errors,
+    )
+
+
+def _convert_currency_batch(
+    conversions: list[CurrencyConversion],
+) -> BatchConvertedAmounts:
+    """Convert several amounts between currencies in a single call.
+
+    Use instead of repeated single conversions, e.g. to total itinerary costs
+    quoted in different currencies.
+
+    Args:
+        conversions (list[CurrencyConversion]): Items with amount,
+            from_currency and to_currency (3 letter ISO codes).
 
-        result = ConvertedAmount(final_amount=converted_amount)
-        logger.success("Conversion completed successfully")
+    Returns:
+        BatchConvertedAmounts: Converted amounts in input order, any errors,
+        and the total when every item targets the same currency.
+
+    """
+    logger.info(f"Starting batch currency conversion of {len(conversions)} items")
+
+    try:
+        results = rates_store.convert_many(
+            (item.amount, item.from_currency, item.to_currency) for item in conversions
+        )
     except requests.exceptions.RequestException as e:
         error_msg = f"API request failed: {e}"
         logger.error(error_msg)
-        return {"error": error_msg}
-    except ValueError as e:
-        error_msg = f"Unexpected error: {e}"
-        logger.critical(error_msg)
-        return {"error": error_msg}
-    else:
-        return result
+        return BatchConvertedAmounts(errors=[error_msg])
+    return _batch_result(conversions, results)
+
 
+async def _aconvert_currency_batch(
+    conversions: list[CurrencyConversion],
+) -> BatchConvertedAmounts:
+    """Async variant of ``convert_currency_batch``."""
+    logger.info(f"Starting async batch conversion of {len(conversions)} items")
 
-# Renamed to avoid invalid module name issue
+    try:
+        results = await rates_store.aconvert_many(
+            (item.amount, item.from_currency, item.to_currency) for item in conversions
+        )
+    except requests.exceptions.RequestException as e:
+        error_msg = f"API request failed: {e}"
+        logger.error(error_msg)
+        return BatchConvertedAmounts(errors=[error_msg])
+    return _batch_result(conversions, results)
+
+
+convert_currency = StructuredTool.from_function(
+    func=_convert_currency, coroutine=_aconvert_currency, name="convert_currency",
+)
+convert_currency_batch = StructuredTool.from_function(
+    func=_convert_currency_batch,
+    coroutine=_aconvert_currency_batch,
+    name="convert_currency_batch",
+)
@@ -1,73 +1,199 @@
-"""Flight search tool module."""
+"""Flight search tool module.
 
-import os
+Flight-offer payloads are large (every offer carries its full fare, pricing
+and segment details), so offers are decoded one at a time from the response
+text and decoding stops once enough have been read; the payload is never
+loaded into one object tree.
+"""
+
+import json
+import re
+from collections.abc import Iterator
 from datetime import datetime
-from pathlib import Path
 
+import httpx
 import pytz
 import requests
-import yaml
-from dotenv import load_dotenv
-from langchain.tools import tool
+from langchain_core.tools import StructuredTool
 from loguru import logger
 
-from unified_logging.logging_setup import setup_logging
-
+from . import http_client
+from .auth import AmadeusTokenManager, TokenRequestError, get_token_manager
 from .pydantic_models import FlightOption, FlightSearchRequest, FlightSearchResponse
+from .registry import load_config, require_env
+from .tracing import span
 
 # HTTP status code constant
 HTTP_OK = 200
 
-# Initialize logging
-setup_logging()
 logger.info("Flight search tool initializing")
 
-# Load environment variables
-MISSING_CREDENTIALS_ERROR = "Missing API credentials in environment variables"
-
-def _check_api_credentials() -> None:
-    """Check if flight API credentials are available in environment variables."""
-    flights_api_key = os.getenv("FLIGHTS_API_KEY")
-    flights_api_secret = os.getenv("FLIGHTS_API_SECRET")
-    if not flights_api_key or not flights_api_secret:
-        raise ValueError(MISSING_CREDENTIALS_ERROR)
-
+# Load configuration (read once per process; credentials are checked on use)
 try:
-    load_dotenv()
-    _check_api_credentials()
-    logger.success("Successfully loaded API credentials")
-except ValueError as e:
-    logger.error(f"Failed to load environment variables: {e}")
-    raise
-
-# Load configuration
-try:
-    config_path = Path(__file__).parent / "config.yaml"
-    with config_path.open() as file:
-        config = yaml.safe_load(file)
+    config = load_config()
     BASE_URL = config["Flights"]["BASE_URL"]
+    SEARCH_URL = config["Flights"]["SEARCH_URL"]
+    MAX_RESULTS = int(config["Flights"].get("MAX_RESULTS", 5))
+    MAX_RESULTS_LIMIT = int(config["Flights"].get("MAX_RESULTS_LIMIT", 50))
     logger.success("Successfully loaded configuration")
 except ValueError as e:
     logger.error(f"Failed to load configuration: {e}")
     raise
 
-@tool
-def search_flights(source: str,
-                   destination: str,
-                   date: str =  str(datetime.now(pytz.UTC).date()),
-                   adults: int = 1,
-                   currency: str = "USD",
-                   ) -> FlightSearchResponse:
+MALFORMED_PAYLOAD_ERROR = "Malformed flight-offers payload"
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def _token_manager() -> AmadeusTokenManager:
+    api_key, api_secret = require_env("FLIGHTS_API_KEY", "FLIGHTS_API_SECRET")
+    return get_token_manager(BASE_URL, api_key, api_secret)
+
+
+def _search_request(  # noqa: PLR0913
+    *,
+    source: str,
+    destination: str,
+    date: str,
+    adults: int,
+    currency: str,
+    max_results: int | None,
+    non_stop: bool,
+    max_price: int | None,
+    travel_class: str | None,
+) -> FlightSearchRequest:
+    """Validate the tool arguments, applying the configured result limits."""
+    return FlightSearchRequest(
+        source=source,
+        destination=destination,
+        date=date,
+        adults=adults,
+        currency=currency,
+        max_results=min(max_results or MAX_RESULTS, MAX_RESULTS_LIMIT),
+        non_stop=non_stop,
+        max_price=max_price,
+        travel_class=travel_class.upper().replace(" ", "_") if travel_class else None,
+    )
+
+
+def _search_params(request_data: FlightSearchRequest) -> dict:
+    """Build the flight-offers query parameters.
+
+    Stops, price and cabin are filtered by Amadeus, so only matching offers
+    are sent back.
+    """
+    params = {
+        "originLocationCode": request_data.source,
+        "destinationLocationCode": request_data.destination,
+        "departureDate": request_data.date,
+        "adults": request_data.adults,
+        "currencyCode": request_data.currency,
+        "max": request_data.max_results,
+    }
+    if request_data.non_stop:
+        params["nonStop"] = "true"
+    if request_data.max_price is not None:
+        params["maxPrice"] = request_data.max_price
+    if request_data.travel_class is not None:
+        params["travelClass"] = request_data.travel_class
+    logger.debug(f"Preparing flight search with params: {params}")
+    return params
+
+
+def _skip_separator(text: str, index: int, separator: str) -> int:
+    """Skip whitespace, then ``separator`` and the whitespace after it if present."""
+    index = _WHITESPACE.match(text, index).end()
+    if text.startswith(separator, index):
+        index = _WHITESPACE.match(text, index + 1).end()
+    return index
+
+
+def _iter_offers(body: str) -> Iterator[dict]:
+    """Yield the offers of a flight-offers response body one at a time.
+
+    Top-level members before ``data`` (``meta``) are decoded and dropped.
+    Each offer is decoded only when the caller asks for it, so offers past
+    the caller's limit and the ``dictionaries`` after them are never parsed.
+
+    Raises:
+        ValueError: If the body is not a JSON object.
+
+    """
+    index = _WHITESPACE.match(body).end()
+    if not body.startswith("{", index):
+        raise ValueError(MALFORMED_PAYLOAD_ERROR)
+    index = _WHITESPACE.match(body, index + 1).end()
+    while body.startswith('"', index):
+        key, index = _decoder.raw_decode(body, index)
+        index = _skip_separator(body, index, ":")
+        if key != "data":
+            _, index = _decoder.raw_decode(body, index)
+            index = _skip_separator(body, index, ",")
+            continue
+        if not body.startswith("[", index):
+            raise ValueError(MALFORMED_PAYLOAD_ERROR)
+        index = _WHITESPACE.match(body, index + 1).end()
+        while not body.startswith("]", index):
+            offer, index = _decoder.raw_decode(body, index)
+            yield offer
+            index = _skip_separator(body, index, ",")
+        return
+
+
+def _parse_offers(body: str, currency: str, limit: int) -> FlightSearchResponse:
+    """Turn a flight-offers response body into the tool response.
+
+    Reads at most ``limit`` offers. Options are built with ``model_construct``:
+    their fields come straight from Amadeus and need no validation.
+    """
+    flights = []
+    for offer in _iter_offers(body):
+        segments = offer["itineraries"][0]["segments"]
+        flights.append(FlightOption.model_construct(
+            airline=segments[0]["carrierCode"],
+            departure_time=segments[0]["departure"]["at"],
+            arrival_time=segments[-1]["arrival"]["at"],
+            price=f"{offer['price']['total']} {currency}",
+            stops=len(segments) - 1,
+        ))
+        if len(flights) >= limit:
+            break
+
+    if not flights:
+        logger.warning("No flights found matching criteria")
+        return FlightSearchResponse(message="No flights found")
+
+    logger.success(f"Successfully found {len(flights)} flight options")
+    return FlightSearchResponse(flights=flights)
+
+
+def _search_flights(source: str,  # noqa: PLR0913, PLR0917
+                    destination: str,
+                    date: str =  str(datetime.now(pytz.UTC).date()),
+                    adults: int = 1,
+                    currency: str = "USD",
+                    max_results: int | None = None,
+                    non_stop: bool = False,  # noqa: FBT001, FBT002
+                    max_price: int | None = None,
+                    travel_class: str | None = None,
+                    ) -> FlightSearchResponse:
     """Search for flights between airports using Amadeus API and return results.
 
     Use when the user asks for flights between two cities/airports on a specific date.
-    - Required: source IATA code, destination IATA code,
+    - Required: source and destination (IATA code or city name),
     date (YYYY-MM-DD) .
     - Optional: number of adults (int default = 1),
-    preferred currency (str default = "USD").
+    preferred currency (str default = "USD"),
+    number of offers to return (int, default 5; ask for more when comparing
+    many options), direct flights only (bool default = False),
+    maximum price per traveler in that currency (int),
+    cabin class ("ECONOMY", "PREMIUM_ECONOMY", "BUSINESS" or "FIRST").
 
     Input format: `search_flights(source: str, destination: str,
-    date: str, adults: Optional[int], currency: Optional[str])`
+    date: str, adults: Optional[int], currency: Optional[str],
+    max_results: Optional[int], non_stop: Optional[bool],
+    max_price: Optional[int], travel_class: Optional[str])`
 
     """
     logger.info(
@@ -77,80 +203,121 @@ def search_flights(source: str,
 
     try:
         # Create request object
-        request_data = FlightSearchRequest(
+        request_data = _search_request(
             source=source,
             destination=destination,
             date=date,
             adults=adults,
             currency=currency,
+            max_results=max_results,
+            non_stop=non_stop,
+            max_price=max_price,
+            travel_class=travel_class,
         )
         logger.debug(f"Created request object: {request_data}")
 
-        # Get access token
+        # Get access token (cached and shared with the hotel tool)
         logger.info("Requesting API access token")
-        headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        data = {
-            "grant_type": "client_credentials",
-            "client_id": os.getenv("FLIGHTS_API_KEY"),
-            "client_secret": os.getenv("FLIGHTS_API_SECRET"),
-        }
-
-        response = requests.post(BASE_URL, headers=headers, data=data, timeout=300)
-        if response.status_code != HTTP_OK:
-            error_msg = f"Token request failed:{response.status_code} - {response.text}"
+        try:
+            access_token = _token_manager().get_token()
+        except TokenRequestError as e:
+            error_msg = str(e)
             logger.error(error_msg)
             return FlightSearchResponse(error=error_msg)
-
-        access_token = response.json().get("access_token")
         logger.success("Successfully obtained access token")
 
         # Search for flights
-        search_url = "https://test.api.amadeus.com/v2/shopping/flight-offers"
         headers = {"Authorization": f"Bearer {access_token}"}
-        params = {
-            "originLocationCode": request_data.source,
-            "destinationLocationCode": request_data.destination,
-            "departureDate": request_data.date,
-            "adults": request_data.adults,
-            "currencyCode": request_data.currency,
-            "max": 5,
-        }
-        logger.debug(f"Preparing flight search with params: {params}")
+        params = _search_params(request_data)
 
         logger.info("Making flight search request")
-        response = requests.get(search_url, headers=headers, params=params, timeout=300)
+        response = http_client.get(
+            "flights", SEARCH_URL, headers=headers, params=params,
+        )
         if response.status_code != HTTP_OK:
             error_msg = f"Flight search failed:{response.status_code} - {response.text}"
             logger.error(error_msg)
             return FlightSearchResponse(error=error_msg)
 
-        data = response.json().get("data", [])
-        logger.info(f"Found {len(data)} flight options")
-
-        # Process flight options
-        flights = [
-            FlightOption(
-                airline=flight["itineraries"][0]["segments"][0]["carrierCode"],
-                departure_time=flight["itineraries"][0]["segments"][0]["departure"]["at"],
-                arrival_time=flight["itineraries"][0]["segments"][-1]["arrival"]["at"],
-                price=f"{flight['price']['total']} {request_data.currency}",
+        with span("parse", "search_flights"):
+            return _parse_offers(
+                response.text, request_data.currency, request_data.max_results,
             )
-            for flight in data
-        ]
 
-        if not flights:
-            logger.warning("No flights found matching criteria")
-            return FlightSearchResponse(message="No flights found")
+    except requests.exceptions.RequestException as e:
+        error_msg = f"Flight search request failed: {e!s}"
+        logger.error(error_msg)
+        return FlightSearchResponse(error=error_msg)
+    except ValueError as e:
+        error_msg = f"Unexpected error in flight search: {e!s}"
+        logger.critical(error_msg)
+        return FlightSearchResponse(error=error_msg)
+
 
-        logger.success(f"Successfully found {len(flights)} flight options")
-        return FlightSearchResponse(flights=flights)
+async def _asearch_flights(source: str,  # noqa: PLR0913, PLR0917
+                           destination: str,
+                           date: str =  str(datetime.now(pytz.UTC).date()),
+                           adults: int = 1,
+                           currency: str = "USD",
+                           max_results: int | None = None,
+                           non_stop: bool = False,  # noqa: FBT001, FBT002
+                           max_price: int | None = None,
+                           travel_class: str | None = None,
+                           ) -> FlightSearchResponse:
+    """Async variant of ``search_flights`` using the pooled async client."""
+    logger.info(
+        f"Starting async flight search: {source}→{destination} on {date} for "
+        f"{adults} adult(s) in {currency}",
+    )
 
+    try:
+        request_data = _search_request(
+            source=source,
+            destination=destination,
+            date=date,
+            adults=adults,
+            currency=currency,
+            max_results=max_results,
+            non_stop=non_stop,
+            max_price=max_price,
+            travel_class=travel_class,
+        )
+        logger.debug(f"Created request object: {request_data}")
+
+        try:
+            access_token = await _token_manager().aget_token()
+        except TokenRequestError as e:
+            error_msg = str(e)
+            logger.error(error_msg)
+            return FlightSearchResponse(error=error_msg)
+
+        headers = {"Authorization": f"Bearer {access_token}"}
+        params = _search_params(request_data)
+
+        logger.info("Making async flight search request")
+        response = await http_client.aget(
+            "flights", SEARCH_URL, headers=headers, params=params,
+        )
+        if response.status_code != HTTP_OK:
+            error_msg = f"Flight search failed:{response.status_code} - {response.text}"
+            logger.error(error_msg)
+            return FlightSearchResponse(error=error_msg)
+
+        with span("parse", "search_flights"):
+            return _parse_offers(
+                response.text, request_data.currency, request_data.max_results,
+            )
+
+    except httpx.HTTPError as e:
+        error_msg = f"Flight search request failed: {e!s}"
+        logger.error(error_msg)
+        return FlightSearchResponse(error=error_msg)
     except ValueError as e:
         error_msg = f"Unexpected error in flight search: {e!s}"
         logger.critical(error_msg)
         return FlightSearchResponse(error=error_msg)
 
-# Example usage:
-request_data = FlightSearchRequest(
-    source="JFK", destination="LHR", date="2025-04-10", adults=2, currency="USD",
+
+search_flights = StructuredTool.from_function(
+    func=_search_flights, coroutine=_asearch_flights, name="search_flights",
 )
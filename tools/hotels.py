@@ -1,77 +1,368 @@
-"""Hotel search tool module."""
+"""Hotel search tool module.
 
-import os
-from pathlib import Path
+A search runs as a pipeline: the hotel list of the city is fetched first,
+then the cheapest offer and the guest rating of the first ``ENRICH_TOP_N``
+hotels are fetched concurrently by at most ``ENRICH_WORKERS`` workers.
+Results are merged as they arrive, and when ``ENRICH_BUDGET`` seconds have
+passed the hotels enriched so far are returned and the rest are left
+without prices. The duration of every stage is logged and recorded in the
+``assistant_tool_stage_duration_seconds`` histogram, to tune N and the
+budget.
+"""
 
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any
+
+import httpx
 import requests
-import yaml
-from dotenv import load_dotenv
-from langchain.tools import tool
+from langchain_core.tools import StructuredTool
 from loguru import logger
 
-from unified_logging.logging_setup import setup_logging
-
+from . import http_client
+from .auth import AmadeusTokenManager, TokenRequestError, get_token_manager
+from .metrics import time_stage
 from .pydantic_models import HotelOption, HotelSearchRequest, HotelSearchResponse
+from .registry import load_config, require_env
+from .tracing import span
 
 # HTTP status code constant
 HTTP_OK = 200
+# Raised when an enrichment response has an unexpected shape.
+MALFORMED_ERRORS = (KeyError, IndexError, TypeError, AttributeError, ValueError)
 
-# Initialize logging
-setup_logging()
 logger.info("Hotel search tool initializing")
 
-# Load environment variables
-MISSING_CREDENTIALS_ERROR = "Missing API credentials in environment variables"
-
-def _check_api_credentials() -> None:
-    """Check if hotel API credentials are available in environment variables."""
-    hotel_api_key = os.getenv("HOTELS_API_KEY")
-    hotel_api_secret = os.getenv("HOTELS_API_SECRET")
-    if not hotel_api_key or not hotel_api_secret:
-        raise ValueError(MISSING_CREDENTIALS_ERROR)
-
-try:
-    load_dotenv()
-    _check_api_credentials()
-    logger.success("Successfully loaded hotel API credentials")
-except ValueError as e:
-    logger.error(f"Failed to load environment variables: {e}")
-    raise
-
-# Load configuration
+# Load configuration (read once per process; credentials are checked on use)
 try:
-    config_path = Path(__file__).parent / "config.yaml"
-    with config_path.open() as file:
-        config = yaml.safe_load(file)
+    config = load_config()
     BASE_URL = config["Hotels"]["BASE_URL"]
+    SEARCH_URL = config["Hotels"]["SEARCH_URL"]
+    OFFERS_URL = config["Hotels"]["OFFERS_URL"]
+    RATINGS_URL = config["Hotels"]["RATINGS_URL"]
+    ENRICH_TOP_N = int(config["Hotels"].get("ENRICH_TOP_N", 5))
+    ENRICH_WORKERS = int(config["Hotels"].get("ENRICH_WORKERS", 4))
+    ENRICH_BUDGET = float(config["Hotels"].get("ENRICH_BUDGET", 4.0))
+    ENRICH_RATINGS = bool(config["Hotels"].get("ENRICH_RATINGS", True))
     logger.success("Successfully loaded hotel configuration")
 except ValueError as e:
     logger.error(f"Failed to load configuration: {e}")
     raise
 
-@tool
-def search_hotels(
+
+def _token_manager() -> AmadeusTokenManager:
+    api_key, api_secret = require_env("HOTELS_API_KEY", "HOTELS_API_SECRET")
+    return get_token_manager(BASE_URL, api_key, api_secret)
+
+
+def _search_params(request_data: HotelSearchRequest) -> dict:
+    """Build the hotel-list query parameters."""
+    params = {
+        "cityCode": request_data.city_code,
+        "radius": request_data.radius,
+        "radiusUnit": request_data.radius_unit,
+        "amenities": request_data.amenities,
+        "ratings": request_data.ratings,
+    }
+    logger.debug(f"Preparing hotel search with params: {params}")
+    return params
+
+
+def _offer_params(hotel_id: str, request_data: HotelSearchRequest) -> dict:
+    """Build the hotel-offers query parameters for one hotel."""
+    params = {"hotelIds": hotel_id, "adults": request_data.adults}
+    if request_data.check_in_date:
+        params["checkInDate"] = request_data.check_in_date
+    if request_data.check_out_date:
+        params["checkOutDate"] = request_data.check_out_date
+    return params
+
+
+def _offer_fields(response: requests.Response | httpx.Response) -> dict[str, Any]:
+    """Extract the cheapest offer of a hotel-offers response."""
+    if response.status_code != HTTP_OK:
+        logger.debug(f"No hotel offers: {response.status_code}")
+        return {}
+    try:
+        data = response.json().get("data", [])
+        offers = data[0].get("offers", []) if data else []
+        if not offers:
+            return {"available": False}
+        cheapest = min(offers, key=lambda offer: float(offer["price"]["total"]))
+        price = cheapest["price"]
+        room = cheapest.get("room") or {}
+        fields = {
+            "available": data[0].get("available", True),
+            "price": f"{price['total']} {price.get('currency', '')}".strip(),
+            "room": (room.get("typeEstimated") or {}).get("category")
+            or (room.get("description") or {}).get("text"),
+        }
+    except MALFORMED_ERRORS as e:
+        logger.debug(f"Malformed hotel offers: {e!r}")
+        return {}
+    else:
+        return fields
+
+
+def _rating_fields(response: requests.Response | httpx.Response) -> dict[str, Any]:
+    """Extract the overall guest rating of a hotel-sentiments response."""
+    if response.status_code != HTTP_OK:
+        logger.debug(f"No hotel rating: {response.status_code}")
+        return {}
+    try:
+        data = response.json().get("data", [])
+        fields = {"guest_rating": data[0].get("overallRating")} if data else {}
+    except MALFORMED_ERRORS as e:
+        logger.debug(f"Malformed hotel rating: {e!r}")
+        return {}
+    else:
+        return fields
+
+
+def _enrichment_targets(hotels: list[HotelOption]) -> list[tuple[int, str]]:
+    """Return the index and id of the hotels to enrich."""
+    return [
+        (index, hotel.hotel_id)
+        for index, hotel in enumerate(hotels[:ENRICH_TOP_N])
+        if hotel.hotel_id and hotel.hotel_id != "Not specified"
+    ]
+
+
+def _merge(
+    hotels: list[HotelOption],
+    index: int,
+    fields: dict[str, Any],
+    hotel_timings: dict[str, float],
+    timings: dict[str, float],
+) -> None:
+    """Merge one hotel's enrichment and keep the slowest time of each stage."""
+    hotels[index] = hotels[index].model_copy(update=fields)
+    for stage, elapsed in hotel_timings.items():
+        key = f"slowest_{stage}"
+        timings[key] = max(timings.get(key, 0.0), elapsed)
+
+
+def _partial_note(enriched: int, requested: int) -> str | None:
+    """Tell the agent that some prices are missing, if any are."""
+    if enriched >= requested:
+        return None
+    return f"Prices fetched for {enriched} of the {requested} nearest hotels in time"
+
+
+def _log_timings(city_code: str, timings: dict[str, float]) -> None:
+    """Log the duration of every stage of a search."""
+    stages = ", ".join(f"{stage} {elapsed} ms" for stage, elapsed in timings.items())
+    logger.bind(timings=timings).info(f"Hotel search in {city_code}: {stages}")
+
+
+def _fetch_enrichment(
+    hotel_id: str, headers: dict, params: dict,
+) -> tuple[dict[str, Any], dict[str, float]]:
+    """Fetch the cheapest offer and the guest rating of one hotel."""
+    fields: dict[str, Any] = {}
+    timings: dict[str, float] = {}
+    with time_stage("search_hotels", "offers", timings):
+        response = http_client.get("hotels", OFFERS_URL, headers=headers, params=params)
+    fields.update(_offer_fields(response))
+    if ENRICH_RATINGS:
+        # A failed rating lookup must not discard the offer fetched above.
+        try:
+            with time_stage("search_hotels", "ratings", timings):
+                response = http_client.get(
+                    "hotels",
+                    RATINGS_URL,
+                    headers=headers,
+                    params={"hotelIds": hotel_id},
+                )
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Hotel rating lookup failed: {e!s}")
+        else:
+            fields.update(_rating_fields(response))
+    return fields, timings
+
+
+def _enrich(
+    hotels: list[HotelOption],
+    headers: dict,
+    request_data: HotelSearchRequest,
+    timings: dict[str, float],
+) -> int:
+    """Enrich the first hotels in place on a bounded thread pool.
+
+    Returns:
+        int: The number of hotels enriched within the budget.
+
+    """
+    targets = _enrichment_targets(hotels)
+    executor = ThreadPoolExecutor(
+        max_workers=ENRICH_WORKERS, thread_name_prefix="hotel-enrich",
+    )
+    futures = {
+        executor.submit(
+            # Copy the context so upstream calls are traced with the request.
+            contextvars.copy_context().run,
+            _fetch_enrichment,
+            hotel_id,
+            headers,
+            _offer_params(hotel_id, request_data),
+        ): index
+        for index, hotel_id in targets
+    }
+    enriched = 0
+    try:
+        for future in as_completed(futures, timeout=ENRICH_BUDGET):
+            try:
+                fields, hotel_timings = future.result()
+            except (requests.exceptions.RequestException, ValueError) as e:
+                logger.warning(f"Hotel enrichment failed: {e!s}")
+                continue
+            _merge(hotels, futures[future], fields, hotel_timings, timings)
+            enriched += 1
+    except TimeoutError:
+        logger.warning(
+            f"Hotel enrichment budget of {ENRICH_BUDGET}s exhausted after "
+            f"{enriched} of {len(targets)} hotels",
+        )
+    finally:
+        # Requests still running finish in the background; their results are dropped.
+        executor.shutdown(wait=False, cancel_futures=True)
+    return enriched
+
+
+async def _afetch_enrichment(
+    hotel_id: str, headers: dict, params: dict,
+) -> tuple[dict[str, Any], dict[str, float]]:
+    """Async variant of ``_fetch_enrichment``; offer and rating run concurrently."""
+    timings: dict[str, float] = {}
+
+    async def offers() -> dict[str, Any]:
+        with time_stage("search_hotels", "offers", timings):
+            response = await http_client.aget(
+                "hotels", OFFERS_URL, headers=headers, params=params,
+            )
+        return _offer_fields(response)
+
+    async def rating() -> dict[str, Any]:
+        # A failed rating lookup must not discard the offer fetched alongside.
+        try:
+            with time_stage("search_hotels", "ratings", timings):
+                response = await http_client.aget(
+                    "hotels",
+                    RATINGS_URL,
+                    headers=headers,
+                    params={"hotelIds": hotel_id},
+                )
+        except httpx.HTTPError as e:
+            logger.warning(f"Hotel rating lookup failed: {e!s}")
+            return {}
+        return _rating_fields(response)
+
+    if not ENRICH_RATINGS:
+        return await offers(), timings
+    offer_fields, rating_fields = await asyncio.gather(offers(), rating())
+    return {**offer_fields, **rating_fields}, timings
+
+
+async def _aenrich(
+    hotels: list[HotelOption],
+    headers: dict,
+    request_data: HotelSearchRequest,
+    timings: dict[str, float],
+) -> int:
+    """Async variant of ``_enrich`` with at most ``ENRICH_WORKERS`` hotels at once."""
+    targets = _enrichment_targets(hotels)
+    semaphore = asyncio.Semaphore(ENRICH_WORKERS)
+
+    async def enrich_one(
+        index: int, hotel_id: str,
+    ) -> tuple[int, dict[str, Any], dict[str, float]]:
+        async with semaphore:
+            fields, hotel_timings = await _afetch_enrichment(
+                hotel_id, headers, _offer_params(hotel_id, request_data),
+            )
+        return index, fields, hotel_timings
+
+    tasks = [asyncio.create_task(enrich_one(*target)) for target in targets]
+    enriched = 0
+    try:
+        for next_done in asyncio.as_completed(tasks, timeout=ENRICH_BUDGET):
+            try:
+                index, fields, hotel_timings = await next_done
+            except (httpx.HTTPError, ValueError) as e:
+                logger.warning(f"Hotel enrichment failed: {e!s}")
+                continue
+            _merge(hotels, index, fields, hotel_timings, timings)
+            enriched += 1
+    except TimeoutError:
+        logger.warning(
+            f"Hotel enrichment budget of {ENRICH_BUDGET}s exhausted after "
+            f"{enriched} of {len(targets)} hotels",
+        )
+    finally:
+        for task in tasks:
+            task.cancel()
+    return enriched
+
+
+def _parse_hotels(payload: dict, city_code: str) -> HotelSearchResponse:
+    """Turn a hotel-list payload into the tool response."""
+    data = payload.get("data", [])
+    logger.info(f"Found {len(data)} hotel options")
+
+    # Process hotel options
+    hotels = [
+        HotelOption(
+            name=hotel["name"],
+            hotel_id=hotel.get("hotelId", "Not specified"),
+            address=hotel["address"].get("countryCode", "Not specified"),
+            rating=str(hotel.get("rating", "Not rated")),
+            amenities=hotel.get("amenities", []),
+        )
+        for hotel in data
+    ]
+
+    if not hotels:
+        logger.warning(f"No hotels found in {city_code} matching criteria")
+        return HotelSearchResponse(message=f"No hotels found in {city_code}")
+
+    logger.success(f"Found {len(hotels)} hotels in {city_code}")
+    logger.debug(f"Sample hotel: {hotels[0]}")
+    return HotelSearchResponse(hotels=hotels)
+
+
+def _search_hotels(  # noqa: PLR0913, PLR0917
     city_code: str = "NYC",
     radius: int = 1,
     radius_unit: str = "KM",
     amenities: str = "wifi,pool",
     ratings: str = "3,4",
+    check_in_date: str | None = None,
+    check_out_date: str | None = None,
+    adults: int = 1,
 ) -> HotelSearchResponse:
     """Search for hotels using the Amadeus API and return results.
 
-    Use when the user asks for hotel options in a city.
+    Use when the user asks for hotel options in a city. The nearest hotels
+    come with the price of their cheapest room for the stay and a guest
+    rating (0-100).
 
     Args:
-        city_code: IATA city code (default = "NYC")
+        city_code: IATA city code or city name (default = "NYC")
         radius: Search radius from city center (default = 1)
         radius_unit: "KM" or "MI" (default = "KM")
         amenities: Comma-separated list of amenities (default = "wifi,pool")
         ratings: Comma-separated list of rating (default="3,4")
+        check_in_date: Check-in date "YYYY-MM-DD" (default = today)
+        check_out_date: Check-out date "YYYY-MM-DD" (default = next day)
+        adults: Number of adult guests (default = 1)
 
     Returns:
         HotelSearchResponse with list of hotels or error message
     Input format: `search_hotels(city: str, radius: Optional[int],
-    radius_unit: Optional[str], amenities: Optional[str], ratings: Optional[str])`
+    radius_unit: Optional[str], amenities: Optional[str], ratings: Optional[str],
+    check_in_date: Optional[str], check_out_date: Optional[str],
+    adults: Optional[int])`
 
     """
     logger.info(
@@ -87,43 +378,33 @@ def search_hotels(
             radius_unit=radius_unit,
             amenities=amenities,
             ratings=ratings,
+            check_in_date=check_in_date,
+            check_out_date=check_out_date,
+            adults=adults,
         )
         logger.debug(f"Created request object: {request_data}")
 
-        # Get OAuth token
+        # Get OAuth token (cached and shared with the flight tool)
         logger.info("Requesting API access token")
-        headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        data = {
-            "grant_type": "client_credentials",
-            "client_id": os.getenv("HOTELS_API_KEY"),
-            "client_secret": os.getenv("HOTELS_API_SECRET"),
-        }
-
-        response = requests.post(BASE_URL, headers=headers, data=data, timeout=300)
-        if response.status_code != HTTP_OK:
-            error_msg = (
-                f"Token request failed: {response.status_code} - {response.text}"
-            )
+        timings: dict[str, float] = {}
+        try:
+            with time_stage("search_hotels", "token", timings):
+                access_token = _token_manager().get_token()
+        except TokenRequestError as e:
+            error_msg = str(e)
             logger.error(error_msg)
             return HotelSearchResponse(error=error_msg)
-
-        access_token = response.json().get("access_token")
         logger.success("Successfully obtained access token")
 
         # Search for hotels
-        search_url = "https://test.api.amadeus.com/v1/reference-data/locations/hotels/by-city"
         headers = {"Authorization": f"Bearer {access_token}"}
-        params = {
-            "cityCode": request_data.city_code,
-            "radius": request_data.radius,
-            "radiusUnit": request_data.radius_unit,
-            "amenities": request_data.amenities,
-            "ratings": request_data.ratings,
-        }
-        logger.debug(f"Preparing hotel search with params: {params}")
+        params = _search_params(request_data)
 
         logger.info("Making hotel search request")
-        response = requests.get(search_url, headers=headers, params=params, timeout=300)
+        with time_stage("search_hotels", "list", timings):
+            response = http_client.get(
+                "hotels", SEARCH_URL, headers=headers, params=params,
+            )
         if response.status_code != HTTP_OK:
             error_msg = (
                 f"Hotel search failed: {response.status_code} - {response.text}"
@@ -131,30 +412,105 @@ def search_hotels(
             logger.error(error_msg)
             return HotelSearchResponse(error=error_msg)
 
-        data = response.json().get("data", [])
-        logger.info(f"Found {len(data)} hotel options")
-
-        # Process hotel options
-        hotels = [
-            HotelOption(
-                name=hotel["name"],
-                hotel_id=hotel.get("hotelId", "Not specified"),
-                address=hotel["address"].get("countryCode", "Not specified"),
-                rating=str(hotel.get("rating", "Not rated")),
-                amenities=hotel.get("amenities", []),
+        with span("parse", "search_hotels"):
+            result = _parse_hotels(response.json(), request_data.city_code)
+        if result.hotels and ENRICH_TOP_N:
+            with time_stage("search_hotels", "enrich", timings):
+                enriched = _enrich(result.hotels, headers, request_data, timings)
+            result.message = _partial_note(
+                enriched, len(_enrichment_targets(result.hotels)),
             )
-            for hotel in data
-        ]
+        _log_timings(request_data.city_code, timings)
 
-        if not hotels:
-            logger.warning(f"No hotels found in {city_code} matching criteria")
-            return HotelSearchResponse(message=f"No hotels found in {city_code}")
+    except requests.exceptions.RequestException as e:
+        error_msg = f"Hotel search request failed: {e!s}"
+        logger.error(error_msg)
+        return HotelSearchResponse(error=error_msg)
+    except ValueError as e:
+        error_msg = f"Unexpected error in hotel search: {e!s}"
+        logger.critical(error_msg)
+        return HotelSearchResponse(error=error_msg)
+    else:
+        return result
 
-        logger.success(f"Found {len(hotels)} hotels in {city_code}")
-        logger.debug(f"Sample hotel: {hotels[0]}")
-        return HotelSearchResponse(hotels=hotels)
 
+async def _asearch_hotels(  # noqa: PLR0913, PLR0917
+    city_code: str = "NYC",
+    radius: int = 1,
+    radius_unit: str = "KM",
+    amenities: str = "wifi,pool",
+    ratings: str = "3,4",
+    check_in_date: str | None = None,
+    check_out_date: str | None = None,
+    adults: int = 1,
+) -> HotelSearchResponse:
+    """Async variant of ``search_hotels`` using the pooled async client."""
+    logger.info(
+        f"Starting async hotel search in {city_code} "
+        f"(radius: {radius}{radius_unit}, amenities: {amenities}, ratings: {ratings})",
+    )
+
+    try:
+        request_data = HotelSearchRequest(
+            city_code=city_code,
+            radius=radius,
+            radius_unit=radius_unit,
+            amenities=amenities,
+            ratings=ratings,
+            check_in_date=check_in_date,
+            check_out_date=check_out_date,
+            adults=adults,
+        )
+        logger.debug(f"Created request object: {request_data}")
+
+        timings: dict[str, float] = {}
+        try:
+            with time_stage("search_hotels", "token", timings):
+                access_token = await _token_manager().aget_token()
+        except TokenRequestError as e:
+            error_msg = str(e)
+            logger.error(error_msg)
+            return HotelSearchResponse(error=error_msg)
+
+        headers = {"Authorization": f"Bearer {access_token}"}
+        params = _search_params(request_data)
+
+        logger.info("Making async hotel search request")
+        with time_stage("search_hotels", "list", timings):
+            response = await http_client.aget(
+                "hotels", SEARCH_URL, headers=headers, params=params,
+            )
+        if response.status_code != HTTP_OK:
+            error_msg = (
+                f"Hotel search failed: {response.status_code} - {response.text}"
+            )
+            logger.error(error_msg)
+            return HotelSearchResponse(error=error_msg)
+
+        with span("parse", "search_hotels"):
+            result = _parse_hotels(response.json(), request_data.city_code)
+        if result.hotels and ENRICH_TOP_N:
+            with time_stage("search_hotels", "enrich", timings):
+                enriched = await _aenrich(
+                    result.hotels, headers, request_data, timings,
+                )
+            result.message = _partial_note(
+                enriched, len(_enrichment_targets(result.hotels)),
+            )
+        _log_timings(request_data.city_code, timings)
+
+    except httpx.HTTPError as e:
+        error_msg = f"Hotel search request failed: {e!s}"
+        logger.error(error_msg)
+        return HotelSearchResponse(error=error_msg)
     except ValueError as e:
         error_msg = f"Unexpected error in hotel search: {e!s}"
         logger.critical(error_msg)
         return HotelSearchResponse(error=error_msg)
+    else:
+        return result
+
+
+search_hotels = StructuredTool.from_function(
+    func=_search_hotels, coroutine=_asearch_hotels, name="search_hotels",
+)
@@ -0,0 +1,284 @@
+"""Shared HTTP client layer for the tools.
+
+Every tool talks to its upstream API through a named client profile
+(``weather``, ``flights``, ``hotels``, ``currency``, ``news``, ``amadeus``).
+Each profile gets a pooled keep-alive ``requests.Session`` for synchronous
+calls and an ``httpx.AsyncClient`` (HTTP/2 when the ``h2`` package is
+installed) for asynchronous calls, with per-profile connect/read timeouts and
+bounded retries with jittered exponential backoff. Requests are admitted by
+the rate limiter and circuit breaker of their upstream API first (see
+``tools.resilience``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import random
+import threading
+import time
+import weakref
+from typing import Any
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from tools import resilience, tracing
+from tools.metrics import UPSTREAM_LATENCY
+from tools.registry import load_config
+
+_config = load_config()
+
+_http_config = _config.get("HTTP", {})
+POOL_CONNECTIONS = int(_http_config.get("POOL_CONNECTIONS", 4))
+POOL_MAXSIZE = int(_http_config.get("POOL_MAXSIZE", 16))
+MAX_RETRIES = int(_http_config.get("MAX_RETRIES", 2))
+BACKOFF_FACTOR = float(_http_config.get("BACKOFF_FACTOR", 0.3))
+BACKOFF_JITTER = float(_http_config.get("BACKOFF_JITTER", 0.2))
+RETRY_STATUSES = tuple(_http_config.get("RETRY_STATUSES", [429, 502, 503, 504]))
+HTTP2_ENABLED = bool(_http_config.get("HTTP2", True)) and (
+    importlib.util.find_spec("h2") is not None
+)
+
+DEFAULT_CONNECT_TIMEOUT = float(_http_config.get("CONNECT_TIMEOUT", 3.05))
+DEFAULT_READ_TIMEOUT = float(_http_config.get("READ_TIMEOUT", 30))
+
+# Config section holding the timeouts of each client profile.
+PROFILE_SECTIONS = {
+    "weather": "Weather",
+    "flights": "Flights",
+    "hotels": "Hotels",
+    "currency": "Currency",
+    "news": "News",
+    "amadeus": "Amadeus",
+}
+
+_sessions: dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+_async_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[str, httpx.AsyncClient],
+] = weakref.WeakKeyDictionary()
+
+
+def get_timeout(profile: str) -> tuple[float, float]:
+    """Return the (connect, read) timeout of a client profile.
+
+    Args:
+        profile (str): The client profile name.
+
+    Returns:
+        tuple[float, float]: Connect and read timeouts in seconds.
+
+    """
+    section = _config.get(PROFILE_SECTIONS.get(profile, ""), {}) or {}
+    return (
+        float(section.get("CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)),
+        float(section.get("READ_TIMEOUT", DEFAULT_READ_TIMEOUT)),
+    )
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        backoff_jitter=BACKOFF_JITTER,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=None,  # Tool calls are reads; token POSTs are safe to retry.
+        raise_on_status=False,  # Let the tools inspect the final status code.
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(profile: str) -> requests.Session:
+    """Return the pooled keep-alive session of a client profile.
+
+    Args:
+        profile (str): The client profile name.
+
+    Returns:
+        requests.Session: A session shared by every call of that profile.
+
+    """
+    session = _sessions.get(profile)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(profile)
+            if session is None:
+                session = _build_session()
+                _sessions[profile] = session
+    return session
+
+
+def _record(profile: str, method: str, duration: float, status: int | None) -> None:
+    """Add a finished request to the metrics and the request's trace."""
+    UPSTREAM_LATENCY.labels(profile, status or "error").observe(duration)
+    tracing.record("http", profile, duration, method=method, status=status)
+
+
+def request(profile: str, method: str, url: str, **kwargs: Any) -> requests.Response:  # noqa: ANN401
+    """Send a request through the pooled session of a client profile.
+
+    Args:
+        profile (str): The client profile name.
+        method (str): The HTTP method.
+        url (str): The request URL.
+        **kwargs: Extra arguments for ``requests.Session.request``.
+
+    Returns:
+        requests.Response: The upstream response.
+
+    Raises:
+        resilience.UpstreamUnavailableError: If the upstream's circuit is
+            open or its rate limit leaves no token in time.
+
+    """
+    permit = resilience.acquire(profile)
+    if permit.wait:
+        time.sleep(permit.wait)
+    kwargs.setdefault("timeout", get_timeout(profile))
+    start = time.perf_counter()
+    status = None
+    try:
+        response = get_session(profile).request(method, url, **kwargs)
+        status = response.status_code
+        permit.succeeded(status)
+    except requests.exceptions.RequestException:
+        permit.failed()
+        raise
+    finally:
+        permit.abandon()  # No-op once the outcome has been reported.
+        _record(profile, method, time.perf_counter() - start, status)
+    return response
+
+
+def get(profile: str, url: str, **kwargs: Any) -> requests.Response:  # noqa: ANN401
+    """Send a GET request through a client profile."""
+    return request(profile, "GET", url, **kwargs)
+
+
+def post(profile: str, url: str, **kwargs: Any) -> requests.Response:  # noqa: ANN401
+    """Send a POST request through a client profile."""
+    return request(profile, "POST", url, **kwargs)
+
+
+def get_async_client(profile: str) -> httpx.AsyncClient:
+    """Return the async client of a client profile for the running event loop.
+
+    Connection pools are bound to the event loop that created them, so one
+    client is kept per (event loop, profile).
+
+    Args:
+        profile (str): The client profile name.
+
+    Returns:
+        httpx.AsyncClient: A pooled, keep-alive async client.
+
+    """
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    client = clients.get(profile)
+    if client is None:
+        connect_timeout, read_timeout = get_timeout(profile)
+        client = httpx.AsyncClient(
+            http2=HTTP2_ENABLED,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=POOL_MAXSIZE,
+                max_keepalive_connections=POOL_MAXSIZE,
+            ),
+        )
+        clients[profile] = client
+    return client
+
+
+def _backoff(attempt: int) -> float:
+    """Return the jittered exponential backoff before a retry."""
+    return BACKOFF_FACTOR * (2**attempt) + random.uniform(0, BACKOFF_JITTER)  # noqa: S311
+
+
+async def arequest(
+    profile: str, method: str, url: str, **kwargs: Any,  # noqa: ANN401
+) -> httpx.Response:
+    """Send a request through the async client of a client profile.
+
+    Connection errors and retryable status codes are retried up to
+    ``MAX_RETRIES`` times with jittered exponential backoff.
+
+    Args:
+        profile (str): The client profile name.
+        method (str): The HTTP method.
+        url (str): The request URL.
+        **kwargs: Extra arguments for ``httpx.AsyncClient.request``.
+
+    Returns:
+        httpx.Response: The upstream response.
+
+    Raises:
+        resilience.UpstreamUnavailableError: If the upstream's circuit is
+            open or its rate limit leaves no token in time.
+
+    """
+    permit = resilience.acquire(profile)
+    start = time.perf_counter()
+    response = None
+    try:
+        # Inside the try: a task cancelled while waiting still releases its permit.
+        if permit.wait:
+            await asyncio.sleep(permit.wait)
+            start = time.perf_counter()
+        response = await _arequest_with_retries(profile, method, url, **kwargs)
+        permit.succeeded(response.status_code)
+    except httpx.HTTPError:
+        permit.failed()
+        raise
+    finally:
+        permit.abandon()  # No-op once the outcome has been reported.
+        status = response.status_code if response is not None else None
+        _record(profile, method, time.perf_counter() - start, status)
+    return response
+
+
+async def _arequest_with_retries(
+    profile: str, method: str, url: str, **kwargs: Any,  # noqa: ANN401
+) -> httpx.Response:
+    client = get_async_client(profile)
+    attempt = 0
+    while True:
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TransportError:
+            if attempt >= MAX_RETRIES:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt >= MAX_RETRIES:
+                return response
+        await asyncio.sleep(_backoff(attempt))
+        attempt += 1
+
+
+async def aget(profile: str, url: str, **kwargs: Any) -> httpx.Response:  # noqa: ANN401
+    """Send an async GET request through a client profile."""
+    return await arequest(profile, "GET", url, **kwargs)
+
+
+async def apost(profile: str, url: str, **kwargs: Any) -> httpx.Response:  # noqa: ANN401
+    """Send an async POST request through a client profile."""
+    return await arequest(profile, "POST", url, **kwargs)
+
+
+def close_all() -> None:
+    """Close every pooled synchronous session."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
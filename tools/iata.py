@@ -0,0 +1,514 @@
+"""Offline IATA airport and city index for the flight and hotel tools.
+
+The flight and hotel APIs take IATA codes, which the model used to guess
+(or spend agent steps looking up); a wrong code cost a failed upstream
+call. ``resolve`` turns what the model passes, a code, a city or an airport
+name, possibly misspelled, into a code locally, in microseconds (a
+fraction of a millisecond for a misspelled name):
+
+1. A known code is returned as is; hotel searches get the city code of an
+   airport (``CDG`` -> ``PAR``).
+2. Otherwise the normalized name (case, accents and punctuation ignored) is
+   looked up in a prefix trie of city names, airport names and aliases
+   (``Bombay`` -> ``BOM``). A city with several airports resolves to its
+   city code (``London`` -> ``LON``).
+3. Otherwise a unique prefix (``Frankf`` -> ``FRA``) or the unique closest
+   name within an edit distance of 1-2 (``Pariss`` -> ``PAR``) is used.
+
+Anything else raises ``UnknownLocationError`` with suggestions, before any
+network call. The bundled list (``tools/data/airports.csv``) covers major
+airports only, so unknown three-letter codes are passed through unless
+``STRICT`` is set.
+
+The CSV is compiled once into a compact binary table (fixed-size place
+records sorted by code, an array-backed trie and a string blob) that is
+memory-mapped on first use, so importing this module costs nothing and
+every worker process shares the same pages.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import functools
+import mmap
+import re
+import struct
+import sys
+import tempfile
+import time
+import unicodedata
+from array import array
+from collections import deque
+from pathlib import Path
+from typing import NamedTuple
+
+from loguru import logger
+
+from tools.cache import PROJECT_ROOT
+from tools.registry import config_section
+
+_iata_config = config_section("Iata")
+
+ENABLED = bool(_iata_config.get("ENABLED", True))
+STRICT = bool(_iata_config.get("STRICT", False))
+SOURCE_PATH = PROJECT_ROOT / _iata_config.get("SOURCE", "tools/data/airports.csv")
+INDEX_PATH = PROJECT_ROOT / _iata_config.get("INDEX_PATH", ".cache/iata_index.bin")
+MAX_SUGGESTIONS = int(_iata_config.get("MAX_SUGGESTIONS", 3))
+# Names up to this length are matched with one typo, longer ones with two.
+SHORT_NAME_LENGTH = 7
+
+MAGIC = b"IATA"
+VERSION = 2
+AIRPORT = "airport"
+CITY = "city"
+KINDS = (AIRPORT, CITY)
+NONE = 0xFFFFFFFF
+
+# magic, version, places, trie nodes, postings, string bytes
+_HEADER = struct.Struct("<4sHIIII")
+_ALIGNMENT = 4
+
+_CODE = re.compile(r"^[A-Za-z]{3}$")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+BAD_INDEX_ERROR = "Not an IATA index file"
+
+
+class UnknownLocationError(ValueError):
+    """A location could not be resolved to a single IATA code."""
+
+
+class Place(NamedTuple):
+    """An airport or a city of the index."""
+
+    code: str
+    kind: str
+    name: str
+    city: str
+    city_code: str
+    country: str
+
+
+def normalize(text: str) -> str:
+    """Return ``text`` lowercased, without accents and with single spaces."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    ascii_text = stripped.casefold().encode("ascii", "ignore").decode()
+    return _NON_ALNUM.sub(" ", ascii_text).strip()
+
+
+def _keys(row: dict[str, str]) -> set[str]:
+    """Return the trie keys of a CSV row: its city, name and aliases."""
+    names = [row["city"], row["name"], *row.get("aliases", "").split(";")]
+    if row["kind"] == CITY:
+        names.remove(row["name"])  # "London (all airports)" is display only.
+    return {key for key in map(normalize, names) if key}
+
+
+def encode_index(source: Path) -> bytes:
+    """Compile the airport CSV into the binary index.
+
+    Args:
+        source (Path): The CSV with ``code``, ``kind``, ``name``, ``city``,
+            ``city_code``, ``country`` and ``aliases`` columns.
+
+    Returns:
+        bytes: The index, as written by ``compile_index``.
+
+    """
+    with source.open(newline="", encoding="utf-8") as file:
+        rows = sorted(
+            csv.DictReader(file),
+            key=lambda row: (row["code"].upper(), KINDS.index(row["kind"])),
+        )
+
+    strings = bytearray()
+    name_spans: list[int] = []
+    postings_by_key: dict[str, list[int]] = {}
+    for index, row in enumerate(rows):
+        name, city = row["name"].encode(), row["city"].encode()
+        name_spans += [len(strings), len(name), len(strings) + len(name), len(city)]
+        strings += name + city
+        for key in _keys(row):
+            postings_by_key.setdefault(key, []).append(index)
+
+    # Build the trie as nested dicts, then lay it out breadth-first so each
+    # node's children are contiguous and linked through ``next sibling``.
+    root: dict = {}
+    for key, posting in postings_by_key.items():
+        node = root
+        for byte in key.encode():
+            node = node.setdefault(byte, {})
+        node[None] = posting
+    node_bytes = bytearray([0])
+    first_child, next_sibling = array("I", [NONE]), array("I", [NONE])
+    postings_at, postings_count = array("I", [0]), array("I", [0])
+    postings = array("I")
+    queue = deque([(root, 0)])
+    while queue:
+        trie_node, node_index = queue.popleft()
+        posting = trie_node.get(None, [])
+        postings_at[node_index] = len(postings)
+        postings_count[node_index] = len(posting)
+        postings.extend(posting)
+        children = sorted(byte for byte in trie_node if byte is not None)
+        for position, byte in enumerate(children):
+            child_index = len(node_bytes)
+            if position == 0:
+                first_child[node_index] = child_index
+            last = position == len(children) - 1
+            node_bytes.append(byte)
+            first_child.append(NONE)
+            next_sibling.append(NONE if last else child_index + 1)
+            postings_at.append(0)
+            postings_count.append(0)
+            queue.append((trie_node[byte], child_index))
+
+    sections = [
+        b"".join(row["code"].upper().encode() for row in rows),
+        b"".join(row["city_code"].upper().encode() for row in rows),
+        b"".join(row["country"].upper().encode() for row in rows),
+        bytes(KINDS.index(row["kind"]) for row in rows),
+        array("I", name_spans).tobytes(),
+        bytes(node_bytes),
+        first_child.tobytes(),
+        next_sibling.tobytes(),
+        postings_at.tobytes(),
+        postings_count.tobytes(),
+        postings.tobytes(),
+        bytes(strings),
+    ]
+    header = _HEADER.pack(
+        MAGIC, VERSION, len(rows), len(node_bytes), len(postings), len(strings),
+    )
+    return header + b"".join(
+        section + bytes(-len(section) % _ALIGNMENT) for section in sections
+    )
+
+
+def compile_index(source: Path, target: Path) -> None:
+    """Compile the airport CSV into the binary index file.
+
+    Args:
+        source (Path): The airport CSV; see ``encode_index``.
+        target (Path): Where to write the index; replaced atomically.
+
+    """
+    data = encode_index(source)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=target.parent, delete=False) as file:
+        file.write(data)
+    Path(file.name).replace(target)
+    _, _, places, nodes, _, _ = _HEADER.unpack_from(data)
+    logger.info(
+        f"Compiled IATA index: {places} places, {nodes} trie nodes, "
+        f"{len(data) / 1024:.1f} KiB",
+    )
+
+
+class IataIndex:
+    """Read-only view of a compiled index file through ``mmap``, or of its bytes.
+
+    Every column is a zero-copy view of the mapped file: three-letter codes
+    as byte strings, numbers as native ``uint32`` arrays. The file is a
+    local build artefact, so native byte order is fine.
+    """
+
+    def __init__(self, source: Path | bytes) -> None:
+        """Map the index file into memory.
+
+        Args:
+            source (Path | bytes): The compiled index file, or its contents.
+
+        Raises:
+            ValueError: If the file is not an index of this version.
+
+        """
+        if isinstance(source, bytes):
+            self._data: mmap.mmap | bytes = source
+        else:
+            with source.open("rb") as file:
+                self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size, nodes, postings, strings = _HEADER.unpack_from(
+            self._data,
+        )
+        if magic != MAGIC or version != VERSION:
+            self._unmap()
+            raise ValueError(BAD_INDEX_ERROR)
+        self._view = memoryview(self._data)
+        self._offset = _HEADER.size
+        self._codes = self._section(self.size * 3)
+        self._city_codes = self._section(self.size * 3)
+        self._countries = self._section(self.size * 2)
+        self._kinds = self._section(self.size)
+        self._name_spans = self._section(self.size * 4, "I")
+        self._node_bytes = self._section(nodes)
+        self._first_child = self._section(nodes, "I")
+        self._next_sibling = self._section(nodes, "I")
+        self._postings_at = self._section(nodes, "I")
+        self._postings_count = self._section(nodes, "I")
+        self._postings = self._section(postings, "I")
+        self._strings = self._section(strings)
+
+    def _section(self, length: int, typecode: str = "B") -> memoryview:
+        """Return the next ``length`` items of the file as a typed view."""
+        size = length * (4 if typecode == "I" else 1)
+        view = self._view[self._offset:self._offset + size].cast(typecode)
+        self._offset += size + (-size % _ALIGNMENT)
+        return view
+
+    def _code(self, index: int) -> bytes:
+        return bytes(self._codes[index * 3:index * 3 + 3])
+
+    def _text(self, start: int, length: int) -> str:
+        return bytes(self._strings[start:start + length]).decode()
+
+    def place(self, index: int) -> Place:
+        """Return the place stored at ``index``."""
+        name_at, name_len, city_at, city_len = self._name_spans[index * 4:index * 4 + 4]
+        return Place(
+            self._code(index).decode(),
+            KINDS[self._kinds[index]],
+            self._text(name_at, name_len),
+            self._text(city_at, city_len),
+            bytes(self._city_codes[index * 3:index * 3 + 3]).decode(),
+            bytes(self._countries[index * 2:index * 2 + 2]).decode(),
+        )
+
+    def lookup(self, code: str) -> Place | None:
+        """Return the place with IATA ``code`` (binary search), if indexed."""
+        wanted = code.upper().encode()
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self._code(middle) < wanted:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.size and self._code(low) == wanted:
+            return self.place(low)
+        return None
+
+    def _children(self, node: int) -> list[int]:
+        children = []
+        child = self._first_child[node]
+        while child != NONE:
+            children.append(child)
+            child = self._next_sibling[child]
+        return children
+
+    def _places(self, node: int) -> list[Place]:
+        start = self._postings_at[node]
+        return [
+            self.place(index)
+            for index in self._postings[start:start + self._postings_count[node]]
+        ]
+
+    def _find(self, key: str) -> int | None:
+        """Return the trie node of ``key``, or None if no key starts with it."""
+        node = 0
+        for byte in key.encode():
+            child = self._first_child[node]
+            while child != NONE and self._node_bytes[child] != byte:
+                child = self._next_sibling[child]
+            if child == NONE:
+                return None
+            node = child
+        return node
+
+    def exact(self, key: str) -> list[Place]:
+        """Return the places whose city, name or alias normalizes to ``key``."""
+        node = self._find(key)
+        return [] if node is None else self._places(node)
+
+    def complete(self, prefix: str, limit: int = 50) -> list[list[Place]]:
+        """Return the places of up to ``limit`` keys starting with ``prefix``."""
+        node = self._find(prefix)
+        matches: list[list[Place]] = []
+        stack = [] if node is None else [node]
+        while stack and len(matches) < limit:
+            node = stack.pop()
+            if self._postings_count[node]:
+                matches.append(self._places(node))
+            stack.extend(reversed(self._children(node)))
+        return matches
+
+    def fuzzy(self, key: str, max_distance: int) -> list[tuple[int, list[Place]]]:
+        """Return the places of keys within ``max_distance`` edits of ``key``.
+
+        The trie is walked depth-first with one row of the Levenshtein
+        table per node; branches whose row exceeds ``max_distance`` are
+        skipped. Typos in the first letter are rare, so only keys starting
+        with the same letter are searched, which prunes most of the trie.
+        """
+        target = key.encode()
+        matches: list[tuple[int, list[Place]]] = []
+        first_row = list(range(len(target) + 1))
+        stack = [
+            (child, first_row) for child in self._children(0)
+            if self._node_bytes[child] == target[0]
+        ]
+        while stack:
+            node, previous = stack.pop()
+            byte = self._node_bytes[node]
+            row = [previous[0] + 1]
+            for column, wanted in enumerate(target, start=1):
+                row.append(min(
+                    row[column - 1] + 1,
+                    previous[column] + 1,
+                    previous[column - 1] + (wanted != byte),
+                ))
+            if row[-1] <= max_distance and self._postings_count[node]:
+                matches.append((row[-1], self._places(node)))
+            if min(row) <= max_distance:
+                stack.extend((child, row) for child in self._children(node))
+        return sorted(matches, key=lambda match: match[0])
+
+    def close(self) -> None:
+        """Release the views and unmap the index file."""
+        for name, value in vars(self).items():
+            if isinstance(value, memoryview) and name != "_view":
+                value.release()
+        self._view.release()
+        self._unmap()
+
+    def _unmap(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+
+@functools.cache
+def get_index() -> IataIndex:
+    """Return the shared index, compiling the CSV first if it changed.
+
+    If the index file cannot be written or mapped (a read-only ``.cache``),
+    the index is compiled in memory for this process instead.
+    """
+    try:
+        if (
+            not INDEX_PATH.exists()
+            or INDEX_PATH.stat().st_mtime < SOURCE_PATH.stat().st_mtime
+        ):
+            compile_index(SOURCE_PATH, INDEX_PATH)
+        return IataIndex(INDEX_PATH)
+    except OSError as e:
+        logger.warning(f"IATA index file unavailable, building it in memory: {e!s}")
+        return IataIndex(encode_index(SOURCE_PATH))
+
+
+def _codes(places: list[Place], *, city: bool) -> set[str]:
+    """Return the codes a set of matching places resolves to.
+
+    Places of one city resolve to its city code when there are several
+    (the city's airports) or when a city code is wanted.
+    """
+    city_codes = {place.city_code or place.code for place in places}
+    if len(city_codes) == 1 and (city or len(places) > 1):
+        return city_codes
+    return city_codes if city else {place.code for place in places}
+
+
+def _describe(index: IataIndex, code: str) -> str:
+    place = index.lookup(code)
+    return f"{code} ({place.city}, {place.country})" if place else code
+
+
+def _unknown(index: IataIndex, query: str, label: str, candidates: set[str]) -> str:
+    """Return the error message for an unresolved location."""
+    msg = f"Unknown {label} '{query}'"
+    if candidates:
+        suggestions = sorted(candidates)[:MAX_SUGGESTIONS]
+        msg += "; did you mean " + ", ".join(
+            _describe(index, code) for code in suggestions
+        ) + "?"
+    else:
+        msg += "."
+    return msg + " Pass an IATA code or a city name."
+
+
+def _match_name(index: IataIndex, key: str, *, city: bool) -> set[str]:
+    """Return the codes of the exact, else prefix, else closest name matches."""
+    if not key:
+        return set()
+    places = index.exact(key)
+    if places:
+        return _codes(places, city=city)
+    codes: set[str] = set()
+    for match in index.complete(key):
+        codes |= _codes(match, city=city)
+    if codes:
+        return codes
+    max_distance = 1 if len(key) <= SHORT_NAME_LENGTH else 2
+    matches = index.fuzzy(key, max_distance)
+    for distance, match in matches:
+        if distance == matches[0][0]:
+            codes |= _codes(match, city=city)
+    return codes
+
+
+def resolve(query: str, *, city: bool = False) -> str:
+    """Resolve a code, city or airport name to an IATA code.
+
+    Args:
+        query (str): What the caller passed, e.g. ``"CDG"``, ``"paris"``,
+            ``"Heathrow"`` or ``"Mumbay"``.
+        city (bool): Return a city code (for hotel searches) rather than an
+            airport or city code (for flight searches).
+
+    Returns:
+        str: The upper-case IATA code.
+
+    Raises:
+        UnknownLocationError: If the query matches no place or several.
+
+    """
+    index = get_index()
+    label = "city" if city else "airport"
+    text = query.strip()
+    # An upper-case code is never reinterpreted as a name.
+    code_like = bool(_CODE.match(text)) and text.isupper()
+    if _CODE.match(text):
+        place = index.lookup(text)
+        if place is not None:
+            return place.city_code if city and place.city_code else place.code
+        if code_like and not STRICT:
+            return text  # The bundled list is not exhaustive.
+
+    codes = _match_name(index, normalize(text), city=city)
+    if len(codes) == 1 and not code_like:
+        return codes.pop()
+    raise UnknownLocationError(_unknown(index, query, label, codes))
+
+
+def resolve_airport(query: str) -> str:
+    """Resolve a flight origin or destination; see ``resolve``."""
+    return resolve(query) if ENABLED else query
+
+
+def resolve_city(query: str) -> str:
+    """Resolve the city of a hotel search; see ``resolve``."""
+    return resolve(query, city=True) if ENABLED else query
+
+
+def main() -> None:
+    """Compile the index and resolve the queries given on the command line."""
+    parser = argparse.ArgumentParser(description="Build and query the IATA index.")
+    parser.add_argument("queries", nargs="*", help="places to resolve")
+    parser.add_argument("--city", action="store_true", help="resolve city codes")
+    args = parser.parse_args()
+
+    compile_index(SOURCE_PATH, INDEX_PATH)
+    get_index()
+    for query in args.queries:
+        start = time.perf_counter()
+        try:
+            result = resolve(query, city=args.city)
+        except UnknownLocationError as e:
+            result = str(e)
+        elapsed = (time.perf_counter() - start) * 1e6
+        sys.stdout.write(f"{query!r}: {result} ({elapsed:.0f} µs)\n")
+
+
+if __name__ == "__main__":
+    main()
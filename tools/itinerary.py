@@ -0,0 +1,471 @@
+"""Multi-leg itinerary planner tool.
+
+Planning a trip such as "5 days: Mumbai -> Paris -> Rome, hotels and weather
+at each stop" used to take the agent a dozen steps, one tool call each.
+``plan_itinerary`` takes every leg at once and starts all lookups together:
+
+- a flight search per leg (``search_flights``),
+- a hotel search per stop of at least one night (``search_hotels``),
+- a weather forecast per stop within the forecast window,
+- the exchange-rate table of the itinerary currency, so prices quoted in
+  other currencies are converted locally afterwards.
+
+Flight and hotel searches go through the registered tools, so they are
+instrumented and coalesced like calls made by the agent. Lookups still
+running after ``BUDGET`` seconds are dropped and noted on their stop. Each
+stop keeps its cheapest flight and cheapest priced hotel, and the totals are
+converted to the itinerary currency.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import UTC, date, datetime, timedelta
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+import httpx
+import requests
+from langchain_core.tools import StructuredTool
+from loguru import logger
+
+from .iata import get_index
+from .metrics import time_stage
+from .pydantic_models import (
+    FlightOption,
+    HotelOption,
+    ItineraryLeg,
+    ItineraryResponse,
+    ItineraryStop,
+)
+from .registry import config_section, get_tool, timed_import
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+logger.info("Itinerary planner tool initializing")
+
+_itinerary_config = config_section("Itinerary")
+
+MAX_LEGS = int(_itinerary_config.get("MAX_LEGS", 6))
+FLIGHT_OPTIONS = int(_itinerary_config.get("FLIGHT_OPTIONS", 3))
+WORKERS = int(_itinerary_config.get("WORKERS", 8))
+BUDGET = float(_itinerary_config.get("BUDGET", 20.0))
+FORECAST_DAYS = int(_itinerary_config.get("FORECAST_DAYS", 14))
+
+TOO_MANY_LEGS_ERROR = "Too many legs in one itinerary"
+LOOKUP_ERRORS = (requests.exceptions.RequestException, httpx.HTTPError, ValueError)
+
+FLIGHT = "flight"
+HOTEL = "hotel"
+WEATHER = "weather"
+RATES = "rates"
+
+# Kind of a lookup and the index of its leg (-1 for the rates table).
+Key = tuple[str, int]
+# A price to convert: its stop, the stop field, the amount and its currency.
+Price = tuple[ItineraryStop, str, float, str]
+
+
+class _Lookup(NamedTuple):
+    """One lookup, callable from a worker thread or the event loop."""
+
+    func: Callable[..., Any]
+    coroutine: Callable[..., Awaitable[Any]]
+    kwargs: dict[str, Any]
+
+
+def _origins(origin: str, legs: list[ItineraryLeg]) -> list[str]:
+    """Return where each leg departs from."""
+    return [origin, *(leg.destination for leg in legs[:-1])]
+
+
+def _stay(leg: ItineraryLeg) -> tuple[date, date]:
+    """Return the first day at a stop and the day after the last one."""
+    start = date.fromisoformat(leg.date)
+    return start, start + timedelta(days=max(leg.nights, 1))
+
+
+def _forecast_days(leg: ItineraryLeg, today: date) -> int | None:
+    """Return the forecast days covering a stay, or None if none of it is covered."""
+    start, end = _stay(leg)
+    if (start - today).days >= FORECAST_DAYS or end <= today:
+        return None
+    return min(FORECAST_DAYS, (end - today).days)
+
+
+def _city_name(place: str) -> str:
+    """Return the city of an IATA code, or ``place`` itself if it is a name."""
+    found = get_index().lookup(place.strip()) if len(place.strip()) == 3 else None  # noqa: PLR2004
+    return found.city if found else place
+
+
+def _lookups(
+    origin: str, legs: list[ItineraryLeg], adults: int, currency: str,
+) -> dict[Key, _Lookup]:
+    """Return every lookup needed for the itinerary."""
+    flights = get_tool("search_flights")
+    hotels = get_tool("search_hotels")
+    weather = timed_import("tools.weather")
+    rates_store = timed_import("tools.currency").rates_store
+    today = datetime.now(UTC).date()
+
+    lookups = {
+        (RATES, -1): _Lookup(
+            rates_store.table,
+            functools.partial(asyncio.to_thread, rates_store.table),
+            {"base": currency.lower()},
+        ),
+    }
+    origins = _origins(origin, legs)
+    for index, (source, leg) in enumerate(zip(origins, legs, strict=True)):
+        lookups[FLIGHT, index] = _Lookup(flights.func, flights.coroutine, {
+            "source": source,
+            "destination": leg.destination,
+            "date": leg.date,
+            "adults": adults,
+            "currency": currency,
+            "max_results": FLIGHT_OPTIONS,
+        })
+        if not leg.nights:
+            continue
+        check_in, check_out = _stay(leg)
+        lookups[HOTEL, index] = _Lookup(hotels.func, hotels.coroutine, {
+            "city_code": leg.destination,
+            "check_in_date": check_in.isoformat(),
+            "check_out_date": check_out.isoformat(),
+            "adults": adults,
+        })
+        days = _forecast_days(leg, today)
+        if days:
+            lookups[WEATHER, index] = _Lookup(
+                weather.fetch_forecast,
+                weather.afetch_forecast,
+                {"city": _city_name(leg.destination), "days": days},
+            )
+    return lookups
+
+
+def _run(lookups: dict[Key, _Lookup]) -> dict[Key, Any]:
+    """Run the lookups on a thread pool; failures are returned as exceptions.
+
+    Any exception of one lookup, not only a request error, becomes a note on
+    its stop rather than failing the whole plan.
+    """
+    results: dict[Key, Any] = {}
+    executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="itinerary")
+    futures = {
+        # Copy the context so upstream calls are traced with the request.
+        executor.submit(
+            contextvars.copy_context().run, lookup.func, **lookup.kwargs,
+        ): key
+        for key, lookup in lookups.items()
+    }
+    try:
+        for future in as_completed(futures, timeout=BUDGET):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:  # noqa: BLE001 - one failed lookup is a note
+                results[futures[future]] = e
+    except TimeoutError:
+        logger.warning(
+            f"Itinerary budget of {BUDGET}s exhausted after "
+            f"{len(results)} of {len(lookups)} lookups",
+        )
+    finally:
+        # Lookups still running finish in the background; their results are dropped.
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+async def _arun(lookups: dict[Key, _Lookup]) -> dict[Key, Any]:
+    """Async variant of ``_run``; every lookup runs as a task."""
+    tasks = {
+        asyncio.create_task(lookup.coroutine(**lookup.kwargs)): key
+        for key, lookup in lookups.items()
+    }
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=BUDGET)
+    finally:
+        # Also on cancellation of the plan, so no lookup outlives it.
+        for task in tasks:
+            task.cancel()
+    if pending:
+        logger.warning(
+            f"Itinerary budget of {BUDGET}s exhausted after "
+            f"{len(done)} of {len(lookups)} lookups",
+        )
+    results: dict[Key, Any] = {}
+    for task in done:
+        try:
+            results[tasks[task]] = task.result()
+        except Exception as e:  # noqa: BLE001 - one failed lookup is a note
+            results[tasks[task]] = e
+    return results
+
+
+def _amount(price: str | None) -> tuple[float, str] | None:
+    """Split a price such as ``"512.40 USD"`` into amount and currency."""
+    amount, _, currency = (price or "").partition(" ")
+    if currency.strip():
+        with contextlib.suppress(ValueError):
+            return float(amount), currency.strip().lower()
+    return None
+
+
+def _describe_flight(flight: FlightOption) -> str:
+    stops = "direct" if not flight.stops else f"{flight.stops} stop(s)"
+    return (
+        f"{flight.airline} {flight.departure_time} -> {flight.arrival_time}, {stops}"
+    )
+
+
+def _describe_hotel(hotel: HotelOption) -> str:
+    details = [f"{hotel.rating}*"] if hotel.rating else []
+    if hotel.guest_rating is not None:
+        details.append(f"guest rating {hotel.guest_rating}")
+    return f"{hotel.name} ({', '.join(details)})" if details else hotel.name
+
+
+def _fill_flight(
+    stop: ItineraryStop, result: Any, _leg: ItineraryLeg, prices: list[Price],  # noqa: ANN401
+) -> str | None:
+    """Keep the cheapest flight of the leg; return a note if there is none."""
+    if result.error:
+        return f"flight: {result.error}"
+    priced = [
+        (amount, flight) for flight in result.flights
+        if (amount := _amount(flight.price))
+    ]
+    if not priced:
+        return "no flights found"
+    (amount, currency), flight = min(priced, key=lambda item: item[0][0])
+    stop.flight = _describe_flight(flight)
+    prices.append((stop, "flight_price", amount, currency))
+    return None
+
+
+def _fill_hotel(
+    stop: ItineraryStop, result: Any, _leg: ItineraryLeg, prices: list[Price],  # noqa: ANN401
+) -> str | None:
+    """Keep the cheapest priced hotel of the stay; return a note if there is none."""
+    if result.error:
+        return f"hotel: {result.error}"
+    hotels = result.hotels or []
+    if not hotels:
+        return "no hotels found"
+    priced = [
+        (amount, hotel) for hotel in hotels
+        if hotel.available is not False and (amount := _amount(hotel.price))
+    ]
+    if not priced:
+        stop.hotel = _describe_hotel(hotels[0])
+        return "no hotel prices for these dates"
+    (amount, currency), hotel = min(priced, key=lambda item: item[0][0])
+    stop.hotel = _describe_hotel(hotel)
+    prices.append((stop, "hotel_price", amount, currency))
+    return None
+
+
+def _fill_weather(
+    stop: ItineraryStop, result: Any, leg: ItineraryLeg, _prices: list[Price],  # noqa: ANN401
+) -> str | None:
+    """Summarize the forecast of the stay; return a note if there is none."""
+    if isinstance(result, str):
+        return f"weather: {result}"
+    start, end = _stay(leg)
+    days = [
+        forecast.day for forecast in result.forecastday
+        if start <= date.fromisoformat(forecast.date) < end
+    ]
+    if not days:
+        return "no forecast for these dates"
+    condition = Counter(day.condition.text for day in days).most_common(1)[0][0]
+    low = min(day.mintemp_c for day in days)
+    high = max(day.maxtemp_c for day in days)
+    rain = max(day.daily_chance_of_rain for day in days)
+    stop.weather = f"{condition}, {low:.0f}-{high:.0f}°C, rain up to {rain}%"
+    return None
+
+
+_FILLERS = {FLIGHT: _fill_flight, HOTEL: _fill_hotel, WEATHER: _fill_weather}
+
+
+def _assemble(
+    origin: str,
+    legs: list[ItineraryLeg],
+    lookups: dict[Key, _Lookup],
+    results: dict[Key, Any],
+) -> tuple[list[ItineraryStop], list[Price]]:
+    """Build the stops from the lookup results and collect their prices."""
+    stops: list[ItineraryStop] = []
+    prices: list[Price] = []
+    origins = _origins(origin, legs)
+    for index, (source, leg) in enumerate(zip(origins, legs, strict=True)):
+        stop = ItineraryStop(
+            origin=source,
+            destination=leg.destination,
+            date=leg.date,
+            nights=leg.nights,
+        )
+        notes = []
+        for kind, fill in _FILLERS.items():
+            key = (kind, index)
+            if key not in lookups:
+                continue
+            result = results.get(key)
+            if key not in results:
+                notes.append(f"{kind} lookup timed out")
+            elif isinstance(result, Exception):
+                notes.append(f"{kind}: {result!s}")
+            elif note := fill(stop, result, leg, prices):
+                notes.append(note)
+        if leg.nights and (WEATHER, index) not in lookups:
+            stop.weather = f"forecast available {FORECAST_DAYS} days ahead"
+        stop.notes = "; ".join(notes) or None
+        stops.append(stop)
+    return stops, prices
+
+
+def _response(
+    stops: list[ItineraryStop],
+    prices: list[Price],
+    converted: list[float | str],
+    currency: str,
+) -> ItineraryResponse:
+    """Set the converted prices on the stops and add up the totals."""
+    for (stop, field, _, _), value in zip(prices, converted, strict=True):
+        if isinstance(value, float):
+            setattr(stop, field, value)
+        else:
+            stop.notes = "; ".join(filter(None, [stop.notes, value]))
+    flights = [stop.flight_price for stop in stops if stop.flight_price is not None]
+    hotels = [stop.hotel_price for stop in stops if stop.hotel_price is not None]
+    stays = sum(1 for stop in stops if stop.nights)
+    response = ItineraryResponse(
+        stops=stops,
+        currency=currency.upper(),
+        flights_total=round(sum(flights), 2) if flights else None,
+        hotels_total=round(sum(hotels), 2) if hotels else None,
+        total=round(sum(flights) + sum(hotels), 2) if flights or hotels else None,
+    )
+    if len(flights) + len(hotels) < len(stops) + stays:
+        response.message = (
+            f"Totals cover {len(flights)} of {len(stops)} flights and "
+            f"{len(hotels)} of {stays} hotels; see the stop notes"
+        )
+    return response
+
+
+def _log_timings(legs: int, timings: dict[str, float]) -> None:
+    """Log the duration of every stage of a plan."""
+    stages = ", ".join(f"{stage} {elapsed} ms" for stage, elapsed in timings.items())
+    logger.bind(timings=timings).info(f"Itinerary with {legs} legs: {stages}")
+
+
+def _prepare(
+    origin: str, legs: list[ItineraryLeg], adults: int, currency: str,
+) -> tuple[list[ItineraryLeg], dict[Key, _Lookup]]:
+    """Validate the legs and return them with the lookups to run.
+
+    Raises:
+        ValueError: If there are too many legs or a leg is invalid.
+
+    """
+    legs = [ItineraryLeg.model_validate(leg) for leg in legs]
+    if len(legs) > MAX_LEGS:
+        msg = f"{TOO_MANY_LEGS_ERROR} (at most {MAX_LEGS})"
+        raise ValueError(msg)
+    return legs, _lookups(origin, legs, adults, currency)
+
+
+def _plan_itinerary(
+    origin: str,
+    legs: list[ItineraryLeg],
+    adults: int = 1,
+    currency: str = "USD",
+) -> ItineraryResponse:
+    """Plan a trip with one or more stops: flights, hotels, weather and costs.
+
+    Use instead of separate flight, hotel and weather searches when the user
+    asks to plan a trip, e.g. "5 days: Mumbai to Paris to Rome". Every
+    lookup runs at once and the result lists, per stop, the cheapest flight,
+    the cheapest hotel for the stay and the weather, with totals converted
+    to the requested currency.
+
+    Args:
+        origin: City name or IATA code the trip starts from.
+        legs: The stops in order, each with destination (city name or IATA
+            code), date of the flight there ("YYYY-MM-DD") and nights spent
+            there (0 for the flight home).
+        adults: Number of travellers (default = 1).
+        currency: Currency of prices and totals (default = "USD").
+
+    Returns:
+        ItineraryResponse with one entry per stop and the totals.
+    Input format: `plan_itinerary(origin: str, legs: list[{destination: str,
+    date: str, nights: int}], adults: Optional[int], currency: Optional[str])`
+
+    """
+    logger.info(f"Planning itinerary from {origin} with {len(legs)} legs")
+    try:
+        legs, lookups = _prepare(origin, legs, adults, currency)
+    except ValueError as e:
+        error_msg = f"Invalid itinerary: {e!s}"
+        logger.error(error_msg)
+        return ItineraryResponse(error=error_msg)
+
+    timings: dict[str, float] = {}
+    with time_stage("plan_itinerary", "lookups", timings):
+        results = _run(lookups)
+    stops, prices = _assemble(origin, legs, lookups, results)
+    rates_store = timed_import("tools.currency").rates_store
+    with time_stage("plan_itinerary", "convert", timings):
+        try:
+            converted = rates_store.convert_many(
+                (amount, source, currency) for _, _, amount, source in prices
+            )
+        except LOOKUP_ERRORS as e:
+            converted = [f"conversion failed: {e!s}"] * len(prices)
+    _log_timings(len(legs), timings)
+    return _response(stops, prices, converted, currency)
+
+
+async def _aplan_itinerary(
+    origin: str,
+    legs: list[ItineraryLeg],
+    adults: int = 1,
+    currency: str = "USD",
+) -> ItineraryResponse:
+    """Async variant of ``plan_itinerary``."""
+    logger.info(f"Planning itinerary from {origin} with {len(legs)} legs (async)")
+    try:
+        legs, lookups = _prepare(origin, legs, adults, currency)
+    except ValueError as e:
+        error_msg = f"Invalid itinerary: {e!s}"
+        logger.error(error_msg)
+        return ItineraryResponse(error=error_msg)
+
+    timings: dict[str, float] = {}
+    with time_stage("plan_itinerary", "lookups", timings):
+        results = await _arun(lookups)
+    stops, prices = _assemble(origin, legs, lookups, results)
+    rates_store = timed_import("tools.currency").rates_store
+    with time_stage("plan_itinerary", "convert", timings):
+        try:
+            converted = await rates_store.aconvert_many(
+                (amount, source, currency) for _, _, amount, source in prices
+            )
+        except LOOKUP_ERRORS as e:
+            converted = [f"conversion failed: {e!s}"] * len(prices)
+    _log_timings(len(legs), timings)
+    return _response(stops, prices, converted, currency)
+
+
+plan_itinerary = StructuredTool.from_function(
+    func=_plan_itinerary, coroutine=_aplan_itinerary, name="plan_itinerary",
+)
@@ -0,0 +1,425 @@
+"""In-process metrics registry with Prometheus text exposition.
+
+A minimal, dependency-free set of counters, gauges and histograms shared by
+the FastAPI and BentoML backends (``/metrics``), the agent and the tools.
+Labelled children are created once and cached, and each child updates its
+value under its own lock, so recording a sample costs a dict lookup and a
+few additions.
+
+Metrics live in the process that records them: with several BentoML workers
+each worker reports its own values, and Prometheus should scrape (or sum)
+all of them.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, ClassVar
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from langchain_core.tools import BaseTool
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LABEL_COUNT_ERROR = "Wrong number of label values"
+
+# Latency buckets in seconds, from a cached answer to a slow agent run.
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)
+    )
+    return "{" + pairs + "}"
+
+
+class Registry:
+    """Holds the metrics of a process and renders them for scraping."""
+
+    def __init__(self) -> None:
+        """Create an empty registry."""
+        self._metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> None:
+        """Add a metric; its name must be unique in the registry."""
+        with self._lock:
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: list[str] = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    """Base class of metrics with an optional set of label names."""
+
+    kind: ClassVar[str]
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        registry: Registry = REGISTRY,
+    ) -> None:
+        """Create the metric and add it to ``registry``.
+
+        Args:
+            name (str): Metric name, e.g. ``assistant_requests_total``.
+            documentation (str): One-line description shown in ``# HELP``.
+            labelnames (tuple[str, ...]): Names of the labels of each sample.
+            registry (Registry): Registry the metric is rendered from.
+
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _new_child(self) -> Any:  # noqa: ANN401
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> Any:  # noqa: ANN401
+        """Return the child holding the value for these label values.
+
+        Raises:
+            ValueError: If the number of values does not match the labels.
+
+        """
+        # Children are keyed by the string values; convert before the lock-free
+        # lookup so non-string labels (status codes) hit it too.
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is not None:
+            return child
+        if len(key) != len(self.labelnames):
+            msg = f"{LABEL_COUNT_ERROR} for {self.name}: {values}"
+            raise ValueError(msg)
+        with self._lock:
+            return self._children.setdefault(key, self._new_child())
+
+    def _items(self) -> list[tuple[tuple[str, ...], Any]]:
+        with self._lock:
+            return sorted(self._children.items())
+
+    def samples(self) -> list[str]:
+        """Return the exposition lines of every labelled child."""
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} "
+            f"{_format_value(child.get())}"
+            for values, child in self._items()
+        ]
+
+
+class _Value:
+    """A float updated under a lock."""
+
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        """Increase the value by ``amount``."""
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        """Decrease the value by ``amount``."""
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float) -> None:
+        """Set the value."""
+        with self._lock:
+            self._value = value
+
+    def get(self) -> float:
+        """Return the current value."""
+        with self._lock:
+            return self._value
+
+    @contextmanager
+    def track_inprogress(self) -> Iterator[None]:
+        """Count the ``with`` block as in progress while it runs."""
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+
+class Counter(Metric):
+    """A value that only goes up, such as requests served or errors."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+
+class Gauge(Metric):
+    """A value that goes up and down, such as requests in flight."""
+
+    kind = "gauge"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+
+class _HistogramValue:
+    """Bucket counts, sum and count of observed values."""
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)  # Last slot is +Inf.
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of the ``with`` block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self) -> tuple[list[int], float]:
+        """Return the per-bucket counts and the sum."""
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class Histogram(Metric):
+    """Distribution of observed values, such as latencies, in buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        registry: Registry = REGISTRY,
+    ) -> None:
+        """Create the histogram; see ``Metric`` for the other arguments.
+
+        Args:
+            name (str): Metric name, e.g. ``assistant_request_duration_seconds``.
+            documentation (str): One-line description shown in ``# HELP``.
+            labelnames (tuple[str, ...]): Names of the labels of each sample.
+            buckets (tuple[float, ...]): Sorted upper bounds of the buckets.
+            registry (Registry): Registry the metric is rendered from.
+
+        """
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def samples(self) -> list[str]:
+        """Return cumulative bucket, sum and count lines of every child."""
+        lines = []
+        for values, child in self._items():
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts, strict=True):
+                cumulative += count
+                labels = _format_labels(
+                    (*self.labelnames, "le"), (*values, _format_value(bound)),
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+# Metrics of the assistant, shared by both backends.
+REQUEST_LATENCY = Histogram(
+    "assistant_request_duration_seconds",
+    "End-to-end latency of a query, by how it was answered.",
+    ("backend", "endpoint", "path"),
+)
+REQUESTS = Counter(
+    "assistant_requests_total",
+    "Queries handled, by outcome (ok, error, timeout, rejected).",
+    ("backend", "endpoint", "outcome"),
+)
+IN_FLIGHT = Gauge(
+    "assistant_requests_in_flight",
+    "Queries being processed.",
+    ("backend",),
+)
+LLM_LATENCY = Histogram(
+    "assistant_llm_duration_seconds",
+    "Latency of one chat model call of the agent.",
+)
+LLM_FIRST_TOKEN = Histogram(
+    "assistant_llm_first_token_seconds",
+    "Time from sending a chat model call to its first streamed token.",
+)
+TOOL_LATENCY = Histogram(
+    "assistant_tool_duration_seconds",
+    "Latency of one tool call.",
+    ("tool",),
+)
+TOOL_ERRORS = Counter(
+    "assistant_tool_errors_total",
+    "Tool calls that raised or returned an error.",
+    ("tool",),
+)
+UPSTREAM_LATENCY = Histogram(
+    "assistant_upstream_request_duration_seconds",
+    "Latency of upstream HTTP requests, by client profile and status code.",
+    ("profile", "status"),
+)
+CACHE_LOOKUPS = Counter(
+    "assistant_cache_lookups_total",
+    "Cache lookups, by cache and result (hit or miss).",
+    ("cache", "result"),
+)
+TOOL_RESULT_TOKENS = Counter(
+    "assistant_tool_result_tokens_total",
+    "Estimated tokens of tool results before (verbose) and after (compact) "
+    "compaction; counted in measurement mode only.",
+    ("tool", "form"),
+)
+COALESCED_CALLS = Counter(
+    "assistant_coalesced_calls_total",
+    "Tool calls that shared the result of an identical call already in flight.",
+    ("tool",),
+)
+UPSTREAM_REJECTIONS = Counter(
+    "assistant_upstream_rejections_total",
+    "Upstream requests rejected without being sent, by reason (open, rate).",
+    ("upstream", "reason"),
+)
+CIRCUIT_STATE = Gauge(
+    "assistant_upstream_circuit_state",
+    "Circuit breaker state of an upstream API (0 closed, 1 half-open, 2 open).",
+    ("upstream",),
+)
+TOOL_STAGE_LATENCY = Histogram(
+    "assistant_tool_stage_duration_seconds",
+    "Latency of one stage of a multi-stage tool (listing, enrichment, ...).",
+    ("tool", "stage"),
+)
+
+
+@contextmanager
+def time_stage(tool: str, stage: str, timings: dict[str, float]) -> Iterator[None]:
+    """Time a stage of ``tool``, recording it in ``timings`` (ms) and the histogram."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        timings[stage] = round(elapsed * 1000, 1)
+        TOOL_STAGE_LATENCY.labels(tool, stage).observe(elapsed)
+
+
+def record_cache_lookup(cache: str, *, hit: bool) -> None:
+    """Count one lookup of ``cache``."""
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def is_tool_error(result: Any) -> bool:  # noqa: ANN401
+    """Check whether a tool result reports a failure."""
+    if isinstance(result, dict):
+        return "error" in result
+    if isinstance(result, str):
+        return "error" in result[:80].lower()
+    return getattr(result, "error", None) is not None
+
+
+def instrument_tool(tool: BaseTool) -> BaseTool:
+    """Return a copy of ``tool`` that records its latency and errors."""
+    latency = TOOL_LATENCY.labels(tool.name)
+    errors = TOOL_ERRORS.labels(tool.name)
+    func = getattr(tool, "func", None)
+    coroutine = getattr(tool, "coroutine", None)
+    update: dict[str, Any] = {}
+
+    if func is not None:
+
+        def timed(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                latency.observe(time.perf_counter() - start)
+            if is_tool_error(result):
+                errors.inc()
+            return result
+
+        update["func"] = timed
+
+    if coroutine is not None:
+
+        async def atimed(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            start = time.perf_counter()
+            try:
+                result = await coroutine(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                latency.observe(time.perf_counter() - start)
+            if is_tool_error(result):
+                errors.inc()
+            return result
+
+        update["coroutine"] = atimed
+
+    return tool.model_copy(update=update) if update else tool
+
+
+def render() -> str:
+    """Return the metrics of this process in the Prometheus text format."""
+    return REGISTRY.render()
@@ -1,59 +1,37 @@
 """News search tool module."""
 
-import os
-
+import httpx
 import requests
-from dotenv import load_dotenv
-from langchain.tools import tool
+from langchain_core.tools import StructuredTool
 from loguru import logger
 
-from unified_logging.logging_setup import setup_logging
-
+from . import http_client
 from .pydantic_models import NewsArticle
+from .registry import load_config, require_env
+from .tracing import span
 
-# Initialize logging
-setup_logging()
 logger.info("News Search tool initializing")
 
-load_dotenv()
-API_KEY = os.getenv("NEWS_API_KEY")
+BASE_URL = load_config()["News"]["BASE_URL"]
 
 # Error messages
 INVALID_LOCATION_ERROR = "Location must be a non-empty string"
 INVALID_RESPONSE_ERROR = "Invalid API response: Missing or incorrect 'articles' field"
 
-@tool
-def get_news(location: str) -> list[NewsArticle]:
-    """Get the news about a location and its surrounding by inputting the location.
-
-    Use when the user asks for news related to a specific city, country, or region.
-
-    Args:
-        location (str): The location to fetch news for.
-
-    Returns:
-        list[NewsArticle]: A list of news articles.
-
-    """
-    logger.info(f"Received request to fetch news for location: '{location}'")
-
+def _news_url(location: str) -> str:
+    """Validate the location and build the News API URL."""
     if not isinstance(location, str) or not location.strip():
         logger.error("Invalid location provided. Must be a non-empty string.")
         raise ValueError(INVALID_LOCATION_ERROR)
 
-    url = f"https://newsapi.org/v2/everything?q={location}&from=today&sortBy=publishedAt&apiKey={API_KEY}"
+    (api_key,) = require_env("NEWS_API_KEY")
+    url = f"{BASE_URL}?q={location}&from=today&sortBy=publishedAt&apiKey={api_key}"
     logger.debug(f"Sending request to News API: {url}")
+    return url
 
-    try:
-        response = requests.get(url, timeout=300)
-        response.raise_for_status()
-        logger.info("News API request successful")
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to fetch data from News API: {e}")
-        raise
-
-    data = response.json()
 
+def _parse_articles(data: dict, location: str) -> list[NewsArticle]:
+    """Validate a News API payload and keep the first 5 articles."""
     if "articles" not in data or not isinstance(data["articles"], list):
         logger.error("Invalid API response: Missing or incorrect 'articles' field")
         raise ValueError(INVALID_RESPONSE_ERROR)
@@ -72,3 +50,52 @@ def get_news(location: str) -> list[NewsArticle]:
 
     logger.info(f"Returning {len(news_articles)} articles for location: '{location}'")
     return news_articles
+
+
+def _get_news(location: str) -> list[NewsArticle]:
+    """Get the news about a location and its surrounding by inputting the location.
+
+    Use when the user asks for news related to a specific city, country, or region.
+
+    Args:
+        location (str): The location to fetch news for.
+
+    Returns:
+        list[NewsArticle]: A list of news articles.
+
+    """
+    logger.info(f"Received request to fetch news for location: '{location}'")
+    url = _news_url(location)
+
+    try:
+        response = http_client.get("news", url)
+        response.raise_for_status()
+        logger.info("News API request successful")
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Failed to fetch data from News API: {e}")
+        raise
+
+    with span("parse", "get_news"):
+        return _parse_articles(response.json(), location)
+
+
+async def _aget_news(location: str) -> list[NewsArticle]:
+    """Async variant of ``get_news`` using the pooled async client."""
+    logger.info(f"Received async request to fetch news for location: '{location}'")
+    url = _news_url(location)
+
+    try:
+        response = await http_client.aget("news", url)
+        response.raise_for_status()
+        logger.info("News API request successful")
+    except httpx.HTTPError as e:
+        logger.error(f"Failed to fetch data from News API: {e}")
+        raise
+
+    with span("parse", "get_news"):
+        return _parse_articles(response.json(), location)
+
+
+get_news = StructuredTool.from_function(
+    func=_get_news, coroutine=_aget_news, name="get_news",
+)
@@ -1,8 +1,10 @@
 """Pydantic models for Travel and Finance Assistant tools."""
 
-from typing import Literal
+from typing import Any, Literal
 
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl, field_validator
+
+from .iata import resolve_airport, resolve_city
 
 
 # Pydantic Models
@@ -64,6 +66,22 @@ class FlightSearchRequest(BaseModel):
         max_length=3,
         description="Currency code for price display",
     )
+    max_results: int = Field(5, gt=0, le=250, description="Number of offers to return")
+    non_stop: bool = Field(default=False, description="Only return direct flights")
+    max_price: int | None = Field(
+        None,
+        gt=0,
+        description="Maximum price per traveler in the search currency",
+    )
+    travel_class: Literal["ECONOMY", "PREMIUM_ECONOMY", "BUSINESS", "FIRST"] | None = (
+        Field(None, description="Cabin class of every segment")
+    )
+
+    @field_validator("source", "destination", mode="before")
+    @classmethod
+    def _resolve_airport(cls, value: Any) -> Any:  # noqa: ANN401
+        """Resolve city and airport names to codes and reject unknown places."""
+        return resolve_airport(value) if isinstance(value, str) else value
 
 
 class FlightOption(BaseModel):
@@ -73,6 +91,7 @@ class FlightOption(BaseModel):
     departure_time: str
     arrival_time: str
     price: str
+    stops: int = 0
 
 
 class FlightSearchResponse(BaseModel):
@@ -95,6 +114,23 @@ class ConvertedAmount(BaseModel):
     final_amount: float
 
 
+class CurrencyConversion(BaseModel):
+    """A single amount to convert in a batch conversion."""
+
+    amount: float
+    from_currency: str = Field(..., min_length=3, max_length=3)
+    to_currency: str = Field(..., min_length=3, max_length=3)
+
+
+class BatchConvertedAmounts(BaseModel):
+    """Result of a batch currency conversion."""
+
+    amounts: list[float | None] = []
+    total: float | None = None
+    currency: str | None = None
+    errors: list[str] = []
+
+
 class HotelSearchRequest(BaseModel):
     """Request data for hotel search."""
 
@@ -110,6 +146,23 @@ class HotelSearchRequest(BaseModel):
     )
     amenities: str = Field(None, description="Comma-separated list of amenities")
     ratings: str = Field(None, description="Comma-separated list of minimum ratings")
+    check_in_date: str | None = Field(
+        None,
+        pattern=r"\d{4}-\d{2}-\d{2}",
+        description="Check-in date in 'YYYY-MM-DD' format (default: today)",
+    )
+    check_out_date: str | None = Field(
+        None,
+        pattern=r"\d{4}-\d{2}-\d{2}",
+        description="Check-out date in 'YYYY-MM-DD' format (default: next day)",
+    )
+    adults: int = Field(1, gt=0, description="Number of adult guests per room")
+
+    @field_validator("city_code", mode="before")
+    @classmethod
+    def _resolve_city(cls, value: Any) -> Any:  # noqa: ANN401
+        """Resolve city and airport names to city codes, rejecting unknown ones."""
+        return resolve_city(value) if isinstance(value, str) else value
 
 
 class HotelOption(BaseModel):
@@ -120,6 +173,10 @@ class HotelOption(BaseModel):
     address: str | None
     rating: str | None
     amenities: list[str]
+    price: str | None = None  # Cheapest offer for the stay, when fetched
+    room: str | None = None
+    available: bool | None = None
+    guest_rating: int | None = None  # Overall guest sentiment score, 0-100
 
 
 class HotelSearchResponse(BaseModel):
@@ -135,3 +192,44 @@ class NewsArticle(BaseModel):
 
     Title: str = Field(..., min_length=1)
     URL: HttpUrl
+
+
+class ItineraryLeg(BaseModel):
+    """One leg of a trip: the flight to a stop and the nights spent there."""
+
+    destination: str = Field(..., description="City name or IATA code of the stop")
+    date: str = Field(
+        ...,
+        pattern=r"\d{4}-\d{2}-\d{2}",
+        description="Date of the flight to the stop in 'YYYY-MM-DD' format",
+    )
+    nights: int = Field(
+        0, ge=0, le=30, description="Nights spent at the stop; 0 for the flight home",
+    )
+
+
+class ItineraryStop(BaseModel):
+    """One stop of a planned itinerary; prices are in the itinerary currency."""
+
+    origin: str
+    destination: str
+    date: str
+    nights: int
+    flight: str | None = None  # Cheapest offer found for the leg
+    flight_price: float | None = None
+    hotel: str | None = None  # Cheapest priced hotel for the stay
+    hotel_price: float | None = None
+    weather: str | None = None
+    notes: str | None = None  # Lookups of the stop that failed
+
+
+class ItineraryResponse(BaseModel):
+    """Response data for itinerary planning."""
+
+    stops: list[ItineraryStop] = []
+    currency: str | None = None
+    flights_total: float | None = None
+    hotels_total: float | None = None
+    total: float | None = None
+    message: str | None = None
+    error: str | None = None
@@ -0,0 +1,242 @@
+"""Exchange-rate table store for local currency conversion.
+
+The currency API serves one JSON file per base currency containing the rates
+to every other currency. ``RatesStore`` keeps each downloaded table for a
+refresh interval and answers conversions from memory, deriving cross rates
+(A to B through any cached base C) instead of downloading A's table again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from loguru import logger
+
+from tools import http_client
+from tools.pydantic_models import CurrencyData
+from tools.tracing import span
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+UNKNOWN_CURRENCY_ERROR = "Currency not available"
+INVALID_TABLE_ERROR = "Rates table missing from API response"
+
+
+class UnknownCurrencyError(ValueError):
+    """Raised when no rate is known for a currency pair."""
+
+
+class RatesStore:
+    """Thread-safe cache of exchange-rate tables keyed by base currency."""
+
+    def __init__(self, base_url: str, refresh_interval: float = 3600) -> None:
+        """Create an empty store.
+
+        Args:
+            base_url (str): URL prefix of the ``{base}.json`` rate tables.
+            refresh_interval (float): Seconds a downloaded table is used
+                before it is fetched again.
+
+        """
+        self.base_url = base_url
+        self.refresh_interval = refresh_interval
+        self._tables: dict[str, tuple[float, dict[str, float]]] = {}
+        self._lock = threading.Lock()
+        self._fetch_locks: dict[str, threading.Lock] = {}
+        self._downloads = 0
+        self._local_conversions = 0
+
+    def _fresh_tables(self) -> dict[str, dict[str, float]]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                base: rates
+                for base, (fetched_at, rates) in self._tables.items()
+                if now - fetched_at < self.refresh_interval
+            }
+
+    def table(self, base: str) -> dict[str, float]:
+        """Return the rate table of ``base``, downloading it when stale.
+
+        Args:
+            base (str): Lowercase 3 letter ISO base currency.
+
+        Returns:
+            dict[str, float]: Rates from ``base`` to every listed currency.
+
+        """
+        rates = self._fresh_tables().get(base)
+        if rates is not None:
+            return rates
+
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(base, threading.Lock())
+        with fetch_lock:
+            # Another thread may have downloaded it while we waited.
+            rates = self._fresh_tables().get(base)
+            if rates is not None:
+                return rates
+
+            url = f"{self.base_url}{base}.json"
+            logger.info(f"Downloading exchange-rate table for {base.upper()}")
+            response = http_client.get("currency", url)
+            with span("parse", "convert_currency"):
+                data = response.json()
+                if base not in data:
+                    raise ValueError(INVALID_TABLE_ERROR)
+                rates = CurrencyData(rates=data[base]).rates
+            with self._lock:
+                self._tables[base] = (time.monotonic(), rates)
+                self._downloads += 1
+            logger.success(f"Cached {len(rates)} rates for base {base.upper()}")
+            return rates
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        """Return the exchange rate from one currency to another.
+
+        Cached tables are tried first: the ``from`` table directly, the
+        ``to`` table inverted, then any other cached base as a cross rate.
+        Only when none of them can answer is the ``from`` table downloaded.
+
+        Args:
+            from_currency (str): Source currency code.
+            to_currency (str): Target currency code.
+
+        Returns:
+            float: Units of ``to_currency`` per unit of ``from_currency``.
+
+        Raises:
+            UnknownCurrencyError: If the pair cannot be resolved.
+
+        """
+        source = from_currency.lower()
+        target = to_currency.lower()
+        rate = self._cached_rate(source, target)
+        if rate is None:
+            rate = self.table(source).get(target)
+        return self._checked(source, target, rate)
+
+    async def arate(self, from_currency: str, to_currency: str) -> float:
+        """Async variant of ``rate``.
+
+        Cached lookups never leave the event loop; a table download runs in a
+        worker thread so it shares the per-base fetch lock with sync callers.
+        """
+        source = from_currency.lower()
+        target = to_currency.lower()
+        rate = self._cached_rate(source, target)
+        if rate is None:
+            rate = (await asyncio.to_thread(self.table, source)).get(target)
+        return self._checked(source, target, rate)
+
+    def _cached_rate(self, source: str, target: str) -> float | None:
+        if source == target:
+            return 1.0
+        return _rate_from_tables(self._fresh_tables(), source, target)
+
+    def _checked(self, source: str, target: str, rate: float | None) -> float:
+        if rate is None:
+            msg = f"{UNKNOWN_CURRENCY_ERROR}: {source.upper()}->{target.upper()}"
+            raise UnknownCurrencyError(msg)
+        with self._lock:
+            self._local_conversions += 1
+        return rate
+
+    def convert(self, amount: float, from_currency: str, to_currency: str) -> float:
+        """Convert ``amount`` and round the result to 2 decimals."""
+        return round(amount * self.rate(from_currency, to_currency), 2)
+
+    def convert_many(
+        self, conversions: Iterable[tuple[float, str, str]],
+    ) -> list[float | str]:
+        """Convert a batch of ``(amount, from, to)`` triples in one pass.
+
+        Each distinct currency pair is resolved once and its rate reused for
+        every amount of that pair.
+
+        Args:
+            conversions (Iterable[tuple[float, str, str]]): The triples.
+
+        Returns:
+            list[float | str]: Converted amounts in input order, or an error
+            message for pairs that could not be resolved.
+
+        """
+        items = _normalize(conversions)
+        rates: dict[tuple[str, str], float | str] = {}
+        for _, src, dst in items:
+            if (src, dst) not in rates:
+                try:
+                    rates[src, dst] = self.rate(src, dst)
+                except ValueError as e:
+                    rates[src, dst] = str(e)
+        return _apply_rates(items, rates)
+
+    async def aconvert(
+        self, amount: float, from_currency: str, to_currency: str,
+    ) -> float:
+        """Async variant of ``convert``."""
+        return round(amount * await self.arate(from_currency, to_currency), 2)
+
+    async def aconvert_many(
+        self, conversions: Iterable[tuple[float, str, str]],
+    ) -> list[float | str]:
+        """Async variant of ``convert_many``."""
+        items = _normalize(conversions)
+        rates: dict[tuple[str, str], float | str] = {}
+        for _, src, dst in items:
+            if (src, dst) not in rates:
+                try:
+                    rates[src, dst] = await self.arate(src, dst)
+                except ValueError as e:
+                    rates[src, dst] = str(e)
+        return _apply_rates(items, rates)
+
+    def stats(self) -> dict[str, int]:
+        """Return the number of downloads, cached tables and local conversions."""
+        with self._lock:
+            return {
+                "downloads": self._downloads,
+                "cached_tables": len(self._tables),
+                "local_conversions": self._local_conversions,
+            }
+
+
+def _rate_from_tables(
+    tables: dict[str, dict[str, float]], source: str, target: str,
+) -> float | None:
+    """Resolve a rate from already cached tables, or None if impossible."""
+    direct = tables.get(source, {}).get(target)
+    if direct is not None:
+        return direct
+    inverse = tables.get(target, {}).get(source)
+    if inverse:
+        return 1 / inverse
+    for rates in tables.values():
+        from_rate = rates.get(source)
+        to_rate = rates.get(target)
+        if from_rate and to_rate is not None:
+            return to_rate / from_rate
+    return None
+
+
+def _normalize(
+    conversions: Iterable[tuple[float, str, str]],
+) -> list[tuple[float, str, str]]:
+    return [(amount, src.lower(), dst.lower()) for amount, src, dst in conversions]
+
+
+def _apply_rates(
+    items: list[tuple[float, str, str]],
+    rates: dict[tuple[str, str], float | str],
+) -> list[float | str]:
+    """Multiply each amount by its resolved pair rate, keeping pair errors."""
+    results: list[float | str] = []
+    for amount, src, dst in items:
+        rate = rates[src, dst]
+        results.append(rate if isinstance(rate, str) else round(amount * rate, 2))
+    return results
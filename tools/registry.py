@@ -0,0 +1,173 @@
+"""Shared configuration and lazy tool registry.
+
+``config.yaml`` and ``.env`` are loaded once per process here instead of in
+every module that needs them. Tool modules are only imported when one of
+their tools is first requested, and each import is timed so the start-up cost
+of a worker can be reported per module.
+
+Set ``ASSISTANT_CONFIG`` to load a different config file (for example in
+benchmarks that point the tools at local stub servers).
+"""
+
+from __future__ import annotations
+
+import functools
+import importlib
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import yaml
+from dotenv import load_dotenv
+from loguru import logger
+
+from tools.metrics import instrument_tool
+from tools.singleflight import coalesce_tool
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from types import ModuleType
+
+    from langchain_core.tools import BaseTool
+
+CONFIG_PATH_ENV = "ASSISTANT_CONFIG"
+DEFAULT_CONFIG_PATH = Path(__file__).parent / "config.yaml"
+
+MISSING_ENV_ERROR = "Missing environment variables"
+UNKNOWN_TOOL_ERROR = "Unknown tool"
+
+# Module defining each tool, imported on first use.
+TOOL_MODULES: dict[str, str] = {
+    "get_weather": "tools.weather",
+    "search_flights": "tools.flights",
+    "search_hotels": "tools.hotels",
+    "convert_currency": "tools.currency",
+    "convert_currency_batch": "tools.currency",
+    "get_news": "tools.news",
+    "plan_itinerary": "tools.itinerary",
+}
+TOOL_NAMES = tuple(TOOL_MODULES)
+
+_tools: dict[str, BaseTool] = {}
+_import_times: dict[str, float] = {}
+_lock = threading.RLock()
+
+
+@functools.cache
+def load_config() -> dict[str, Any]:
+    """Return the parsed config file, reading it on the first call only."""
+    path = Path(os.getenv(CONFIG_PATH_ENV, str(DEFAULT_CONFIG_PATH)))
+    with path.open() as file:
+        return yaml.safe_load(file)
+
+
+def config_section(name: str) -> dict[str, Any]:
+    """Return one top-level section of the config, or an empty dict."""
+    return load_config().get(name) or {}
+
+
+@functools.cache
+def load_env() -> None:
+    """Load ``.env`` into the environment once per process."""
+    load_dotenv()
+
+
+def require_env(*names: str) -> tuple[str, ...]:
+    """Return the values of environment variables that must be set.
+
+    Args:
+        *names (str): Variable names.
+
+    Returns:
+        tuple[str, ...]: Their values, in order.
+
+    Raises:
+        ValueError: If any of them is missing or empty.
+
+    """
+    load_env()
+    values = tuple(os.getenv(name, "") for name in names)
+    missing = [name for name, value in zip(names, values, strict=True) if not value]
+    if missing:
+        msg = f"{MISSING_ENV_ERROR}: {', '.join(missing)}"
+        raise ValueError(msg)
+    return values
+
+
+def timed_import(module_name: str) -> ModuleType:
+    """Import a module and record how long the first import took."""
+    with _lock:
+        already_loaded = module_name in sys.modules
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        if not already_loaded:
+            _import_times.setdefault(module_name, time.perf_counter() - start)
+    return module
+
+
+def get_tool(name: str) -> BaseTool:
+    """Return a tool by name, importing its module on first use.
+
+    The tool records its latency and errors in ``tools.metrics``, and unless
+    ``SingleFlight.ENABLED`` is false, identical concurrent calls share one
+    upstream call (see ``tools.singleflight``).
+
+    Raises:
+        KeyError: If no tool of that name is registered.
+
+    """
+    tool = _tools.get(name)
+    if tool is not None:
+        return tool
+    if name not in TOOL_MODULES:
+        msg = f"{UNKNOWN_TOOL_ERROR}: {name}"
+        raise KeyError(msg)
+    with _lock:
+        if name not in _tools:
+            tool = getattr(timed_import(TOOL_MODULES[name]), name)
+            if config_section("SingleFlight").get("ENABLED", True):
+                tool = coalesce_tool(tool)
+            _tools[name] = instrument_tool(tool)
+        return _tools[name]
+
+
+def load_tools(names: Iterable[str] = TOOL_NAMES) -> list[BaseTool]:
+    """Return the named tools (all registered tools by default)."""
+    return [get_tool(name) for name in names]
+
+
+def import_report() -> dict[str, float]:
+    """Return the first-import time of each timed module in ms, slowest first.
+
+    The first module imported also pays for dependencies shared with the
+    others (LangChain, pydantic, the HTTP clients).
+    """
+    with _lock:
+        times = dict(_import_times)
+    return {
+        name: round(seconds * 1000, 1)
+        for name, seconds in sorted(times.items(), key=lambda item: -item[1])
+    }
+
+
+def log_import_report() -> None:
+    """Log the per-module import cost collected so far."""
+    report = import_report()
+    total = sum(report.values())
+    details = ", ".join(f"{name} {ms:.1f} ms" for name, ms in report.items())
+    logger.info(f"Tool modules imported in {total:.1f} ms: {details}")
+
+
+if __name__ == "__main__":
+    # Cold-start report: shared dependencies first, then every tool module.
+    for shared in (
+        "langchain_core.tools", "tools.pydantic_models", "tools.http_client",
+    ):
+        timed_import(shared)
+    load_tools()
+    for name, ms in import_report().items():
+        sys.stdout.write(f"{ms:8.1f} ms  {name}\n")
+    sys.stdout.write(f"{sum(import_report().values()):8.1f} ms  total\n")
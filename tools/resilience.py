@@ -0,0 +1,284 @@
+"""Per-upstream rate limiting and circuit breaking for the HTTP client layer.
+
+Amadeus, WeatherAPI, NewsAPI and the currency CDN each enforce a quota, and
+a burst of traffic used to make every tool call fail slowly instead. Every
+request sent through ``tools.http_client`` now first asks the guard of its
+upstream API for a ``Permit``:
+
+- Token bucket: each upstream refills ``RATE`` tokens per second up to
+  ``BURST``. A request waits for its token when one is due within
+  ``MAX_WAIT`` seconds and is rejected straight away otherwise.
+- Circuit breaker: ``FAILURE_THRESHOLD`` consecutive failures (transport
+  errors or a ``FAILURE_STATUSES`` status) open the circuit, and requests
+  are rejected for ``OPEN_SECONDS``. The circuit then turns half-open and
+  lets ``HALF_OPEN_PROBES`` trial requests through: a successful probe
+  closes it, a failed one opens it again.
+
+Rejections raise ``UpstreamUnavailableError``, which the tools already
+handle as a failed request, so they return their usual ``error`` field
+within microseconds rather than after the read timeout. Client profiles
+that share an upstream (``flights``, ``hotels`` and ``amadeus``) share its
+bucket and circuit.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Any
+
+import httpx
+import requests
+
+from tools.metrics import CIRCUIT_STATE, UPSTREAM_REJECTIONS
+from tools.registry import config_section
+
+_resilience_config = config_section("Resilience")
+
+ENABLED = bool(_resilience_config.get("ENABLED", True))
+FAILURE_STATUSES = frozenset(
+    _resilience_config.get("FAILURE_STATUSES", [429, 500, 502, 503, 504]),
+)
+PROFILES: dict[str, str] = dict(_resilience_config.get("PROFILES") or {})
+UPSTREAMS: dict[str, dict[str, Any]] = dict(_resilience_config.get("UPSTREAMS") or {})
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+# Rejection reason when the rate limiter has no token in time.
+RATE_LIMITED = "rate"
+OPEN_ERROR = (
+    "too many recent failures, retry in {seconds}s. "
+    "Do not call this tool again for now."
+)
+PROBING_ERROR = "recovering from failures, retry in a few seconds."
+RATE_ERROR = "rate limit reached, retry in a moment."
+# Values of the circuit state gauge.
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+_guards: dict[str, UpstreamGuard] = {}
+_guards_lock = threading.Lock()
+
+
+class UpstreamUnavailableError(
+    requests.exceptions.ConnectionError, httpx.TransportError,
+):
+    """An upstream request was rejected by its rate limiter or circuit breaker.
+
+    Subclasses both the ``requests`` and the ``httpx`` request errors, so the
+    sync and async paths of every tool treat it as a failed request.
+    """
+
+
+def _setting(upstream: str, name: str, default: float) -> float:
+    """Return a setting of ``upstream``, falling back to the section default."""
+    overrides = UPSTREAMS.get(upstream) or {}
+    return float(overrides.get(name, _resilience_config.get(name, default)))
+
+
+class TokenBucket:
+    """Token-bucket rate limiter that hands out reservations."""
+
+    def __init__(self, rate: float, burst: float) -> None:
+        """Create a full bucket.
+
+        Args:
+            rate (float): Tokens added per second.
+            burst (float): Most tokens the bucket holds.
+
+        """
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float) -> float | None:
+        """Take a token, possibly one that is not there yet.
+
+        Args:
+            max_wait (float): Longest acceptable wait for the token, in seconds.
+
+        Returns:
+            float | None: Seconds to wait before sending the request, or
+            ``None`` if no token is due within ``max_wait`` (nothing is taken).
+
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate,
+            )
+            self._updated = now
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+
+class UpstreamGuard:
+    """Rate limiter and circuit breaker of one upstream API."""
+
+    def __init__(self, name: str) -> None:
+        """Create a closed circuit and a full bucket from the config.
+
+        Args:
+            name (str): Name of the upstream, used in errors and metric labels.
+
+        """
+        self.name = name
+        self.bucket = TokenBucket(
+            _setting(name, "RATE", 10), _setting(name, "BURST", 10),
+        )
+        self.max_wait = _setting(name, "MAX_WAIT", 1.0)
+        self.failure_threshold = int(_setting(name, "FAILURE_THRESHOLD", 5))
+        self.open_seconds = _setting(name, "OPEN_SECONDS", 30)
+        self.half_open_probes = int(_setting(name, "HALF_OPEN_PROBES", 1))
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._state_metric = CIRCUIT_STATE.labels(name)
+        self._counts = {
+            "opened": 0, f"rejected_{OPEN}": 0, f"rejected_{RATE_LIMITED}": 0,
+        }
+        self._throttled_seconds = 0.0
+
+    def _set_state(self, state: str) -> None:
+        """Move the circuit to ``state``; must be called with the lock held."""
+        self._state = state
+        self._state_metric.set(STATE_VALUES[state])
+
+    def _reject(self, reason: str, message: str) -> UpstreamUnavailableError:
+        """Count a rejection; must be called with the lock held."""
+        self._counts[f"rejected_{reason}"] += 1
+        UPSTREAM_REJECTIONS.labels(self.name, reason).inc()
+        return UpstreamUnavailableError(f"{self.name} unavailable: {message}")
+
+    def acquire(self) -> Permit:
+        """Admit one request or reject it.
+
+        Returns:
+            Permit: The admission, with the wait imposed by the rate limiter.
+
+        Raises:
+            UpstreamUnavailableError: If the circuit is open, its probes are
+                all in flight, or no token is due within ``MAX_WAIT``.
+
+        """
+        with self._lock:
+            probe = False
+            if self._state == OPEN:
+                remaining = self._opened_at + self.open_seconds - time.monotonic()
+                if remaining > 0:
+                    msg = OPEN_ERROR.format(seconds=math.ceil(remaining))
+                    raise self._reject(OPEN, msg)
+                self._set_state(HALF_OPEN)
+            if self._state == HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    raise self._reject(OPEN, PROBING_ERROR)
+                self._probes += 1
+                probe = True
+            wait = self.bucket.reserve(self.max_wait)
+            if wait is None:
+                if probe:
+                    self._probes -= 1
+                raise self._reject(RATE_LIMITED, RATE_ERROR)
+            self._throttled_seconds += wait
+        return Permit(self, wait=wait, probe=probe)
+
+    def _finish(self, *, probe: bool, success: bool | None) -> None:
+        """Record the outcome of an admitted request (``None`` if abandoned)."""
+        with self._lock:
+            if probe:
+                self._probes -= 1
+            if success is None:
+                return
+            if success:
+                self._failures = 0
+                if probe:
+                    self._set_state(CLOSED)
+                return
+            self._failures += 1
+            reopen = probe and self._state == HALF_OPEN
+            if reopen or (
+                self._state == CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                self._counts["opened"] += 1
+                self._set_state(OPEN)
+
+    def stats(self) -> dict[str, Any]:
+        """Return the circuit state and the rejection counters."""
+        with self._lock:
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                **self._counts,
+                "throttled_seconds": round(self._throttled_seconds, 3),
+            }
+
+
+class Permit:
+    """Admission of one request; report its outcome exactly once."""
+
+    __slots__ = ("_done", "_guard", "probe", "wait")
+
+    def __init__(
+        self, guard: UpstreamGuard | None, *, wait: float, probe: bool,
+    ) -> None:
+        """Create the permit of a request admitted by ``guard``."""
+        self._guard = guard
+        self._done = False
+        self.wait = wait
+        self.probe = probe
+
+    def _finish(self, *, success: bool | None) -> None:
+        if self._done or self._guard is None:
+            return
+        self._done = True
+        self._guard._finish(probe=self.probe, success=success)  # noqa: SLF001
+
+    def succeeded(self, status: int) -> None:
+        """Report the response status; failure statuses count as failures."""
+        self._finish(success=status not in FAILURE_STATUSES)
+
+    def failed(self) -> None:
+        """Report a transport error (connection failure, timeout)."""
+        self._finish(success=False)
+
+    def abandon(self) -> None:
+        """Release the permit of a request that was cancelled before finishing."""
+        self._finish(success=None)
+
+
+def upstream_of(profile: str) -> str:
+    """Return the upstream API a client profile talks to."""
+    return PROFILES.get(profile, profile)
+
+
+def get_guard(profile: str) -> UpstreamGuard:
+    """Return the guard of the upstream of ``profile``, creating it on first use."""
+    name = upstream_of(profile)
+    with _guards_lock:
+        guard = _guards.get(name)
+        if guard is None:
+            guard = _guards[name] = UpstreamGuard(name)
+        return guard
+
+
+def acquire(profile: str) -> Permit:
+    """Admit a request of ``profile``; see ``UpstreamGuard.acquire``."""
+    if not ENABLED:
+        return Permit(None, wait=0.0, probe=False)
+    return get_guard(profile).acquire()
+
+
+def stats() -> dict[str, dict[str, Any]]:
+    """Return the state and counters of every upstream used so far."""
+    with _guards_lock:
+        guards = dict(_guards)
+    return {name: guard.stats() for name, guard in guards.items()}
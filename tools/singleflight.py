@@ -0,0 +1,231 @@
+"""Request coalescing ("single flight") for identical in-flight tool calls.
+
+When several requests call the same tool with the same arguments at the
+same time (everyone asking about the weather in the city of a popular
+event), only the first call reaches the upstream API; the others wait for
+it and share its result, or its exception. Nothing is cached: once the call
+finishes, the next identical call goes upstream again.
+
+Arguments are normalized before comparison (defaults applied, strings
+trimmed and case-folded, models dumped), so ``get_weather("Paris")`` and
+``get_weather(city=" paris ", days=1)`` share one call. Thread callers and
+asyncio callers are coalesced separately, the latter per event loop.
+
+Callers of one coalesced call receive the same result object and must not
+modify it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import json
+import threading
+from typing import TYPE_CHECKING, Any
+
+from pydantic import BaseModel
+
+from tools.metrics import COALESCED_CALLS
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from langchain_core.tools import BaseTool
+
+_groups: dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+class _Call:
+    """A call in flight and, once it finishes, its outcome."""
+
+    __slots__ = ("done", "error", "result")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Deduplicates identical concurrent calls by key."""
+
+    def __init__(self, name: str) -> None:
+        """Create an empty group.
+
+        Args:
+            name (str): Name of the group, used as the metric label.
+
+        """
+        self.name = name
+        self._calls: dict[str, _Call] = {}
+        self._tasks: dict[tuple[int, str], asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._coalesced_metric = COALESCED_CALLS.labels(name)
+        self._leaders = 0
+        self._coalesced = 0
+
+    def _count(self, *, leader: bool) -> None:
+        """Count a call; must be called with the lock held."""
+        if leader:
+            self._leaders += 1
+        else:
+            self._coalesced += 1
+            self._coalesced_metric.inc()
+
+    def do(self, key: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        """Run ``fn`` unless an identical call is in flight, then share its outcome.
+
+        Args:
+            key (str): Identity of the call.
+            fn (Callable[..., Any]): The function to run.
+            *args (Any): Its positional arguments.
+            **kwargs (Any): Its keyword arguments.
+
+        Returns:
+            Any: The result of the call that ran.
+
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self._count(leader=leader)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def ado(
+        self,
+        key: str,
+        fn: Callable[..., Awaitable[Any]],
+        *args: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Any:  # noqa: ANN401
+        """Async variant of ``do`` for callers on the same event loop.
+
+        The call runs as its own task, so a caller that is cancelled stops
+        waiting without cancelling the call for the others.
+        """
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+        with self._lock:
+            task = self._tasks.get(task_key)
+            leader = task is None
+            if leader:
+                task = loop.create_task(fn(*args, **kwargs))
+                self._tasks[task_key] = task
+                task.add_done_callback(functools.partial(self._finished, task_key))
+            self._count(leader=leader)
+        return await asyncio.shield(task)
+
+    def _finished(self, task_key: tuple[int, str], task: asyncio.Task) -> None:
+        """Forget a finished task and mark its exception as retrieved."""
+        with self._lock:
+            self._tasks.pop(task_key, None)
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict[str, int]:
+        """Return the calls run, the calls coalesced and the calls in flight."""
+        with self._lock:
+            return {
+                "leaders": self._leaders,
+                "coalesced": self._coalesced,
+                "in_flight": len(self._calls) + len(self._tasks),
+            }
+
+
+def get_group(name: str) -> SingleFlight:
+    """Return the group of ``name``, creating it on first use."""
+    with _groups_lock:
+        group = _groups.get(name)
+        if group is None:
+            group = _groups[name] = SingleFlight(name)
+        return group
+
+
+def stats() -> dict[str, dict[str, int]]:
+    """Return the counters of every group."""
+    with _groups_lock:
+        groups = dict(_groups)
+    return {name: group.stats() for name, group in groups.items()}
+
+
+def _normalize(value: Any) -> Any:  # noqa: ANN401
+    """Return a JSON-ready form of ``value`` that ignores spacing and case."""
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, BaseModel):
+        return _normalize(value.model_dump())
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, list | tuple):
+        return [_normalize(item) for item in value]
+    return value
+
+
+def call_key(
+    signature: inspect.Signature | None, args: tuple, kwargs: dict[str, Any],
+) -> str:
+    """Return the identity of a call from its normalized arguments."""
+    if signature is not None:
+        try:
+            bound = signature.bind(*args, **kwargs)
+        except TypeError:
+            pass
+        else:
+            bound.apply_defaults()
+            args, kwargs = (), bound.arguments
+    return json.dumps(
+        [_normalize(list(args)), _normalize(kwargs)], sort_keys=True, default=str,
+    )
+
+
+def _signature(fn: Callable[..., Any] | None) -> inspect.Signature | None:
+    try:
+        return inspect.signature(fn) if fn is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def coalesce_tool(tool: BaseTool) -> BaseTool:
+    """Return a copy of ``tool`` whose identical concurrent calls are coalesced."""
+    group = get_group(tool.name)
+    func = getattr(tool, "func", None)
+    coroutine = getattr(tool, "coroutine", None)
+    update: dict[str, Any] = {}
+
+    if func is not None:
+        signature = _signature(func)
+
+        def shared(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            key = call_key(signature, args, kwargs)
+            return group.do(key, func, *args, **kwargs)
+
+        update["func"] = shared
+
+    if coroutine is not None:
+        asignature = _signature(coroutine)
+
+        async def ashared(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            key = call_key(asignature, args, kwargs)
+            return await group.ado(key, coroutine, *args, **kwargs)
+
+        update["coroutine"] = ashared
+
+    return tool.model_copy(update=update) if update else tool
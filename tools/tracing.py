@@ -0,0 +1,169 @@
+"""Per-request latency tracing.
+
+A trace is opened for every query with ``trace_request`` and carried in a
+context variable, so everything that runs on behalf of the request (agent
+callbacks, tools in worker threads, HTTP calls) can add spans to it without
+passing it around. Spans are emitted through the unified logging pipeline as
+structured records (``logger.bind``), and a per-request summary is logged
+when the trace ends.
+
+Only a configurable fraction of requests is sampled; for the others the
+request id is still propagated but no span is recorded.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
+
+from tools.registry import config_section
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+_tracing_config = config_section("Tracing")
+ENABLED = bool(_tracing_config.get("ENABLED", True))
+SAMPLE_RATE = float(_tracing_config.get("SAMPLE_RATE", 1.0))
+
+_current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+
+
+class Trace:
+    """Spans recorded for one request."""
+
+    def __init__(self, request_id: str, *, sampled: bool) -> None:
+        """Start a trace.
+
+        Args:
+            request_id (str): Id of the request, attached to every span.
+            sampled (bool): Whether spans are recorded.
+
+        """
+        self.request_id = request_id
+        self.sampled = sampled
+        self.started = time.perf_counter()
+        self.path = "agent"
+        self.spans: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add_span(self, kind: str, name: str, duration: float, **attrs: Any) -> None:  # noqa: ANN401
+        """Record a finished span and emit it as a structured log record.
+
+        Args:
+            kind (str): ``llm``, ``tool``, ``http`` or ``parse``.
+            name (str): Model, tool or client profile name.
+            duration (float): Span duration in seconds.
+            **attrs: Extra span attributes (token counts, status, ...).
+
+        """
+        if not self.sampled:
+            return
+        span = {"kind": kind, "name": name, "duration_ms": round(duration * 1000, 2)}
+        span.update(attrs)
+        with self._lock:
+            self.spans.append(span)
+        logger.bind(request_id=self.request_id, span=span).debug(
+            f"span {kind}:{name} {span['duration_ms']} ms",
+        )
+
+    def summary(self) -> dict[str, Any]:
+        """Aggregate the spans into per-kind totals for the request."""
+        with self._lock:
+            spans = list(self.spans)
+        totals: dict[str, Any] = {
+            "request_id": self.request_id,
+            "path": self.path,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+        }
+        for kind in ("llm", "tool", "http", "parse"):
+            of_kind = [span for span in spans if span["kind"] == kind]
+            totals[f"{kind}_calls"] = len(of_kind)
+            totals[f"{kind}_ms"] = round(sum(s["duration_ms"] for s in of_kind), 2)
+        llm_spans = [span for span in spans if span["kind"] == "llm"]
+        totals["prompt_tokens"] = sum(s.get("prompt_tokens") or 0 for s in llm_spans)
+        totals["completion_tokens"] = sum(
+            s.get("completion_tokens") or 0 for s in llm_spans
+        )
+        if llm_spans:
+            totals["first_token_ms"] = llm_spans[0].get("first_token_ms")
+        return totals
+
+
+def current_trace() -> Trace | None:
+    """Return the trace of the request being served, if any."""
+    return _current_trace.get()
+
+
+def current_request_id() -> str | None:
+    """Return the id of the request being served, if any."""
+    trace = _current_trace.get()
+    return trace.request_id if trace is not None else None
+
+
+def set_path(path: str) -> None:
+    """Record how the request was answered (``cache``, ``fast_path``, ``agent``)."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.path = path
+
+
+@contextmanager
+def trace_request(request_id: str | None = None) -> Iterator[Trace]:
+    """Trace the request served inside the ``with`` block.
+
+    Works in both sync and async code; the trace follows the request into
+    worker threads started with a copied context.
+
+    Args:
+        request_id (str | None): Id to use; a new one is generated if None.
+
+    Yields:
+        Trace: The request's trace.
+
+    """
+    trace = Trace(
+        request_id or uuid.uuid4().hex,
+        sampled=ENABLED and random.random() < SAMPLE_RATE,  # noqa: S311
+    )
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        if trace.sampled:
+            summary = trace.summary()
+            logger.bind(request_id=trace.request_id, trace=summary).info(
+                f"Request {trace.request_id} ({summary['path']}): "
+                f"{summary['total_ms']} ms total, "
+                f"llm {summary['llm_ms']} ms in {summary['llm_calls']} calls, "
+                f"tools {summary['tool_ms']} ms, http {summary['http_ms']} ms, "
+                f"parse {summary['parse_ms']} ms",
+            )
+
+
+def record(kind: str, name: str, duration: float, **attrs: Any) -> None:  # noqa: ANN401
+    """Add a span measured by the caller to the current trace, if any."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_span(kind, name, duration, **attrs)
+
+
+@contextmanager
+def span(kind: str, name: str, **attrs: Any) -> Iterator[None]:  # noqa: ANN401
+    """Time the ``with`` block as a span of the current trace, if sampled."""
+    trace = _current_trace.get()
+    if trace is None or not trace.sampled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_span(kind, name, time.perf_counter() - start, **attrs)
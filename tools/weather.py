@@ -1,53 +1,177 @@
 """Weather forecast tool module."""
 
-import os
-from pathlib import Path
-
+import httpx
 import requests
-import yaml
-from dotenv import load_dotenv
-from langchain.tools import tool
+from langchain_core.tools import StructuredTool
 from loguru import logger
 from pydantic import ValidationError
 
-from unified_logging.logging_setup import setup_logging
-
+from . import http_client
+from .cache import build_cache
+from .metrics import record_cache_lookup
 from .pydantic_models import WeatherForecast
+from .registry import load_config, require_env
+from .tracing import span
 
-# Initialize logging
-setup_logging()
 logger.info("Weather forecast tool initializing")
 
-# Load environment variables
-MISSING_API_KEY_ERROR = "Missing WEATHER_API_KEY in environment variables"
-
-def _check_api_key() -> None:
-    """Check if the weather API key is available in environment variables."""
-    api_key = os.getenv("WEATHER_API_KEY")
-    if not api_key:
-        raise ValueError(MISSING_API_KEY_ERROR)
-
-try:
-    load_dotenv()
-    _check_api_key()
-    logger.success("Successfully loaded weather API credentials")
-except ValueError as e:
-    logger.error(f"Failed to load environment variables: {e}")
-    raise
-
-# Load configuration
+# Load configuration (read once per process; credentials are checked on use)
 try:
-    config_path = Path(__file__).parent / "config.yaml"
-    with config_path.open() as file:
-        config = yaml.safe_load(file)
+    config = load_config()
     BASE_URL = config["Weather"]["BASE_URL"]
+    CACHE_FETCH_DAYS = int(config["Weather"].get("CACHE_FETCH_DAYS", 1))
+    weather_cache = build_cache(
+        backend=config["Weather"].get("CACHE_BACKEND", "memory"),
+        max_entries=int(config["Weather"].get("CACHE_MAX_ENTRIES", 512)),
+        ttl=float(config["Weather"].get("CACHE_TTL", 1800)),
+        path=config["Weather"].get("CACHE_PATH"),
+    )
     logger.success("Successfully loaded weather configuration")
 except ValueError as e:
     logger.error(f"Failed to load configuration: {e}")
     raise
 
-@tool
-def get_weather(city: str, days: int = 1) -> list[str] | str:
+
+def normalize_city(city: str) -> str:
+    """Normalize a city name into a cache key.
+
+    Case, surrounding punctuation and repeated whitespace are ignored, so
+    "  new york," and "New York" share one entry.
+
+    Args:
+        city (str): The city as given by the caller.
+
+    Returns:
+        str: The normalized city key.
+
+    """
+    return " ".join(city.strip(" \t\n.,;:!?").lower().split())
+
+
+def cache_stats() -> dict[str, int]:
+    """Return hit, miss and eviction counters of the weather cache."""
+    return weather_cache.stats()
+
+
+def _cached_forecast(city: str, days: int) -> WeatherForecast | None:
+    """Return the forecast from the cache if it covers ``days``."""
+    cached = weather_cache.get(normalize_city(city))
+    if cached is None or cached["days"] < days:
+        record_cache_lookup("weather", hit=False)
+        return None
+    record_cache_lookup("weather", hit=True)
+    # A longer cached forecast serves any shorter window.
+    logger.info(f"Serving {days}-day forecast for {city} from cache")
+    return WeatherForecast(forecastday=cached["forecastday"][:days])
+
+
+def _forecast_request(city: str, days: int) -> tuple[str, dict]:
+    """Build the forecast endpoint and query parameters."""
+    (api_key,) = require_env("WEATHER_API_KEY")
+    endpoint = f"{BASE_URL}/forecast.json"
+    params = {
+        "key": api_key,
+        "q": city,
+        "days": max(days, CACHE_FETCH_DAYS),
+    }
+    logger.debug(f"Constructed API URL: {endpoint}")
+    logger.debug("Request params: {**params, 'key': '***'}")  # Hide API key
+    return endpoint, params
+
+
+def _process_response(city: str, days: int, data: dict) -> WeatherForecast | str:
+    """Validate and cache an API response.
+
+    Returns:
+        WeatherForecast | str: The forecast for ``days`` days, or an error
+        message.
+
+    """
+    # Handle API errors
+    if "error" in data:
+        error_msg = f"API error: {data['error']['message']}"
+        logger.error(error_msg)
+        return error_msg
+
+    logger.info("Successfully received weather data")
+
+    # Validate API response with Pydantic model
+    try:
+        fetched = WeatherForecast(forecastday=data["forecast"]["forecastday"])
+        logger.debug("Successfully validated weather data")
+    except ValidationError as e:
+        error_msg = f"Data validation error: {e}"
+        logger.error(error_msg)
+        return error_msg
+
+    weather_cache.set(normalize_city(city), {
+        "days": len(fetched.forecastday),
+        "forecastday": [day.model_dump() for day in fetched.forecastday],
+    })
+    return WeatherForecast(forecastday=fetched.forecastday[:days])
+
+
+def fetch_forecast(city: str, days: int) -> WeatherForecast | str:
+    """Return the forecast of ``city`` from the cache or the weather API.
+
+    Args:
+        city (str): The name of the city.
+        days (int): Number of days from today (1-14).
+
+    Returns:
+        WeatherForecast | str: The forecast, or the API's error message.
+
+    Raises:
+        requests.exceptions.RequestException: If the request fails.
+        ValueError: If the response is not JSON.
+
+    """
+    forecast_data = _cached_forecast(city, days)
+    if forecast_data is None:
+        endpoint, params = _forecast_request(city, days)
+
+        # Make API request
+        logger.info("Making request to weather API")
+        response = http_client.get("weather", endpoint, params=params)
+        logger.debug(f"Received status code: {response.status_code}")
+
+        with span("parse", "get_weather"):
+            forecast_data = _process_response(city, days, response.json())
+    return forecast_data
+
+
+async def afetch_forecast(city: str, days: int) -> WeatherForecast | str:
+    """Async variant of ``fetch_forecast`` using the pooled async client."""
+    forecast_data = _cached_forecast(city, days)
+    if forecast_data is None:
+        endpoint, params = _forecast_request(city, days)
+
+        logger.info("Making async request to weather API")
+        response = await http_client.aget("weather", endpoint, params=params)
+        logger.debug(f"Received status code: {response.status_code}")
+
+        with span("parse", "get_weather"):
+            forecast_data = _process_response(city, days, response.json())
+    return forecast_data
+
+
+def _format_forecast(city: str, forecast_data: WeatherForecast) -> str:
+    """Render a forecast as the summary returned to the agent."""
+    forecast_summary = f"📍 Weather forecast for {city}:\n\n"
+    for day in forecast_data.forecastday:
+        forecast_summary += (
+            f"📅 Date: {day.date}\n"
+            f"🌤 Weather: {day.day.condition.text}\n"
+            f"🌡️ Temperature: {day.day.mintemp_c}°C - {day.day.maxtemp_c}°C\n"
+            f"💨 Wind Speed: {day.day.maxwind_kph} Kph\n"
+            f"💧 Humidity: {day.day.avghumidity}%\n"
+            f"🌧️ Rain Probability: {day.day.daily_chance_of_rain}%\n"
+            f"❄️ Snow Probability: {day.day.daily_chance_of_snow}%\n\n"
+        )
+    return forecast_summary
+
+
+def _get_weather(city: str, days: int = 1) -> list[str] | str:
     """Fetch the weather forecast for a given city and future dates.
 
     Use when the user asks about the weather for a city or location.
@@ -64,50 +188,36 @@ def get_weather(city: str, days: int = 1) -> list[str] | str:
 
     # Use forecast endpoint for future weather
     try:
-        endpoint = f"{BASE_URL}/forecast.json"
-        params = {"key": os.getenv("WEATHER_API_KEY"), "q": city, "days": days}
-        logger.debug(f"Constructed API URL: {endpoint}")
-        logger.debug("Request params: {**params, 'key': '***'}")  # Hide API key
+        forecast_data = fetch_forecast(city, days)
+        if isinstance(forecast_data, str):
+            return forecast_data
+
+        forecast_summary = _format_forecast(city, forecast_data)
+        logger.success(f"Successfully generated {days}-day forecast for {city}")
+    except requests.exceptions.RequestException as e:
+        error_msg = f"API request failed: {e!s}"
+        logger.error(error_msg)
+        return error_msg
+    except ValueError as e:
+        error_msg = f"Unexpected error: {e!s}"
+        logger.critical(error_msg)
+        return error_msg
+    else:
+        return forecast_summary
 
-        # Make API request
-        logger.info("Making request to weather API")
-        response = requests.get(endpoint, params=params, timeout=300)
-        logger.debug(f"Received status code: {response.status_code}")
 
-        data = response.json()
-
-        # Handle API errors
-        if "error" in data:
-            error_msg = f"API error: {data['error']['message']}"
-            logger.error(error_msg)
-            return error_msg
-
-        logger.info("Successfully received weather data")
-
-        # Validate API response with Pydantic model
-        try:
-            forecast_data = WeatherForecast(forecastday=data["forecast"]["forecastday"])
-            logger.debug("Successfully validated weather data")
-        except ValidationError as e:
-            error_msg = f"Data validation error: {e}"
-            logger.error(error_msg)
-            return error_msg
-
-        # Create a list of dictionaries with validated data
-        forecast_summary = f"📍 Weather forecast for {city}:\n\n"
-        for day in forecast_data.forecastday:
-            forecast_summary += (
-                f"📅 Date: {day.date}\n"
-                f"🌤 Weather: {day.day.condition.text}\n"
-                f"🌡️ Temperature: {day.day.mintemp_c}°C - {day.day.maxtemp_c}°C\n"
-                f"💨 Wind Speed: {day.day.maxwind_kph} Kph\n"
-                f"💧 Humidity: {day.day.avghumidity}%\n"
-                f"🌧️ Rain Probability: {day.day.daily_chance_of_rain}%\n"
-                f"❄️ Snow Probability: {day.day.daily_chance_of_snow}%\n\n"
-            )
+async def _aget_weather(city: str, days: int = 1) -> list[str] | str:
+    """Async variant of ``get_weather`` using the pooled async client."""
+    logger.info(f"Starting async weather forecast for {city} (days: {days})")
 
+    try:
+        forecast_data = await afetch_forecast(city, days)
+        if isinstance(forecast_data, str):
+            return forecast_data
+
+        forecast_summary = _format_forecast(city, forecast_data)
         logger.success(f"Successfully generated {days}-day forecast for {city}")
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         error_msg = f"API request failed: {e!s}"
         logger.error(error_msg)
         return error_msg
@@ -117,3 +227,8 @@ def get_weather(city: str, days: int = 1) -> list[str] | str:
         return error_msg
     else:
         return forecast_summary
+
+
+get_weather = StructuredTool.from_function(
+    func=_get_weather, coroutine=_aget_weather, name="get_weather",
+)
@@ -31,11 +31,27 @@ class LoggingConfigs(BaseModel):
     Attributes:
         min_log_level: Minimum log level.
         log_server_port: Port for the logging server.
-        server_log_format: Log format for server logs.
-        client_log_format: Log format for client logs.
+        server_log_format: Line format of the human-readable log file.
+        client_log_format: Unused; clients send structured records and the
+            server formats them.
         log_rotation: Log rotation time.
-        log_file_name: File name for the log file.
+        log_file_name: File name for the human-readable log file.
+        log_json_file_name: File name for the NDJSON log file.
+        log_text_sink: Whether the human-readable log file is written.
         log_compression: Log file compression type.
+        client_queue_size: Records a client buffers before dropping.
+        client_batch_size: Records sent per multipart message.
+        client_flush_interval: Seconds before a partial batch is sent.
+        client_sndhwm: ZMQ send high-water mark of a client, in batches.
+        client_drop_policy: Which records a full client queue discards.
+        server_batch_size: Records the server drains per poll.
+        server_poll_timeout_ms: Poll timeout of the server's receive loop.
+        server_buffer_size: Bytes a log writer buffers before writing.
+        server_flush_interval: Seconds before a log writer flushes.
+        server_writer_shards: Number of writer threads, one file each.
+        server_queue_size: Batches queued per writer before dropping.
+        server_rcvhwm: ZMQ receive high-water mark of the server.
+        server_report_interval: Seconds between ingest statistics reports.
 
     """
 
@@ -44,11 +60,28 @@ class LoggingConfigs(BaseModel):
         "TRACE", "DEBUG", "INFO", "SUCCESS", "WARNING", "ERROR", "CRITICAL",
     ] = "DEBUG"
     log_server_port: int = 9999
-    server_log_format: str = "[{level}] | {message}"
+    server_log_format: str = (
+        "{time} | {level} | {file}:{function}:{line} | {message}"
+    )
     client_log_format: str = "{time:YYYY-MM-DD HH:mm:ss} | {file}: {line} | {message}"
     log_rotation: str = "00:00"
     log_file_name: str = "logs/logs.txt"
+    log_json_file_name: str = "logs/logs.ndjson"
+    log_text_sink: bool = True
     log_compression: str = "zip"
+    client_queue_size: int = 10000
+    client_batch_size: int = 100
+    client_flush_interval: float = 0.05
+    client_sndhwm: int = 1000
+    client_drop_policy: Literal["drop_new", "drop_oldest"] = "drop_new"
+    server_batch_size: int = 1000
+    server_poll_timeout_ms: int = 100
+    server_buffer_size: int = 1 << 20
+    server_flush_interval: float = 0.5
+    server_writer_shards: int = 1
+    server_queue_size: int = 1000
+    server_rcvhwm: int = 100000
+    server_report_interval: float = 10
 
     @staticmethod
     def load_from_path(file_path: str) -> "LoggingConfigs":
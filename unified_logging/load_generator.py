@@ -0,0 +1,115 @@
+"""Load generator for the logging server.
+
+Pushes log records through the regular logging client at a fixed rate for a
+while, then counts how many of them reached the log file(s). Run it against a
+running logging server with increasing ``--rate`` values to find the maximum
+sustainable throughput: the highest rate at which the achieved send rate
+keeps up with the target and nothing is lost.
+
+Example:
+    python -m unified_logging.load_generator --rate 20000 --duration 10
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from loguru import logger
+
+from unified_logging.config_types import LoggingConfigs
+from unified_logging.logging_client import setup_network_logger_client
+from unified_logging.logging_setup import DEFAULT_CONFIG_PATH, PROJECT_ROOT
+
+# Records sent per pacing step; keeps the clock checks cheap at high rates.
+CHUNK = 100
+
+
+def _log_files(logging_configs: LoggingConfigs) -> list[Path]:
+    """Return the current NDJSON log file and its writer shards."""
+    base = Path(logging_configs.log_json_file_name)
+    if not base.is_absolute():
+        base = PROJECT_ROOT / base
+    return [base, *base.parent.glob(f"{base.stem}.[0-9]*{base.suffix}")]
+
+
+def _count_delivered(logging_configs: LoggingConfigs, run_id: str) -> int:
+    count = 0
+    for path in _log_files(logging_configs):
+        if path.exists():
+            with path.open(encoding="utf8", errors="replace") as file:
+                count += sum(run_id in line for line in file)
+    return count
+
+
+def run(
+    logging_configs: LoggingConfigs, rate: float, duration: float, settle: float,
+) -> dict[str, float]:
+    """Send ``rate`` records per second for ``duration`` seconds.
+
+    Args:
+        logging_configs (LoggingConfigs): Client and server settings.
+        rate (float): Target records per second.
+        duration (float): Seconds to send for.
+        settle (float): Seconds to wait for the server to flush afterwards.
+
+    Returns:
+        dict[str, float]: Target and achieved rates, client counters and the
+        number of records found in the log files.
+
+    """
+    client = setup_network_logger_client(logging_configs, logger)
+    run_id = uuid.uuid4().hex[:12]
+    # Let the PUB socket connect before the measurement starts.
+    logger.info(f"loadgen {run_id} warm-up")
+    time.sleep(0.5)
+
+    total = int(rate * duration)
+    start = time.perf_counter()
+    sent = 0
+    while sent < total:
+        for _ in range(min(CHUNK, total - sent)):
+            logger.info(f"loadgen {run_id} {sent}")
+            sent += 1
+        # Sleep until the next chunk is due.
+        delay = start + sent / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    elapsed = time.perf_counter() - start
+
+    time.sleep(settle)
+    client_stats = client.stats()
+    delivered = _count_delivered(logging_configs, run_id) - 1  # minus warm-up
+    return {
+        "target_rate": rate,
+        "achieved_rate": round(total / elapsed, 1),
+        "records": total,
+        "client_dropped": client_stats["dropped"],
+        "delivered": delivered,
+        "lost_pct": round(100 * (total - delivered) / total, 3) if total else 0.0,
+    }
+
+
+def main() -> None:
+    """Parse arguments, run the load and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=10000, help="records/s")
+    parser.add_argument("--duration", type=float, default=10, help="seconds")
+    parser.add_argument(
+        "--settle", type=float, default=3, help="seconds to wait for the server",
+    )
+    parser.add_argument("--config_file_path", default=str(DEFAULT_CONFIG_PATH))
+    args = parser.parse_args()
+
+    logging_configs = LoggingConfigs.load_from_path(args.config_file_path)
+    results = run(logging_configs, args.rate, args.duration, args.settle)
+    sys.stdout.write(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
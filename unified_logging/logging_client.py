@@ -2,41 +2,247 @@
 
 This module implements a logging client that sends log messages over the network
 to a logging server, enabling multiple processes to consolidate logs.
+
+Each process has a single client: one ZMQ context, one PUB socket and one
+sender thread, however many times logging is set up. Records are put on a
+bounded in-memory queue by the caller and sent by the thread in batches, each
+batch being one multipart message with one msgpack-encoded record per frame.
+When the queue is full, records are dropped according to the drop policy
+instead of blocking the caller or growing without bound.
+
+Records are sent structured rather than formatted: time, level, message,
+source location, process, thread, any values bound with ``logger.bind`` (in
+``extra``) and the formatted traceback of an exception.
 """
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import atexit
+import os
+import threading
+import traceback
+from collections import deque
+from typing import TYPE_CHECKING, Any
 
+import msgpack
 import zmq
-from zmq.log.handlers import PUBHandler
 
 if TYPE_CHECKING:
     from config_types import LoggingConfigs
-    from loguru import Logger
+    from loguru import Logger, Message
+
+DROP_POLICIES = ("drop_new", "drop_oldest")
+UNKNOWN_DROP_POLICY_ERROR = "Unknown drop policy"
+
+# Milliseconds the socket may keep flushing queued batches on close.
+CLOSE_LINGER_MS = 500
+
+
+# Values msgpack cannot encode (for example objects bound as extra) are sent
+# as their string form.
+_packer = msgpack.Packer(default=str)
+
+
+def to_wire_record(record: dict[str, Any]) -> dict[str, Any]:
+    """Extract the fields of a loguru record that are sent to the server."""
+    entry = {
+        "time": record["time"].timestamp(),
+        "level": record["level"].name,
+        "message": record["message"],
+        "name": record["name"],
+        "file": record["file"].name,
+        "function": record["function"],
+        "line": record["line"],
+        "process": record["process"].id,
+        "thread": record["thread"].name,
+    }
+    if record["extra"]:
+        entry["extra"] = record["extra"]
+    exception = record["exception"]
+    if exception is not None:
+        entry["exception"] = "".join(traceback.format_exception(
+            exception.type, exception.value, exception.traceback,
+        ))
+    return entry
+
+
+class NetworkLogClient:
+    """Batched, non-blocking ZMQ PUB client used as a loguru sink."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        port: int,
+        *,
+        queue_size: int = 10000,
+        batch_size: int = 100,
+        flush_interval: float = 0.05,
+        sndhwm: int = 1000,
+        drop_policy: str = "drop_new",
+    ) -> None:
+        """Create the client; the socket and thread start on first write.
+
+        Args:
+            port (int): Port of the logging server on localhost.
+            queue_size (int): Records buffered before the drop policy applies.
+            batch_size (int): Maximum records sent in one multipart message.
+            flush_interval (float): Seconds a partial batch waits before it
+                is sent.
+            sndhwm (int): ZMQ send high-water mark, in batches.
+            drop_policy (str): ``"drop_new"`` discards incoming records when
+                the queue is full, ``"drop_oldest"`` discards the oldest.
+
+        Raises:
+            ValueError: If the drop policy is unknown.
+
+        """
+        if drop_policy not in DROP_POLICIES:
+            msg = f"{UNKNOWN_DROP_POLICY_ERROR}: {drop_policy}"
+            raise ValueError(msg)
+        self.port = port
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sndhwm = sndhwm
+        self.drop_policy = drop_policy
+        self._queue: deque[dict[str, Any]] = deque()
+        self._cond = threading.Condition()
+        self._closing = False
+        self._pid: int | None = None
+        self._thread: threading.Thread | None = None
+        self._counters = {"enqueued": 0, "sent": 0, "dropped": 0, "batches": 0}
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self) -> None:
+        """Forget the parent's lock state, thread and socket in a child."""
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+
+    def _start(self) -> None:
+        """Open the socket and start the sender thread in this process."""
+        # ZMQ contexts and threads do not survive fork(): a forked worker
+        # gets its own socket and thread, and drops the parent's backlog.
+        self._queue.clear()
+        self._pid = os.getpid()
+        self._closing = False
+        self._context = zmq.Context()
+        self._socket = self._context.socket(zmq.PUB)
+        self._socket.setsockopt(zmq.SNDHWM, self.sndhwm)
+        self._socket.connect(f"tcp://127.0.0.1:{self.port}")
+        self._thread = threading.Thread(
+            target=self._run, name="log-sender", daemon=True,
+        )
+        self._thread.start()
+
+    def write(self, message: Message) -> None:
+        """Queue one loguru record; never blocks on the network."""
+        entry = to_wire_record(message.record)
+        with self._cond:
+            if self._pid != os.getpid():
+                self._start()
+            if len(self._queue) >= self.queue_size:
+                self._counters["dropped"] += 1
+                if self.drop_policy == "drop_new":
+                    return
+                self._queue.popleft()
+            self._queue.append(entry)
+            self._counters["enqueued"] += 1
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify()
+
+    def _next_batch(self) -> list[dict[str, Any]]:
+        """Wait for a full batch or the flush interval, then take a batch."""
+        with self._cond:
+            if len(self._queue) < self.batch_size and not self._closing:
+                self._cond.wait(self.flush_interval)
+            count = min(len(self._queue), self.batch_size)
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _send(self, batch: list[dict[str, Any]]) -> None:
+        frames = [_packer.pack(entry) for entry in batch]
+        try:
+            self._socket.send_multipart(frames, flags=zmq.NOBLOCK)
+        except zmq.Again:
+            # High-water mark reached: drop rather than block the sender.
+            with self._cond:
+                self._counters["dropped"] += len(batch)
+        else:
+            with self._cond:
+                self._counters["sent"] += len(batch)
+                self._counters["batches"] += 1
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._send(batch)
+            elif self._closing:
+                return
+
+    def close(self) -> None:
+        """Send what is queued and close the socket."""
+        with self._cond:
+            if self._pid != os.getpid() or self._thread is None:
+                return
+            self._closing = True
+            self._cond.notify()
+        self._thread.join(timeout=2)
+        self._thread = None
+        self._pid = None
+        self._socket.close(linger=CLOSE_LINGER_MS)
+        self._context.term()
+
+    def stats(self) -> dict[str, int]:
+        """Return enqueued, sent and dropped record counts and queue depth."""
+        with self._cond:
+            return {**self._counters, "queue_depth": len(self._queue)}
+
+
+_client: NetworkLogClient | None = None
+_client_lock = threading.Lock()
 
 
 def setup_network_logger_client(
     logging_configs: LoggingConfigs, logger: Logger,
-) -> None:
+) -> NetworkLogClient:
     """Set up a network logger client that sends log messages via ZMQ.
 
+    The client is created once per process; later calls return it unchanged.
+
     Args:
         logging_configs (LoggingConfigs): The logging configuration.
         logger (Logger): The Loguru logger instance.
 
+    Returns:
+        NetworkLogClient: The process-wide client.
+
     """
-    zmq_socket = zmq.Context().socket(zmq.PUB)
-    zmq_socket.connect(f"tcp://127.0.0.1:{logging_configs.log_server_port}")
-    handler = PUBHandler(zmq_socket)
-
-    # Remove previous settings to prevent logging to stderr and log only to file.
-    logger.remove()
-    logger.add(
-        handler,
-        format=logging_configs.client_log_format,
-        enqueue=True,
-        level=logging_configs.min_log_level,
-        backtrace=True,  # Detailed error traces.
-        diagnose=True,   # Enable exception diagnostics.
-    )
+    global _client  # noqa: PLW0603
+    with _client_lock:
+        if _client is not None:
+            return _client
+        _client = NetworkLogClient(
+            port=logging_configs.log_server_port,
+            queue_size=logging_configs.client_queue_size,
+            batch_size=logging_configs.client_batch_size,
+            flush_interval=logging_configs.client_flush_interval,
+            sndhwm=logging_configs.client_sndhwm,
+            drop_policy=logging_configs.client_drop_policy,
+        )
+        atexit.register(_client.close)
+
+        # Remove previous settings to prevent logging to stderr and log only to file.
+        logger.remove()
+        # Records are sent structured, so loguru need not format them.
+        logger.add(
+            _client.write,
+            format="{message}",
+            level=logging_configs.min_log_level,
+        )
+        return _client
+
+
+def logging_stats() -> dict[str, int]:
+    """Return the counters of this process's logging client, if any."""
+    return _client.stats() if _client is not None else {}
@@ -2,17 +2,50 @@
 
 This module implements a logging server that receives log messages over the network
 and logs them to a file.
+
+The receiving thread polls the SUB socket and drains every waiting message
+without blocking, up to a batch size, then hands the decoded batch to a
+writer. Clients send msgpack-encoded structured records; writers append them
+as newline-delimited JSON and, optionally, as human-readable lines. Output
+goes through large in-memory buffers that are flushed to disk when full or
+after a flush interval, and files rotate daily. Several writer shards, each
+with its own files, can share the load. When a
+writer's queue is full the batch is dropped and counted instead of stalling
+the socket. Ingest rate, queue depth and drop counts are reported
+periodically.
 """
 
+from __future__ import annotations
+
+import contextlib
+import json
+import queue
+import sys
+import threading
+import time
+import zipfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import msgpack
 import zmq
 from loguru import logger
 
-from unified_logging.config_types import LoggingConfigs
-from unified_logging.logging_setup import setup_logging
+from unified_logging.logging_setup import PROJECT_ROOT, setup_logging
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from unified_logging.config_types import LoggingConfigs
+
+Record = dict[str, Any]
 
 
 def set_logging_configs(logging_configs: LoggingConfigs) -> None:
-    """Configure the logger with the provided logging settings.
+    """Send the server's own diagnostics to stderr.
+
+    Received records are written by ``BufferedLogWriter``, not by loguru.
 
     Args:
         logging_configs (LoggingConfigs): The logging configuration to apply.
@@ -20,17 +53,218 @@ def set_logging_configs(logging_configs: LoggingConfigs) -> None:
     """
     logger.remove()
     logger.add(
-        logging_configs.log_file_name,
-        rotation=logging_configs.log_rotation,
-        compression=logging_configs.log_compression,
-        format=logging_configs.server_log_format,
+        sys.stderr,
         level=logging_configs.min_log_level,
-        enqueue=True,
         backtrace=True,
         diagnose=True,
     )
 
 
+def _next_rotation(now: datetime, rotation: str) -> datetime:
+    """Return the next daily rotation time (``"HH:MM"``) after ``now``."""
+    hour, minute = (int(part) for part in rotation.split(":"))
+    rotate_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return rotate_at if rotate_at > now else rotate_at + timedelta(days=1)
+
+
+def render_json(record: Record) -> str:
+    """Render a record as one NDJSON line."""
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def text_renderer(line_format: str) -> Callable[[Record], str]:
+    """Return a renderer of human-readable lines in ``line_format``.
+
+    The format may use ``{time}``, ``{level}``, ``{message}``, ``{name}``,
+    ``{file}``, ``{function}``, ``{line}``, ``{process}`` and ``{thread}``.
+    A traceback, if any, follows the line.
+    """
+
+    def render(record: Record) -> str:
+        fields = {
+            **record,
+            "time": datetime.fromtimestamp(record["time"]).strftime(  # noqa: DTZ006
+                "%Y-%m-%d %H:%M:%S.%f",
+            )[:-3],
+        }
+        line = line_format.format_map(fields)
+        exception = record.get("exception")
+        return f"{line}\n{exception.rstrip()}" if exception else line
+
+    return render
+
+
+class RotatingFile:
+    """A buffered log file rotated daily and optionally zipped."""
+
+    def __init__(
+        self, path: Path, *, buffer_size: int, rotation: str, compression: str,
+    ) -> None:
+        """Open ``path`` for appending.
+
+        Args:
+            path (Path): The log file.
+            buffer_size (int): Bytes buffered before writing to disk.
+            rotation (str): Daily rotation time as ``"HH:MM"``.
+            compression (str): ``"zip"`` to compress rotated files.
+
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self.rotation = rotation
+        self.compression = compression
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("a", encoding="utf8", buffering=buffer_size)
+        self._rotate_at = _next_rotation(datetime.now(), rotation)  # noqa: DTZ005
+
+    def write(self, text: str, now: datetime) -> None:
+        """Append ``text``, rotating first if the rotation time has passed."""
+        if now >= self._rotate_at:
+            self._rotate(now)
+        self._file.write(text)
+
+    def flush(self) -> None:
+        """Write buffered text to disk."""
+        self._file.flush()
+
+    def _rotate(self, now: datetime) -> None:
+        """Close the current file, rename it with its date and reopen."""
+        self._file.close()
+        day = (self._rotate_at - timedelta(days=1)).strftime("%Y-%m-%d")
+        rotated = self.path.with_name(f"{self.path.stem}.{day}{self.path.suffix}")
+        if self.path.exists():
+            self.path.rename(rotated)
+            if self.compression == "zip":
+                threading.Thread(target=_compress, args=(rotated,), daemon=True).start()
+        self._file = self.path.open("a", encoding="utf8", buffering=self.buffer_size)
+        self._rotate_at = _next_rotation(now, self.rotation)
+
+
+class BufferedLogWriter:
+    """Writes batches of records to its sinks from a dedicated thread."""
+
+    def __init__(
+        self,
+        sinks: list[tuple[RotatingFile, Callable[[Record], str]]],
+        *,
+        flush_interval: float,
+        queue_size: int,
+    ) -> None:
+        """Prepare the batch queue.
+
+        Args:
+            sinks (list[tuple[RotatingFile, Callable[[Record], str]]]): Files
+                and the renderer of their lines.
+            flush_interval (float): Seconds before buffered lines are flushed.
+            queue_size (int): Batches waiting for this writer before new
+                batches are dropped.
+
+        """
+        self.sinks = sinks
+        self.flush_interval = flush_interval
+        self.batches: queue.Queue[list[Record]] = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+
+    def submit(self, batch: list[Record]) -> None:
+        """Queue a batch for writing, dropping it if the queue is full."""
+        try:
+            self.batches.put_nowait(batch)
+        except queue.Full:
+            with self._lock:
+                self.dropped += len(batch)
+
+    def _write(self, batch: list[Record]) -> None:
+        now = datetime.now()  # noqa: DTZ005
+        for sink, render in self.sinks:
+            sink.write("".join(render(record) + "\n" for record in batch), now)
+        with self._lock:
+            self.written += len(batch)
+
+    def run(self) -> None:
+        """Write queued batches, flushing at least every flush interval."""
+        last_flush = time.monotonic()
+        while True:
+            with contextlib.suppress(queue.Empty):
+                self._write(self.batches.get(timeout=self.flush_interval))
+            if time.monotonic() - last_flush >= self.flush_interval:
+                for sink, _ in self.sinks:
+                    sink.flush()
+                last_flush = time.monotonic()
+
+    def stats(self) -> dict[str, int]:
+        """Return written and dropped record counts and the queued batches."""
+        with self._lock:
+            return {
+                "written": self.written,
+                "dropped": self.dropped,
+                "queue_depth": self.batches.qsize(),
+            }
+
+
+def _compress(path: Path) -> None:
+    with zipfile.ZipFile(path.with_suffix(path.suffix + ".zip"), "w",
+                         compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.write(path, arcname=path.name)
+    path.unlink()
+
+
+def shard_path(file_name: str, shard: int, shards: int) -> Path:
+    """Return the file of one writer shard (the base file if unsharded)."""
+    base = Path(file_name)
+    if not base.is_absolute():
+        base = PROJECT_ROOT / base
+    if shards == 1:
+        return base
+    return base.with_name(f"{base.stem}.{shard}{base.suffix}")
+
+
+def build_writers(logging_configs: LoggingConfigs) -> list[BufferedLogWriter]:
+    """Create one writer per configured shard.
+
+    Each writer appends NDJSON to ``log_json_file_name`` and, if
+    ``log_text_sink`` is set, human-readable lines to ``log_file_name``.
+    """
+    shards = max(1, logging_configs.server_writer_shards)
+    file_options = {
+        "buffer_size": logging_configs.server_buffer_size,
+        "rotation": logging_configs.log_rotation,
+        "compression": logging_configs.log_compression,
+    }
+    render_text = text_renderer(logging_configs.server_log_format)
+    writers = []
+    for shard in range(shards):
+        json_path = shard_path(logging_configs.log_json_file_name, shard, shards)
+        sinks = [(RotatingFile(json_path, **file_options), render_json)]
+        if logging_configs.log_text_sink:
+            text_path = shard_path(logging_configs.log_file_name, shard, shards)
+            sinks.append((RotatingFile(text_path, **file_options), render_text))
+        writers.append(BufferedLogWriter(
+            sinks,
+            flush_interval=logging_configs.server_flush_interval,
+            queue_size=logging_configs.server_queue_size,
+        ))
+    return writers
+
+
+def _decode(frames: list[bytes]) -> list[Record]:
+    """Decode one client batch: a msgpack-encoded record per frame."""
+    return [msgpack.unpackb(frame) for frame in frames]
+
+
+def _report(
+    writers: list[BufferedLogWriter], received: int, elapsed: float,
+) -> None:
+    stats = [writer.stats() for writer in writers]
+    logger.info(
+        f"Ingest {received / elapsed:,.0f} msg/s | "
+        f"queue depth {sum(s['queue_depth'] for s in stats)} batches | "
+        f"written {sum(s['written'] for s in stats):,} | "
+        f"dropped {sum(s['dropped'] for s in stats):,}",
+    )
+
+
 def start_logging_server(logging_configs: LoggingConfigs) -> None:
     """Start the logging server to receive and process log messages.
 
@@ -39,19 +273,46 @@ def start_logging_server(logging_configs: LoggingConfigs) -> None:
         server port.
 
     """
+    writers = build_writers(logging_configs)
+    for shard, writer in enumerate(writers):
+        threading.Thread(
+            target=writer.run, name=f"log-writer-{shard}", daemon=True,
+        ).start()
+
     socket = zmq.Context().socket(zmq.SUB)
+    socket.setsockopt(zmq.RCVHWM, logging_configs.server_rcvhwm)
     socket.bind(f"tcp://127.0.0.1:{logging_configs.log_server_port}")
     socket.subscribe("")
+    poller = zmq.Poller()
+    poller.register(socket, zmq.POLLIN)
+
+    batch_size = logging_configs.server_batch_size
+    shard = 0
+    received = 0
+    last_report = time.monotonic()
     while True:
         try:
-            ret_val = socket.recv_multipart()
-            log_level_name, message = ret_val
-            log_level_name = log_level_name.decode("utf8").strip()
-            message = message.decode("utf8").strip()
-            logger.log(log_level_name, message)
+            if poller.poll(logging_configs.server_poll_timeout_ms):
+                batch: list[Record] = []
+                while len(batch) < batch_size:
+                    try:
+                        batch.extend(_decode(socket.recv_multipart(zmq.NOBLOCK)))
+                    except zmq.Again:
+                        break
+                    except ValueError as e:
+                        logger.warning(f"Skipping malformed log message: {e}")
+                received += len(batch)
+                writers[shard].submit(batch)
+                shard = (shard + 1) % len(writers)
         except zmq.ZMQError as e:
             logger.exception(f"ZMQ error when logging: {e}")
 
+        elapsed = time.monotonic() - last_report
+        if elapsed >= logging_configs.server_report_interval:
+            _report(writers, received, elapsed)
+            received = 0
+            last_report = time.monotonic()
+
 
 if __name__ == "__main__":
     logging_configs = setup_logging()
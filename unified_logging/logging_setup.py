@@ -15,9 +15,15 @@ from unified_logging.logging_client import setup_network_logger_client
 PROJECT_ROOT = Path(__file__).parent.parent
 DEFAULT_CONFIG_PATH = PROJECT_ROOT / "unified_logging" / "configs.toml"
 
+# Configurations already applied in this process, by config path
+_configured: dict[str, LoggingConfigs] = {}
+
 def setup_logging(config_path: str = str(DEFAULT_CONFIG_PATH)) -> LoggingConfigs:
     """Set up unified network logging with a specified config file.
 
+    Repeated calls with the same config path reuse the existing setup instead
+    of opening another socket.
+
     Args:
         config_path (str): Path to the logging config file (default:
             project_root/unified_logging/configs.toml).
@@ -26,6 +32,9 @@ def setup_logging(config_path: str = str(DEFAULT_CONFIG_PATH)) -> LoggingConfigs
         LoggingConfigs: Loaded logging configuration.
 
     """
+    if config_path in _configured:
+        return _configured[config_path]
+
     try:
         config_file = Path(config_path)
         logging_configs = LoggingConfigs.load_from_path(config_file)
@@ -37,6 +46,7 @@ def setup_logging(config_path: str = str(DEFAULT_CONFIG_PATH)) -> LoggingConfigs
     setup_network_logger_client(logging_configs, logger)
 
     logger.info(f"Unified logging initialized with config from {config_path}")
+    _configured[config_path] = logging_configs
     return logging_configs
 
 if __name__ == "__main__":